@@ -0,0 +1,118 @@
+"""
+🚦 Damsole Technologies - LLM Admission Control
+Caps how many requests can wait on the LLM at once, so a burst of support
+questions can't tie up every worker thread while static pages, /contact
+and lead collection still need them.
+
+A request enters the LLM lane if a slot is free, or waits up to
+LLM_QUEUE_TIMEOUT_MS in a short queue. When the lane and the queue are full
+it is shed immediately and the caller answers without the LLM.
+
+The lane counts upstream calls, not visitors: app.py admits only the leader
+of a coalesced (single-flight) LLM call, so twenty visitors asking the same
+question take one slot.
+
+Config (.env):
+    LLM_MAX_CONCURRENCY=2
+    LLM_MAX_QUEUE=1
+    LLM_QUEUE_TIMEOUT_MS=2000
+Under `python main.py serve`, keep LLM_MAX_CONCURRENCY + LLM_MAX_QUEUE below
+SERVE_THREADS so other routes always have a thread (serve warns otherwise).
+"""
+
+import contextlib
+import os
+import threading
+
+from structured_logging import get_logger
+
+logger = get_logger("admission")
+
+def _env_int(key, default):
+    try:
+        return int(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+LLM_MAX_CONCURRENCY = max(1, _env_int("LLM_MAX_CONCURRENCY", 2))
+LLM_MAX_QUEUE = max(0, _env_int("LLM_MAX_QUEUE", 1))
+LLM_QUEUE_TIMEOUT = max(0, _env_int("LLM_QUEUE_TIMEOUT_MS", 2000)) / 1000.0
+
+
+class LaneSaturated(Exception):
+    """Raised by AdmissionController.run() when the call was shed"""
+
+
+class AdmissionController:
+    """Semaphore-bounded lane with a bounded, time-limited wait queue"""
+
+    def __init__(self, name, max_concurrent, max_queue, queue_timeout):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.stats = {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_timeout": 0}
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                **self.stats,
+            }
+
+    def _acquire(self):
+        if self._slots.acquire(blocking=False):
+            return True
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.stats["shed_queue_full"] += 1
+                return False
+            self.waiting += 1
+            self.stats["queued"] += 1
+        try:
+            admitted = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        if not admitted:
+            with self._lock:
+                self.stats["shed_timeout"] += 1
+        return admitted
+
+    @contextlib.contextmanager
+    def slot(self):
+        """`with lane.slot() as admitted:` - run the guarded call only if admitted"""
+        admitted = self._acquire()
+        if not admitted:
+            logger.warning("%s lane saturated (%s active, %s waiting); shedding request",
+                           self.name, self.active, self.waiting)
+            yield False
+            return
+        with self._lock:
+            self.active += 1
+            self.stats["admitted"] += 1
+        try:
+            yield True
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def run(self, fn):
+        """Return fn() if admitted; raise LaneSaturated if shed"""
+        with self.slot() as admitted:
+            if not admitted:
+                raise LaneSaturated(self.name)
+            return fn()
+
+
+def create_llm_lane():
+    return AdmissionController("llm", LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT)
@@ -0,0 +1,265 @@
+"""
+⚡ Damsole Technologies - Prefetched Support Answers
+Keeps pre-generated LLM answers for the widget's suggestion chips and the
+most frequently asked support questions, so those questions are answered
+from memory instead of waiting for a cold OpenAI call.
+
+A background thread refreshes the answers on a schedule, and immediately
+when the knowledge base / support prompt fingerprint changes. Answers are
+persisted to a JSON file so restarts start warm. Under a pre-forked server
+one worker (whoever holds the `.lock` file) generates answers; the others
+reload the file when it changes, so the LLM is not called once per worker.
+
+Config (.env):
+    PREFETCH_ENABLED=1                 # 0 disables the cache entirely
+    PREFETCH_REFRESH_INTERVAL=21600    # seconds before a prefetched answer is regenerated
+    PREFETCH_TOP_QUESTIONS=20          # frequent questions prefetched in addition to the chips
+    PREFETCH_MIN_HITS=3                # times a question must be asked to count as frequent
+    PREFETCH_FILE=.answer_cache.json
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process generates its own answers
+    fcntl = None
+
+from structured_logging import get_logger
+
+logger = get_logger("answer_cache")
+
+def _env_int(key, default):
+    try:
+        return int(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1").lower() not in ("0", "false", "no")
+PREFETCH_REFRESH_INTERVAL = max(60, _env_int("PREFETCH_REFRESH_INTERVAL", 21600))
+PREFETCH_TOP_QUESTIONS = max(0, _env_int("PREFETCH_TOP_QUESTIONS", 20))
+PREFETCH_MIN_HITS = max(1, _env_int("PREFETCH_MIN_HITS", 3))
+PREFETCH_FILE = os.getenv(
+    "PREFETCH_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".answer_cache.json")
+)
+PREFETCH_CHECK_INTERVAL = 30   # seconds between checks for stale answers / file changes
+PREFETCH_RETRY_DELAY = 300     # seconds before retrying a question whose generation failed
+MAX_TRACKED_QUESTIONS = 1000
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(text):
+    """Cache key: lowercase, single spaces, no trailing punctuation"""
+    return _SPACES.sub(" ", text.lower()).strip().rstrip("?!. ")
+
+
+class AnswerCache:
+    """
+    `generate(question)` returns a fresh answer or raises.
+    `base_questions()` returns the questions that are always prefetched
+    (suggestion chips, FAQs); `fingerprint()` changes whenever answers
+    generated earlier should be thrown away (KB or prompt edits).
+    `should_prefetch(question)` filters out questions answered without the LLM.
+    """
+
+    def __init__(self, generate, base_questions, fingerprint, should_prefetch=lambda question: True,
+                 path=PREFETCH_FILE, interval=PREFETCH_REFRESH_INTERVAL,
+                 top_n=PREFETCH_TOP_QUESTIONS, min_hits=PREFETCH_MIN_HITS, enabled=PREFETCH_ENABLED):
+        self.generate = generate
+        self.base_questions = base_questions
+        self.fingerprint = fingerprint
+        self.should_prefetch = should_prefetch
+        self.path = path
+        self.interval = interval
+        self.top_n = top_n
+        self.min_hits = min_hits
+        self.enabled = enabled
+        self._answers = {}        # key -> {"question", "answer", "generated_at"}
+        self._fingerprint = None
+        self._file_mtime = None
+        self._asked = Counter()   # LLM-routed questions seen by this worker
+        self._failed = {}         # key -> time of last failed generation
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._force = False
+        self._started_pid = None
+        self._lock_file = None
+        self.stats = {"hits": 0, "misses": 0, "generated": 0}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._answers)
+
+    # --- Serving ---
+    def get(self, question):
+        """Return the prefetched answer, or None (and count the question as asked)"""
+        if not self.enabled:
+            return None
+        self.start()
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._answers.get(key)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry["answer"]
+            self.stats["misses"] += 1
+            self._asked[key] += 1
+            if len(self._asked) > MAX_TRACKED_QUESTIONS:
+                self._asked = Counter(dict(self._asked.most_common(MAX_TRACKED_QUESTIONS // 2)))
+        return None
+
+    def invalidate(self):
+        """Regenerate every prefetched answer now (e.g. after a KB edit)"""
+        if not self.enabled:
+            return
+        self.start()
+        with self._lock:
+            self._force = True
+        # The generating worker may be another process; it checks for this marker
+        try:
+            open(self.path + ".refresh", "a").close()
+        except OSError as e:
+            logger.warning("Could not request answer refresh: %s", e)
+        self._wakeup.set()
+
+    def warm(self):
+        """Load answers persisted by an earlier run (called before workers fork)"""
+        if self.enabled:
+            self._reload_file()
+        return len(self)
+
+    # --- Background Refresh ---
+    def start(self):
+        """Start the refresh thread (once per process, so forked workers get their own)"""
+        if not self.enabled:
+            return
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+            self._lock_file = None  # a lock inherited across fork() is the parent's
+        threading.Thread(target=self._run, name="answer-prefetch", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Answer prefetch round failed")
+            self._wakeup.wait(PREFETCH_CHECK_INTERVAL)
+            self._wakeup.clear()
+
+    def refresh(self):
+        """Generate missing or stale answers (leader) or pick up the leader's file"""
+        if not self._is_leader():
+            self._reload_file()
+            return
+
+        if self._fingerprint is None:
+            self._reload_file()
+        fingerprint = self.fingerprint()
+        requested = os.path.exists(self.path + ".refresh")
+        if requested:
+            try:
+                os.remove(self.path + ".refresh")
+            except OSError:
+                pass
+        with self._lock:
+            force = self._force or requested or fingerprint != self._fingerprint
+            self._force = False
+            answers = {} if force else dict(self._answers)
+            hot = [key for key, count in self._asked.most_common(self.top_n) if count >= self.min_hits]
+        if force and self._fingerprint is not None:
+            logger.info("Regenerating prefetched answers (knowledge base changed or refresh requested)")
+
+        wanted = {}
+        for question in list(self.base_questions()) + hot:
+            key = normalize_question(question)
+            if key and key not in wanted and self.should_prefetch(question):
+                wanted[key] = answers.get(key, {}).get("question", question)
+
+        now = time.time()
+        changed = force or set(answers) - set(wanted)
+        answers = {key: entry for key, entry in answers.items() if key in wanted}
+        for key, question in wanted.items():
+            entry = answers.get(key)
+            if entry is not None and now - entry["generated_at"] < self.interval:
+                continue
+            if now - self._failed.get(key, 0) < PREFETCH_RETRY_DELAY:
+                continue
+            try:
+                answer = self.generate(question)
+            except Exception as e:
+                self._failed[key] = now
+                logger.warning("Could not prefetch answer for %r: %s", question, e)
+                continue
+            self._failed.pop(key, None)
+            answers[key] = {"question": question, "answer": answer, "generated_at": time.time()}
+            self.stats["generated"] += 1
+            changed = True
+            # Publish as we go so the first answers are served before the round ends
+            self._publish(fingerprint, answers)
+
+        if changed:
+            self._publish(fingerprint, answers)
+            self._write_file(fingerprint, answers)
+            logger.info("Prefetched answers ready (%s questions)", len(answers))
+
+    def _publish(self, fingerprint, answers):
+        with self._lock:
+            self._answers = dict(answers)
+            self._fingerprint = fingerprint
+
+    def _is_leader(self):
+        """Hold an exclusive lock on `<file>.lock` for the life of the process"""
+        if fcntl is None or self._lock_file is not None:
+            return True
+        lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info("This worker generates prefetched answers (pid %s)", os.getpid())
+        return True
+
+    # --- Persistence ---
+    def _reload_file(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._file_mtime:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read prefetched answers from %s: %s", self.path, e)
+            return
+        self._file_mtime = mtime
+        if payload.get("fingerprint") != self.fingerprint():
+            return  # generated for an older KB; the leader will replace it
+        self._publish(payload["fingerprint"], payload.get("answers", {}))
+
+    def _write_file(self, fingerprint, answers):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint, "answers": answers}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._file_mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            logger.warning("Could not persist prefetched answers to %s: %s", self.path, e)
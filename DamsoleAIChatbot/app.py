@@ -7,7 +7,7 @@ Collects: Name, Email, Phone, Address, Project Requirement, Deadline
 from flask import Flask, render_template, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
-import os, smtplib, datetime, re
+import os, smtplib, datetime, re, hmac, socket, time, json, hashlib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import openai
@@ -29,6 +29,22 @@ except ImportError:
 # Load environment
 load_dotenv()
 
+# Local modules that read their config from the environment
+from structured_logging import configure_logging, get_logger, bind_log_context, init_request_logging
+from notifications import NotificationDigest, is_urgent
+from idempotency import IdempotencyStore, idempotent
+from intent_classifier import classify_intent, get_model as get_intent_model
+from answer_cache import AnswerCache, PREFETCH_ENABLED, normalize_question
+from single_flight import SingleFlight
+from llm_router import LLMRouter, build_providers_from_env
+from session_store import create_session_store
+from admission import create_llm_lane, LaneSaturated
+from sqlite_store import SQLiteConnections, LEADS_TABLE_SQL, TRANSCRIPTS_TABLE_SQL, adapt_query
+from transcript_archive import create_transcript_archiver, TRANSCRIPT_ARCHIVE, TRANSCRIPT_IDLE_AFTER
+
+configure_logging()
+logger = get_logger("app")
+
 app = Flask(__name__)
 
 google_api_key = os.getenv("GOOGLE_API_KEY")
@@ -48,8 +64,8 @@ def _env_str(key: str, default: str = "") -> str:
 
 openai.api_key = _env_str("OPENAI_API_KEY")
 
-# Database configuration - support both MySQL and PostgreSQL
-DB_TYPE = _env_str("DB_TYPE", "").lower()  # "mysql" or "postgres" or auto-detect
+# Database configuration - support MySQL, PostgreSQL and embedded SQLite
+DB_TYPE = _env_str("DB_TYPE", "").lower()  # "mysql", "postgres", "sqlite" or auto-detect
 
 # Check for DATABASE_URL (Render PostgreSQL format)
 DATABASE_URL = _env_str("DATABASE_URL", "")
@@ -89,8 +105,29 @@ if not DB_TYPE:
     else:
         DB_TYPE = "mysql"  # Default to MySQL for local development
 
+# Seconds to wait for the database server before giving up, so a hung
+# database fails fast (and shows up in /health) instead of blocking a thread
+try:
+    DB_CONNECT_TIMEOUT = max(1, int(_env_str("DB_CONNECT_TIMEOUT", "5")))
+except ValueError:
+    DB_CONNECT_TIMEOUT = 5
+
 ADMIN_EMAIL = _env_str("ADMIN_EMAIL")
 ADMIN_PASSWORD = _env_str("ADMIN_PASSWORD")
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 587
+
+# Bearer token for admin-only endpoints (lead export etc.). Empty disables them.
+ADMIN_API_TOKEN = _env_str("ADMIN_API_TOKEN")
+
+def is_admin_request(auth_header):
+    """Check an `Authorization: Bearer <token>` header against ADMIN_API_TOKEN"""
+    if not ADMIN_API_TOKEN or not auth_header:
+        return False
+    scheme, _, token = auth_header.partition(" ")
+    if scheme.lower() != "bearer":
+        return False
+    return hmac.compare_digest(token.strip().encode(), ADMIN_API_TOKEN.encode())
 
 # Check if database is configured
 # For local: allow localhost, for Render: require non-localhost
@@ -102,6 +139,12 @@ DB_CONFIGURED = all([
     DB_SETTINGS["database"]
 ]) and (IS_LOCAL or DB_SETTINGS["host"].strip().lower() not in ["localhost", "127.0.0.1", ""])
 
+# SQLite needs no credentials: the database is a local file (SQLITE_PATH)
+sqlite_connections = None
+if DB_TYPE == "sqlite":
+    sqlite_connections = SQLiteConnections()
+    DB_CONFIGURED = True
+
 # --- Database Connection Helper ---
 def get_db_connection():
     """Get database connection based on DB_TYPE"""
@@ -114,35 +157,65 @@ def get_db_connection():
                 host=DB_SETTINGS["host"],
                 user=DB_SETTINGS["user"],
                 password=DB_SETTINGS["password"],
-                database=DB_SETTINGS["database"]
+                database=DB_SETTINGS["database"],
+                connect_timeout=DB_CONNECT_TIMEOUT
             )
         elif DB_TYPE == "mysql" and MYSQL_AVAILABLE:
-            return mysql.connector.connect(**DB_SETTINGS)
+            return mysql.connector.connect(**DB_SETTINGS, connection_timeout=DB_CONNECT_TIMEOUT)
+        elif DB_TYPE == "sqlite":
+            return sqlite_connections.connect()
         else:
-            print(f"⚠️ Database type '{DB_TYPE}' not available. Install required package.")
+            logger.warning("Database type '%s' not available. Install required package.", DB_TYPE)
             return None
     except Exception as e:
-        print(f"⚠️ Database connection failed: {e}")
+        logger.warning("Database connection failed: %s", e)
         return None
 
 # --- Database Setup ---
+# Archived chat transcripts; only created when TRANSCRIPT_ARCHIVE=db
+TRANSCRIPTS_TABLE_SQL_BY_DB = {
+    "sqlite": TRANSCRIPTS_TABLE_SQL,
+    "postgres": """
+        CREATE TABLE IF NOT EXISTS transcripts (
+            id SERIAL PRIMARY KEY,
+            session_id VARCHAR(255),
+            reason VARCHAR(32),
+            archived_at TIMESTAMP,
+            turns INTEGER,
+            messages TEXT
+        )
+    """,
+    "mysql": """
+        CREATE TABLE IF NOT EXISTS transcripts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            session_id VARCHAR(255),
+            reason VARCHAR(32),
+            archived_at DATETIME,
+            turns INT,
+            messages MEDIUMTEXT
+        )
+    """,
+}
+
 def init_db():
     """Initialize database if credentials are provided"""
     if not DB_CONFIGURED:
-        print("ℹ️ Database not configured. App will work without database storage.")
-        print("ℹ️ Only email notifications will be sent (if email is configured).")
+        logger.info("Database not configured. App will work without database storage.")
+        logger.info("Only email notifications will be sent (if email is configured).")
         return
     
     conn = get_db_connection()
     if not conn:
-        print(f"⚠️ Could not connect to {DB_TYPE} database.")
+        logger.warning("Could not connect to %s database.", DB_TYPE)
         return
     
     try:
         cur = conn.cursor()
         
         # Check if table exists (different syntax for MySQL vs PostgreSQL)
-        if DB_TYPE == "postgres":
+        if DB_TYPE == "sqlite":
+            cur.execute(LEADS_TABLE_SQL)
+        elif DB_TYPE == "postgres":
             cur.execute("""
                 SELECT EXISTS (
                     SELECT FROM information_schema.tables 
@@ -160,10 +233,10 @@ def init_db():
                 columns = [col[0] for col in cur.fetchall()]
                 
                 if 'customer_name' in columns and 'full_name' not in columns:
-                    print("🔄 Migrating database schema from old to new format...")
+                    logger.info("Migrating database schema from old to new format...")
                     cur.execute("DROP TABLE IF EXISTS leads")
                     conn.commit()
-                    print("✅ Old table dropped")
+                    logger.info("Old table dropped")
             
             # Create table with PostgreSQL syntax
             cur.execute("""
@@ -187,10 +260,10 @@ def init_db():
                 columns = [col[0] for col in cur.fetchall()]
                 
                 if 'customer_name' in columns and 'full_name' not in columns:
-                    print("🔄 Migrating database schema from old to new format...")
+                    logger.info("Migrating database schema from old to new format...")
                     cur.execute("DROP TABLE IF EXISTS leads")
                     conn.commit()
-                    print("✅ Old table dropped")
+                    logger.info("Old table dropped")
             
             # Create table with MySQL syntax
             cur.execute("""
@@ -206,27 +279,55 @@ def init_db():
                 )
             """)
         
+        if TRANSCRIPT_ARCHIVE == "db":
+            cur.execute(TRANSCRIPTS_TABLE_SQL_BY_DB.get(DB_TYPE, TRANSCRIPTS_TABLE_SQL_BY_DB["mysql"]))
+        
         conn.commit()
         cur.close()
         conn.close()
-        print(f"✅ {DB_TYPE.upper()} database initialized successfully!")
+        logger.info("%s database initialized successfully!", DB_TYPE.upper())
     except Exception as e:
-        print(f"⚠️ Database initialization failed: {e}")
-        print(f"⚠️ Make sure {DB_TYPE} is running and credentials in .env are correct.")
+        logger.warning("Database initialization failed: %s", e)
+        logger.warning("Make sure %s is running and credentials in .env are correct.", DB_TYPE)
 
 init_db()
 
 # --- Email Function ---
+def send_admin_email(subject, body):
+    """Send a plain-text email to the admin inbox over one SMTP session"""
+    if not ADMIN_EMAIL or not ADMIN_PASSWORD:
+        logger.warning("Email credentials not configured. Skipping email send.")
+        return False
+    
+    try:
+        msg = MIMEMultipart()
+        msg["From"] = ADMIN_EMAIL
+        msg["To"] = ADMIN_EMAIL
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "plain"))
+
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as s:
+            s.starttls()
+            s.login(ADMIN_EMAIL, ADMIN_PASSWORD)
+            s.send_message(msg)
+        logger.info("Email sent successfully to admin!")
+        return True
+    except Exception as e:
+        logger.error("Email send failed: %s", e)
+        return False
+
+# Coalesces admin emails into digests when NOTIFY_DIGEST_WINDOW is set
+notifier = NotificationDigest(send_admin_email)
+
 def send_email(data):
     """Send email with client details ONLY to admin email"""
     if not ADMIN_EMAIL or not ADMIN_PASSWORD:
-        print("⚠️ Email credentials not configured. Skipping email send.")
+        logger.warning("Email credentials not configured. Skipping email send.")
         return False
     
-    try:
-        subject = "📩 New Lead - Damsole Technologies Support Chatbot"
-        
-        body = f"""
+    subject = "📩 New Lead - Damsole Technologies Support Chatbot"
+    
+    body = f"""
 New Lead Received from Damsole Technologies Support Chatbot
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -245,42 +346,32 @@ CLIENT DETAILS:
 Timestamp: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 This is an automated email from Damsole Technologies Support Chatbot.
-        """.strip()
+    """.strip()
 
-        msg = MIMEMultipart()
-        msg["From"] = ADMIN_EMAIL
-        msg["To"] = ADMIN_EMAIL
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain"))
-
-        with smtplib.SMTP("smtp.gmail.com", 587) as s:
-            s.starttls()
-            s.login(ADMIN_EMAIL, ADMIN_PASSWORD)
-            s.send_message(msg)
-        print("✅ Email sent successfully to admin!")
-        return True
-    except Exception as e:
-        print(f"❌ Email send failed: {e}")
-        return False
+    return notifier.notify("lead", subject, body, urgent=is_urgent(data))
 
 # --- Save to DB ---
+INSERT_LEAD_SQL = """
+    INSERT INTO leads (full_name, email, phone_number, address, project_requirement, deadline)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+if DB_TYPE == "sqlite":
+    INSERT_LEAD_SQL = adapt_query(INSERT_LEAD_SQL)
+
 def save_to_db(data):
     """Save data to database if configured, otherwise skip silently"""
     if not DB_CONFIGURED:
-        print("ℹ️ Database not configured. Skipping database save.")
+        logger.info("Database not configured. Skipping database save.")
         return False
     
     conn = get_db_connection()
     if not conn:
-        print("⚠️ Could not connect to database. Skipping save.")
+        logger.warning("Could not connect to database. Skipping save.")
         return False
     
     try:
         cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO leads (full_name, email, phone_number, address, project_requirement, deadline)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (
+        cur.execute(INSERT_LEAD_SQL, (
             data.get("Full Name", ""),
             data.get("Email", ""),
             data.get("Phone Number", ""),
@@ -290,60 +381,75 @@ def save_to_db(data):
         ))
         conn.commit()
         cur.close()
-        conn.close()
-        print("✅ Data saved to database successfully!")
+        logger.info("Data saved to database successfully!")
         return True
     except Exception as e:
-        print(f"❌ Database save failed: {e}")
-        print("ℹ️ Continuing without database storage.")
+        logger.error("Database save failed: %s", e)
+        logger.info("Continuing without database storage.")
+        return False
+    finally:
+        conn.close()
+
+# --- Save Transcripts (archiver thread, TRANSCRIPT_ARCHIVE=db) ---
+INSERT_TRANSCRIPT_SQL = """
+    INSERT INTO transcripts (session_id, reason, archived_at, turns, messages)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+if DB_TYPE == "sqlite":
+    INSERT_TRANSCRIPT_SQL = adapt_query(INSERT_TRANSCRIPT_SQL)
+
+def save_transcripts(records):
+    """Bulk-insert a batch of archived transcripts in one transaction"""
+    if not DB_CONFIGURED:
         return False
+    conn = get_db_connection()
+    if not conn:
+        return False
+    try:
+        cur = conn.cursor()
+        cur.executemany(INSERT_TRANSCRIPT_SQL, [
+            (record["session_id"], record["reason"], record["archived_at"], record["turns"],
+             json.dumps(record["messages"], ensure_ascii=False, default=str))
+            for record in records
+        ])
+        conn.commit()
+        cur.close()
+        return True
+    finally:
+        conn.close()
+
+# --- Dependency Probes (run by the health monitor, never on the request path) ---
+def check_database():
+    """Open a connection and run a trivial query"""
+    if not DB_CONFIGURED:
+        return {"ok": True, "configured": False}
+    conn = get_db_connection()
+    if not conn:
+        return {"ok": False, "configured": True, "type": DB_TYPE, "error": "connection failed"}
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchone()
+        cur.close()
+    finally:
+        conn.close()
+    return {"ok": True, "configured": True, "type": DB_TYPE}
+
+def check_smtp():
+    """TCP reachability of the SMTP server (no login, so no mail quota is used)"""
+    if not ADMIN_EMAIL or not ADMIN_PASSWORD:
+        return {"ok": True, "configured": False}
+    with socket.create_connection((SMTP_HOST, SMTP_PORT), timeout=5):
+        pass
+    return {"ok": True, "configured": True, "host": SMTP_HOST}
 
 # --- Validation Functions ---
-def validate_name(name):
-    """Validate name: minimum 2 letters"""
-    if not name or len(name.strip()) < 2:
-        return False, "Please provide your full name (at least 2 letters)."
-    if not re.match(r'^[a-zA-Z\s\.]+$', name.strip()):
-        return False, "Name should only contain letters, spaces, and dots."
-    return True, None
-
-def validate_email(email):
-    """Validate email format"""
-    if not email or not email.strip():
-        return False, "Please provide a valid email address."
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_pattern, email.strip()):
-        return False, "Please enter a valid email address (e.g., name@example.com)."
-    return True, None
-
-def validate_phone(phone):
-    """Validate phone: minimum 10 digits"""
-    if not phone or not phone.strip():
-        return False, "Please provide your phone number."
-    digits_only = re.sub(r'[\s\-\(\)\+]', '', phone)
-    if not digits_only.isdigit():
-        return False, "Phone number should only contain digits."
-    if len(digits_only) < 10:
-        return False, "Phone number must be at least 10 digits."
-    return True, None
-
-def validate_address(address):
-    """Validate address: minimum 5 characters"""
-    if not address or len(address.strip()) < 5:
-        return False, "Please provide a complete address (at least 5 characters)."
-    return True, None
-
-def validate_project(project):
-    """Validate project requirement: must be clear"""
-    if not project or len(project.strip()) < 3:
-        return False, "Please tell us what you want to build (e.g., website, app, logo, software)."
-    return True, None
-
-def validate_deadline(deadline):
-    """Validate deadline: any format allowed"""
-    if not deadline or len(deadline.strip()) < 2:
-        return False, "Please provide a deadline."
-    return True, None
+# Precompiled validators live in validation.py (shared with the contact form)
+from validation import (
+    validate_name, validate_email, validate_phone,
+    validate_address, validate_project, validate_deadline,
+    validate_field
+)
 
 # --- Required Fields for Collection ---
 REQUIRED_FIELDS = [
@@ -376,6 +482,10 @@ KNOWLEDGE_BASE = {
     "time": "Project timelines depend on complexity:\n\n• Simple Website: 1-2 weeks\n• E-commerce Site: 3-6 weeks\n• Custom Application: 4-12 weeks\n• Logo/Branding: 1-2 weeks\n\nWe always discuss timelines upfront and can work on urgent projects if needed!",
 }
 
+# Words of each answer, for the load-shedding fallback
+_WORDS = re.compile(r"[a-z]{4,}")
+KB_WORDS = {topic: set(_WORDS.findall(answer.lower())) for topic, answer in KNOWLEDGE_BASE.items()}
+
 def get_hardcoded_response(user_message):
     """Check hard-coded knowledge base for answers"""
     message_lower = user_message.lower().strip()
@@ -401,12 +511,22 @@ def get_hardcoded_response(user_message):
     
     return None
 
+# --- Coalescing of identical in-flight upstream calls ---
+llm_flight = SingleFlight("llm")
+search_flight = SingleFlight("search")
+
+# Caps request threads waiting on the LLM so other routes keep capacity
+llm_lane = create_llm_lane()
+
 # --- Google Custom Search API Fallback ---
 def get_google_search_response(query):
     """Get response using Google Custom Search API as fallback"""
     if not google_api_key or not google_cse_id:
         return None
-    
+    # Concurrent identical searches share one upstream request
+    return search_flight.do(normalize_question(query), lambda: _google_search(query))
+
+def _google_search(query):
     try:
         # Search for Damsole Technologies related information
         search_query = f"Damsole Technologies {query}"
@@ -430,19 +550,40 @@ def get_google_search_response(query):
                 return f"Based on available information: {combined_info[:200]}...\n\nFor more specific details about Damsole Technologies, please contact us at sales@damsole.com or call 91+9356917424."
         return None
     except Exception as e:
-        print(f"⚠️ Google Search API error: {e}")
+        logger.warning("Google Search API error: %s", e)
         return None
 
+# --- LLM Call Status (reported by the health monitor) ---
+LLM_FAILURE_THRESHOLD = 3
+llm_status = {"consecutive_failures": 0, "last_success": None, "last_error": None, "last_error_at": None}
+
+def _record_llm_result(error=None):
+    if error is None:
+        llm_status["consecutive_failures"] = 0
+        llm_status["last_success"] = time.time()
+    else:
+        llm_status["consecutive_failures"] += 1
+        llm_status["last_error"] = str(error)[:200]
+        llm_status["last_error_at"] = time.time()
+
+def check_llm():
+    """Report recent LLM call outcomes; failing after repeated consecutive errors"""
+    failures = llm_status["consecutive_failures"]
+    return {
+        "ok": failures < LLM_FAILURE_THRESHOLD,
+        "configured": llm_router.configured,
+        "state": "failing" if failures >= LLM_FAILURE_THRESHOLD else "healthy",
+        **llm_status,
+        "routing": llm_router.snapshot()
+    }
+
+# --- LLM Providers ---
+SUPPORT_MODEL = "gpt-3.5-turbo"
+
+llm_router = LLMRouter(build_providers_from_env(SUPPORT_MODEL, openai.api_key))
+
 # --- AI Response for Support Questions ---
-def get_support_response(user_message, conversation_history=None):
-    """Get AI response as a support team agent"""
-    
-    # First check hard-coded responses
-    hardcoded = get_hardcoded_response(user_message)
-    if hardcoded:
-        return hardcoded
-    
-    system_prompt = """You are a friendly, intelligent, and highly professional Support Team Agent of Damsole Technologies.
+SUPPORT_SYSTEM_PROMPT = """You are a friendly, intelligent, and highly professional Support Team Agent of Damsole Technologies.
 
 Your communication tone:
 - Warm and human-like
@@ -459,83 +600,208 @@ About Damsole Technologies:
 
 Always reply in a simple, friendly, and professional tone. Behave like a real human support team member, not an AI."""
 
+def generate_support_answer(user_message, conversation_history=None, lane=None):
+    """
+    Ask the LLM as a support team agent (raises on API errors). With a lane,
+    only the call that actually goes upstream needs a slot: visitors who join
+    an identical in-flight question share its answer, or its LaneSaturated.
+    """
+    history = conversation_history[-4:] if conversation_history else []
+    # Same question with the same recent context -> one shared upstream call
+    key = json.dumps(
+        [normalize_question(user_message)] + [[m["role"], normalize_question(m["content"])] for m in history]
+    )
+    if lane is None:
+        return llm_flight.do(key, lambda: _call_llm(user_message, history))
+    return llm_flight.do(key, lambda: lane.run(lambda: _call_llm(user_message, history)))
+
+def _call_llm(user_message, history):
+    messages = [{"role": "system", "content": SUPPORT_SYSTEM_PROMPT}]
+    messages.extend(history)
+    messages.append({"role": "user", "content": user_message})
+    
     try:
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        if conversation_history:
-            messages.extend(conversation_history[-4:])
-        
-        messages.append({"role": "user", "content": user_message})
-        
-        try:
-            from openai import OpenAI
-            client = OpenAI(api_key=openai.api_key)
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=250
-            )
-            return response.choices[0].message.content.strip()
-        except (ImportError, AttributeError):
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=250
-            ) 
-            return response.choices[0].message.content.strip()
+        reply, provider = llm_router.complete(messages, temperature=0.7, max_tokens=250)
+    except Exception as e:
+        _record_llm_result(e)
+        raise
+    _record_llm_result()
+    logger.debug("Support reply generated by %s", provider)
+    return reply
+
+def get_support_response(user_message, conversation_history=None, intent=None):
+    """Get AI response as a support team agent"""
+    
+    # First check hard-coded responses, then the classified intent
+    hardcoded = get_hardcoded_response(user_message) or KNOWLEDGE_BASE.get(INTENT_ANSWERS.get(intent))
+    if hardcoded:
+        return hardcoded
+    
+    # Suggestion chips and frequent questions are answered ahead of time
+    prefetched = answer_cache.get(user_message)
+    if prefetched:
+        return prefetched
+
+    # Bounded LLM lane: when it is saturated, answer without the LLM
+    try:
+        return generate_support_answer(user_message, conversation_history, lane=llm_lane)
+    except LaneSaturated:
+        return get_shed_response(user_message)
     except Exception as e:
         error_str = str(e)
-        print(f"❌ AI API error: {e}")
-        
+        logger.error("AI API error: %s", e)
+
         # Check if it's a quota/429 error
         if "429" in error_str or "quota" in error_str.lower() or "exceeded" in error_str.lower():
-            print("⚠️ OpenAI quota exceeded. Trying Google Search API fallback...")
+            logger.warning("OpenAI quota exceeded. Trying Google Search API fallback...")
             # Try Google Search API as fallback
             google_response = get_google_search_response(user_message)
             if google_response:
                 return google_response
-        
+
         # Final fallback to helpful message
         return "I'd be happy to help! You can ask me about:\n\n• Our services (web development, design, marketing, etc.)\n• Pricing information\n• Project timelines\n• How to get started with your project\n\nOr just tell me what you'd like to build, and I'll collect your details!"
 
+# --- Load Shedding ---
+SHED_INTENT_THRESHOLD = 0.4
+SHED_MIN_OVERLAP = 2
+FOLLOW_UP_REPLY = "Thanks for your question! Our team is helping a lot of visitors right now, so I can't give you a detailed answer this moment.\n\nReply \"ok details\" and I'll take your contact details so our team can follow up, or reach us at sales@damsole.com / 91+9356917424."
+
+def get_shed_response(user_message):
+    """Best answer without the LLM: a looser intent match, then the closest KB entry, then a follow-up promise"""
+    intent, _ = classify_intent(user_message, threshold=SHED_INTENT_THRESHOLD)
+    if intent in INTENT_ANSWERS:
+        return KNOWLEDGE_BASE[INTENT_ANSWERS[intent]]
+
+    words = set(_WORDS.findall(user_message.lower()))
+    best_topic, best_overlap = None, 0
+    for topic, words_in_answer in KB_WORDS.items():
+        overlap = len(words & words_in_answer)
+        if overlap > best_overlap:
+            best_topic, best_overlap = topic, overlap
+    if best_overlap >= SHED_MIN_OVERLAP:
+        return KNOWLEDGE_BASE[best_topic]
+    return FOLLOW_UP_REPLY
+
 # --- Intent Detection: Does user want to create something? ---
+# Keywords indicating project creation intent
+CREATE_PROJECT_KEYWORDS = [
+    "website banana", "website banani", "website chahiye", "website banwana",
+    "app banana", "app banani", "app chahiye", "app banwana",
+    "logo banana", "logo banani", "logo chahiye",
+    "software banana", "software banani", "software chahiye",
+    "i want to make", "i want to create", "i want to build",
+    "i need website", "i need app", "i need logo", "i need software",
+    "website create", "app create", "logo create",
+    "make website", "create website", "build website",
+    "make app", "create app", "build app",
+    "project chahiye", "project banana",
+    "details de deta", "details de deti", "details de sakta", "details de sakti",
+    "haan details", "yes details", "ok details",
+    "form fill", "fill form", "form bhar"
+]
+
+GREETING_KEYWORDS = [
+    "hello", "hi", "hey", "hii", "hiii", "hiiii",
+    "namaste", "namaskar", "good morning", "good afternoon", "good evening",
+    "gm", "gn", "morning", "evening"
+]
+
+def _compile_keywords(keywords):
+    """One alternation regex == `any(keyword in text)`, but a single C-level scan"""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+CREATE_PROJECT_PATTERN = _compile_keywords(CREATE_PROJECT_KEYWORDS)
+GREETING_PATTERN = _compile_keywords(GREETING_KEYWORDS)
+
 def wants_to_create_project(message):
     """Detect if user wants to create/build something"""
-    message_lower = message.lower()
-    
-    # Keywords indicating project creation intent
-    create_keywords = [
-        "website banana", "website banani", "website chahiye", "website banwana",
-        "app banana", "app banani", "app chahiye", "app banwana",
-        "logo banana", "logo banani", "logo chahiye",
-        "software banana", "software banani", "software chahiye",
-        "i want to make", "i want to create", "i want to build",
-        "i need website", "i need app", "i need logo", "i need software",
-        "website create", "app create", "logo create",
-        "make website", "create website", "build website",
-        "make app", "create app", "build app",
-        "project chahiye", "project banana",
-        "details de deta", "details de deti", "details de sakta", "details de sakti",
-        "haan details", "yes details", "ok details",
-        "form fill", "fill form", "form bhar"
-    ]
-    
-    return any(keyword in message_lower for keyword in create_keywords)
+    return CREATE_PROJECT_PATTERN.search(message.lower()) is not None
 
 def is_greeting(message):
     """Detect if user message is a greeting"""
-    message_lower = message.lower().strip()
-    greeting_keywords = [
-        "hello", "hi", "hey", "hii", "hiii", "hiiii",
-        "namaste", "namaskar", "good morning", "good afternoon", "good evening",
-        "gm", "gn", "morning", "evening"
-    ]
-    return any(keyword in message_lower for keyword in greeting_keywords)
+    return GREETING_PATTERN.search(message.lower().strip()) is not None
+
+# Classified intents answered straight from the knowledge base
+INTENT_ANSWERS = {"pricing": "pricing", "contact": "contact", "services": "services"}
+
+def detect_intent(message):
+    """
+    Keyword rules first (exact phrases keep their old behaviour), then the
+    local classifier for phrasings the keyword lists miss. Low-confidence
+    messages come back as "other" and go to the support agent as before.
+    """
+    if wants_to_create_project(message):
+        return "create_project"
+    if is_greeting(message):
+        return "greeting"
+    intent, confidence = classify_intent(message)
+    if intent != "other":
+        logger.debug("Intent classified as %s (%.2f)", intent, confidence)
+    return intent
+
+# --- Prefetched Answers ---
+# Shown as buttons by the widget after a greeting (sent with the reply)
+SUGGESTION_CHIPS = [
+    "I want to create website",
+    "I want to create logo",
+    "I want to create app",
+    "I want marketing services",
+    "Our services"
+]
+
+# Asked often enough to always be answered ahead of time
+FREQUENT_QUESTIONS = [
+    "Project timelines",
+    "How to get started with your project",
+    "Do you work with clients outside India?",
+    "What technologies do you use?",
+    "Do you provide support after the website is live?",
+    "Can I see your previous work?"
+]
+
+def routes_to_llm(message):
+    """True when /chat would answer this message with an LLM call"""
+    intent = detect_intent(message)
+    if intent in ("create_project", "greeting"):
+        return False
+    return get_hardcoded_response(message) is None and intent not in INTENT_ANSWERS
+
+def _support_fingerprint():
+    """Changes whenever prefetched answers should be regenerated"""
+    source = json.dumps([KNOWLEDGE_BASE, SUPPORT_SYSTEM_PROMPT, SUPPORT_MODEL], sort_keys=True)
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+answer_cache = AnswerCache(
+    generate=generate_support_answer,
+    base_questions=lambda: SUGGESTION_CHIPS + FREQUENT_QUESTIONS,
+    fingerprint=_support_fingerprint,
+    should_prefetch=routes_to_llm,
+    enabled=PREFETCH_ENABLED and llm_router.configured
+)
 
 # --- User Sessions ---
-user_sessions = {}
+# Persisted to SESSION_FILE so lead collection survives restarts
+user_sessions = create_session_store()
+
+def archive_conversation(session_id, session, reason):
+    """Hand the conversation since the last archive to the transcript archiver (in-memory append)"""
+    history = session.get("conversation_history") or []
+    archived = session.get("archived_messages", 0)
+    if archived > len(history):
+        archived = 0  # history was reset
+    if transcript_archiver.archive(session_id, history[archived:], reason):
+        session["archived_messages"] = len(history)
+
+def archive_idle_sessions():
+    """Archive conversations nobody has touched for TRANSCRIPT_IDLE_AFTER (archiver thread)"""
+    for session_id, session in user_sessions.idle_items(TRANSCRIPT_IDLE_AFTER):
+        if session.get("archived_messages", 0) < len(session.get("conversation_history") or []):
+            archive_conversation(session_id, session, "idle")
+            user_sessions.mark_dirty(session_id)
+
+# Finished and idle conversations, flushed in compressed batches off the request path
+transcript_archiver = create_transcript_archiver(db_writer=save_transcripts, idle_sweep=archive_idle_sessions)
 
 def get_next_question(session):
     """Get the next question to ask based on what's missing"""
@@ -581,6 +847,30 @@ def get_next_question(session):
         else:
             return None
 
+def warm_up():
+    """
+    Build per-process state ahead of traffic (called before workers fork).
+    Intent patterns are compiled at import; this loads the intent model,
+    prefetched answers and the LLM client so the first support question
+    does not pay for them. Chat sessions are not loaded here: each worker
+    reads the session log itself after the fork (user_sessions.load()).
+    """
+    warmed = ["intent_patterns"]
+    try:
+        if get_intent_model() is not None:
+            warmed.append("intent_model")
+    except Exception as e:
+        logger.warning("Could not load intent model: %s", e)
+    if llm_router.configured:
+        try:
+            llm_router.warm_up()
+            warmed.append("llm_clients")
+        except Exception as e:
+            logger.warning("Could not pre-build LLM clients: %s", e)
+    if answer_cache.warm():
+        warmed.append("prefetched_answers")
+    return warmed
+
 @app.route("/")
 def home():
     return render_template("index.html")
@@ -594,13 +884,19 @@ def health():
         "endpoint": "/chat"
     })
 
+idempotency_store = IdempotencyStore()
+init_request_logging(app)
+user_sessions.init_app(app)
+
 @app.route("/chat", methods=["POST"])
+@idempotent(idempotency_store)
 def chat():
     try:
         payload = request.get_json(silent=True) or {}
         user_message = (payload.get("message") or "").strip()
 
         user_id = "single_user"
+        bind_log_context(session_id=user_id)
         
         # Initialize session if not exists
         if user_id not in user_sessions:
@@ -617,6 +913,7 @@ def chat():
 
         # Handle auto-start payload
         if user_message == "__damsole_auto_start__":
+            archive_conversation(user_id, session, "restart")
             session["mode"] = "support"
             session["data"] = {}
             session["current_field"] = None
@@ -628,8 +925,10 @@ def chat():
 
         # SUPPORT MODE: Answer general questions
         if mode == "support":
+            intent = detect_intent(user_message)
+
             # Check if user wants to create something
-            if wants_to_create_project(user_message):
+            if intent == "create_project":
                 # Switch to collection mode
                 session["mode"] = "collecting"
                 session["data"] = {}
@@ -640,17 +939,17 @@ def chat():
                 return jsonify({"reply": f"Perfect! I'd be happy to help you with that. Let me collect a few details from you.\n\n{first_question}"})
             
             # Check if user sent a greeting - show suggestions
-            if is_greeting(user_message):
+            if intent == "greeting":
                 greeting_response = "Hello! How can I help you today?"
                 session["conversation_history"].append({"role": "user", "content": user_message})
                 session["conversation_history"].append({"role": "assistant", "content": greeting_response})
                 # Return response with showSuggestions flag
-                return jsonify({"reply": greeting_response, "showSuggestions": True})
+                return jsonify({"reply": greeting_response, "showSuggestions": True, "suggestions": SUGGESTION_CHIPS})
             
             # Otherwise, answer as support agent
             session["conversation_history"].append({"role": "user", "content": user_message})
             
-            support_response = get_support_response(user_message, session["conversation_history"])
+            support_response = get_support_response(user_message, session["conversation_history"], intent)
             
             session["conversation_history"].append({"role": "assistant", "content": support_response})
             
@@ -686,6 +985,7 @@ def chat():
                     # Save to database and send email
                     db_saved = save_to_db(data)
                     email_sent = send_email(data)
+                    archive_conversation(user_id, session, "lead")
                     
                     success_msg = "Thank you! I have all the required details. Our Damsole team will contact you shortly."
                     
@@ -697,21 +997,7 @@ def chat():
                     return jsonify({"reply": success_msg})
             
             # Validate the current field
-            is_valid = True
-            error_msg = None
-            
-            if current_field == "Full Name":
-                is_valid, error_msg = validate_name(user_message)
-            elif current_field == "Email":
-                is_valid, error_msg = validate_email(user_message)
-            elif current_field == "Phone Number":
-                is_valid, error_msg = validate_phone(user_message)
-            elif current_field == "Address":
-                is_valid, error_msg = validate_address(user_message)
-            elif current_field == "Project Requirement":
-                is_valid, error_msg = validate_project(user_message)
-            elif current_field == "Deadline":
-                is_valid, error_msg = validate_deadline(user_message)
+            is_valid, error_msg = validate_field(current_field, user_message)
             
             if not is_valid:
                 # Invalid answer, ask again politely - keep current_field set
@@ -732,6 +1018,7 @@ def chat():
                 # All fields collected!
                 db_saved = save_to_db(data)
                 email_sent = send_email(data)
+                archive_conversation(user_id, session, "lead")
                 
                 success_msg = "Thank you! I have all the required details. Our Damsole team will contact you shortly."
                 
@@ -743,9 +1030,7 @@ def chat():
                 return jsonify({"reply": success_msg})
 
     except Exception as e:
-        print(f"❌ Chat error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Chat error: %s", e)
         return jsonify({"reply": "I apologize, but I encountered an error. Could you please try again?"}), 500
 
 if __name__ == "__main__":
@@ -0,0 +1,312 @@
+"""
+📦 Damsole Technologies - Static Asset Pipeline
+Minifies the site's CSS and JavaScript, gives each file a content-hashed
+name (assets/css/style.css -> assets/css/style.3f9c2a1b7d.css) and rewrites
+the references in the HTML pages. A hashed URL never changes content, so
+main.py serves it with `Cache-Control: immutable` and a one-year max-age;
+a deploy that changes a file changes its name, and browsers fetch the new one.
+
+Hashed files keep the directory of their source, so relative url() and
+import paths inside them still resolve.
+
+Runs in memory at server start (`python main.py serve`, ASSET_PIPELINE_ENABLED=1),
+or as a CLI that writes the files and manifest.json to disk:
+    python asset_pipeline.py build [--out DIR]
+    python asset_pipeline.py stats
+
+The minifiers are deliberately conservative: comments and redundant
+whitespace go, line breaks in JavaScript stay (no ASI surprises), strings,
+template literals and regex literals are copied verbatim.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+
+from structured_logging import get_logger
+
+logger = get_logger("assets")
+
+ASSET_PIPELINE_ENABLED = os.getenv("ASSET_PIPELINE_ENABLED", "1").lower() in ("1", "true", "yes")
+ASSET_DIRS = ("assets/css", "assets/javascript")
+ASSET_TYPES = {".css": "text/css", ".js": "application/javascript"}
+HASH_LENGTH = 10
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Damsole_Frentend")
+
+
+# ========== CSS ==========
+
+_CSS_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/', re.S)
+_CSS_SPACE_AROUND = re.compile(r"\s*([{};,>])\s*")
+_CSS_SPACE_AFTER_COLON = re.compile(r":\s+")
+
+def minify_css(source):
+    """Strip comments and redundant whitespace; strings are left untouched"""
+    strings = []
+
+    def stash(match):
+        token = match.group(0)
+        if token.startswith("/*"):
+            return " "
+        strings.append(token)
+        return f"\x00{len(strings) - 1}\x00"
+
+    css = _CSS_TOKEN.sub(stash, source)
+    css = re.sub(r"\s+", " ", css)
+    css = _CSS_SPACE_AROUND.sub(r"\1", css)
+    # Only after ':' - a space before it is a descendant combinator (".a :hover")
+    css = _CSS_SPACE_AFTER_COLON.sub(":", css)
+    css = css.replace(";}", "}").strip()
+    return re.sub("\x00(\\d+)\x00", lambda m: strings[int(m.group(1))], css)
+
+
+# ========== JavaScript ==========
+
+_IDENT_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$\\")
+# After these a '/' starts a regex literal, not a division
+_REGEX_PREFIX_CHARS = frozenset("(,=:[!&|?{};+-*%<>~^")
+_REGEX_PREFIX_WORDS = frozenset(("return", "typeof", "case", "do", "else", "in", "of", "new",
+                                 "delete", "void", "throw", "instanceof", "yield", "await"))
+
+def _skip_quoted(src, i):
+    """Index just past the string starting at src[i]"""
+    quote, i = src[i], i + 1
+    while i < len(src):
+        if src[i] == "\\":
+            i += 2
+            continue
+        if src[i] == quote or src[i] == "\n":
+            return i + 1
+        i += 1
+    return i
+
+def _skip_template(src, i):
+    """Index just past the template literal starting at src[i], including nested ${...}"""
+    i += 1
+    while i < len(src):
+        ch = src[i]
+        if ch == "\\":
+            i += 2
+        elif ch == "`":
+            return i + 1
+        elif src.startswith("${", i):
+            i = _skip_braces(src, i + 1)
+        else:
+            i += 1
+    return i
+
+def _skip_braces(src, i):
+    """Index just past the {...} block starting at src[i] (strings and templates inside)"""
+    depth = 0
+    while i < len(src):
+        ch = src[i]
+        if ch in "'\"":
+            i = _skip_quoted(src, i)
+            continue
+        if ch == "`":
+            i = _skip_template(src, i)
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+def _skip_regex(src, i):
+    """Index just past the regex literal (and flags) starting at src[i]"""
+    i += 1
+    in_class = False
+    while i < len(src):
+        ch = src[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "\n":
+            break
+        if ch == "[":
+            in_class = True
+        elif ch == "]":
+            in_class = False
+        elif ch == "/" and not in_class:
+            i += 1
+            break
+        i += 1
+    while i < len(src) and src[i] in _IDENT_CHARS:
+        i += 1
+    return i
+
+def _starts_regex(out):
+    """Does a '/' after the output so far begin a regex literal?"""
+    text = "".join(out[-3:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in _REGEX_PREFIX_CHARS:
+        return True
+    word = re.search(r"[A-Za-z_$]+$", text)
+    return bool(word) and word.group(0) in _REGEX_PREFIX_WORDS
+
+def _needs_space(before, after):
+    if before in _IDENT_CHARS and after in _IDENT_CHARS:
+        return True
+    # "a + +b", "a - -b", "a + ++b"
+    return before in "+-" and after in "+-"
+
+def minify_js(source):
+    """Remove comments and collapse whitespace, keeping line breaks and all literals"""
+    out = []
+    pending = None  # whitespace seen since the last token: None, " " or "\n"
+    i, n = 0, len(source)
+
+    def emit(token):
+        nonlocal pending
+        if out and pending == "\n":
+            out.append("\n")
+        elif out and pending == " " and _needs_space(out[-1][-1], token[0]):
+            out.append(" ")
+        pending = None
+        out.append(token)
+
+    while i < n:
+        ch = source[i]
+        if ch in " \t\r\n\f\v":
+            j = i
+            while j < n and source[j] in " \t\r\n\f\v":
+                j += 1
+            pending = "\n" if ("\n" in source[i:j] or pending == "\n") else " "
+            i = j
+        elif source.startswith("//", i):
+            end = source.find("\n", i)
+            i = n if end == -1 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            pending = "\n" if ("\n" in source[i:end] or pending == "\n") else (pending or " ")
+            i = end
+        elif ch in "'\"":
+            end = _skip_quoted(source, i)
+            emit(source[i:end])
+            i = end
+        elif ch == "`":
+            end = _skip_template(source, i)
+            emit(source[i:end])
+            i = end
+        elif ch == "/" and _starts_regex(out):
+            end = _skip_regex(source, i)
+            emit(source[i:end])
+            i = end
+        else:
+            j = i + 1
+            if ch in _IDENT_CHARS:
+                while j < n and source[j] in _IDENT_CHARS:
+                    j += 1
+            emit(source[i:j])
+            i = j
+    return "".join(out).strip() + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+# ========== Build ==========
+
+class AssetBuild:
+    """Result of one pipeline run: hashed files, the logical -> hashed manifest and size stats"""
+
+    def __init__(self):
+        self.files = {}     # hashed path -> (bytes, mimetype, etag)
+        self.manifest = {}  # logical path -> hashed path
+        self.stats = {"assets": 0, "original_bytes": 0, "minified_bytes": 0, "build_ms": None}
+
+    def get(self, path):
+        return self.files.get(path)
+
+    def rewrite_html(self, html):
+        """Point src/href attributes at the hashed files"""
+        if not self.manifest:
+            return html
+
+        def replace(match):
+            attr, lead, path = match.groups()
+            hashed = self.manifest.get(path)
+            return f"{attr}{lead}{hashed}" if hashed else match.group(0)
+
+        return _ASSET_ATTR.sub(replace, html)
+
+
+# The prefix group matches "" rather than being optional, so it is never None
+_ASSET_ATTR = re.compile(r"""(\b(?:src|href)\s*=\s*["'])((?:\./|/)?)(assets/[^"'?#]+\.(?:css|js))(?=["'?#])""")
+
+def hashed_name(path, content):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+def build_assets(root=DEFAULT_FRONTEND_DIR):
+    """Minify and hash every CSS/JS file under ASSET_DIRS (paths relative to root, '/'-separated)"""
+    start = time.perf_counter()
+    build = AssetBuild()
+    for asset_dir in ASSET_DIRS:
+        base = os.path.join(root, asset_dir)
+        if not os.path.isdir(base):
+            continue
+        for name in sorted(os.listdir(base)):
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in MINIFIERS:
+                continue
+            logical = f"{asset_dir}/{name}"
+            with open(os.path.join(base, name), "r", encoding="utf-8") as f:
+                source = f.read()
+            content = MINIFIERS[ext](source).encode("utf-8")
+            hashed = hashed_name(logical, content)
+            etag = hashed.rsplit(".", 2)[-2]
+            build.files[hashed] = (content, ASSET_TYPES[ext], etag)
+            build.manifest[logical] = hashed
+            build.stats["assets"] += 1
+            build.stats["original_bytes"] += len(source.encode("utf-8"))
+            build.stats["minified_bytes"] += len(content)
+    build.stats["build_ms"] = round((time.perf_counter() - start) * 1000.0, 2)
+    logger.info("Built %s asset(s): %s -> %s bytes in %.1f ms", build.stats["assets"],
+                build.stats["original_bytes"], build.stats["minified_bytes"], build.stats["build_ms"])
+    return build
+
+def write_build(build, out_dir):
+    """Write hashed files and manifest.json under out_dir (for a CDN or inspection)"""
+    for path, (content, _, _) in build.files.items():
+        target = os.path.join(out_dir, *path.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content)
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(build.manifest, f, indent=2, sort_keys=True)
+    return build.manifest
+
+
+# ========== CLI ==========
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Minify and content-hash the website's CSS/JS")
+    parser.add_argument("command", choices=["build", "stats"])
+    parser.add_argument("--root", default=DEFAULT_FRONTEND_DIR, help="website folder (default: Damsole_Frentend)")
+    parser.add_argument("--out", default=None, help="output folder for `build` (default: <root>/dist)")
+    args = parser.parse_args()
+
+    result = build_assets(args.root)
+    if args.command == "build":
+        out_dir = args.out or os.path.join(args.root, "dist")
+        manifest = write_build(result, out_dir)
+        print(f"✅ Wrote {len(manifest)} asset(s) and manifest.json to {out_dir}")
+    print("="*70)
+    for logical, hashed in sorted(result.manifest.items()):
+        size = len(result.files[hashed][0])
+        original = os.path.getsize(os.path.join(args.root, *logical.split("/")))
+        print(f"   • {logical:<38} -> {os.path.basename(hashed):<28} {original:>7} -> {size:>7} bytes")
+    saved = result.stats["original_bytes"] - result.stats["minified_bytes"]
+    print(f"   Total saved: {saved} bytes ({saved * 100.0 / max(1, result.stats['original_bytes']):.1f}%)")
+    print("="*70)
@@ -0,0 +1,351 @@
+"""
+🎨 Damsole Technologies - Critical CSS & Preload Hints
+Makes first paint independent of the full site stylesheet. For each page,
+at startup:
+
+  • the "fold" is the header plus the first <section> of <main> (or the
+    first CRITICAL_FOLD_BYTES characters of <body> text when a page has no sections)
+  • rules of the local stylesheet whose selectors can match an element in
+    the fold (by tag, class and id; pseudo-classes ignored) are inlined in a
+    <style> block, together with the @media wrappers, :root variables and
+    @keyframes they use
+  • the <link rel="stylesheet"> becomes a preload that switches itself to a
+    stylesheet once loaded (<noscript> keeps the plain link), so the full
+    file no longer blocks rendering
+  • a Link header lists what the first paint needs: the stylesheet, the
+    first CRITICAL_PRELOAD_IMAGES images in the fold (the hero image would
+    otherwise be found only after CSS and layout), fonts referenced by the
+    critical CSS, and preconnects to third-party stylesheet/script hosts
+
+main.py sends the Link header with the page. Pages rendered per request
+(no page cache, e.g. `gunicorn main:app` without `serve`) also send it as a
+103 Early Hints response before rendering, when the server supports it
+(gunicorn's `wsgi.early_hints`) and the request is not a revalidation.
+Rules that only match elements added by JavaScript (the chat widget,
+toggled classes) arrive with the full stylesheet a moment later.
+
+Config (.env):
+    CRITICAL_CSS_ENABLED=1           # serve mode only, like the asset pipeline
+    CRITICAL_FOLD_BYTES=12000
+    CRITICAL_PRELOAD_IMAGES=2
+
+    python critical_css.py index.html   # inlined bytes and Link hints for a page
+"""
+
+import html
+import os
+import posixpath
+import re
+from html.parser import HTMLParser
+from urllib.parse import quote, urlsplit
+
+
+def _env_int(key, default):
+    try:
+        return int(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+CRITICAL_CSS_ENABLED = os.getenv("CRITICAL_CSS_ENABLED", "1").lower() in ("1", "true", "yes")
+CRITICAL_FOLD_BYTES = max(1000, _env_int("CRITICAL_FOLD_BYTES", 12000))
+CRITICAL_PRELOAD_IMAGES = max(0, _env_int("CRITICAL_PRELOAD_IMAGES", 2))
+
+FONT_TYPES = {".woff2": "font/woff2", ".woff": "font/woff", ".ttf": "font/ttf", ".otf": "font/otf"}
+# Conditional group rules whose contents are selected like top-level rules
+_GROUP_RULES = ("@media", "@supports", "@layer")
+
+
+# ========== CSS Parsing ==========
+
+def _skip_string(css, i):
+    quote, i = css[i], i + 1
+    while i < len(css):
+        if css[i] == "\\":
+            i += 2
+            continue
+        if css[i] == quote:
+            return i + 1
+        i += 1
+    return i
+
+def _block_end(css, i):
+    """Index just past the {...} block whose '{' is at css[i]"""
+    depth = 0
+    while i < len(css):
+        ch = css[i]
+        if ch in "'\"":
+            i = _skip_string(css, i)
+            continue
+        if css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = len(css) if end == -1 else end + 2
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+def parse_rules(css):
+    """
+    Top-level rules as (prelude, body, text): body is the raw block content.
+    Statements without a block (@import, @charset) have body None.
+    """
+    rules, i, n = [], 0, len(css)
+    while i < n:
+        if css[i].isspace():
+            i += 1
+            continue
+        if css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        start = i
+        while i < n and css[i] not in "{;":
+            if css[i] in "'\"":
+                i = _skip_string(css, i)
+            else:
+                i += 1
+        if i >= n:
+            break
+        if css[i] == ";":
+            rules.append((css[start:i].strip(), None, css[start:i + 1]))
+            i += 1
+            continue
+        end = _block_end(css, i)
+        rules.append((css[start:i].strip(), css[i + 1:end - 1], css[start:end]))
+        i = end
+    return rules
+
+
+# ========== Selector Matching ==========
+
+_PSEUDO_FUNCTION = re.compile(r"::?[\w-]+\((?:[^()]|\([^()]*\))*\)")
+_PSEUDO = re.compile(r"::?[\w-]+")
+_ATTRIBUTE = re.compile(r"\[[^\]]*\]")
+_COMPOUND_PARTS = re.compile(r"([.#]?)(-?[_a-zA-Z][\w-]*)")
+
+def selector_matches(selector, fold):
+    """
+    Could the selector match something in the fold? Every tag, class and id it
+    names must occur there; pseudo-classes and attribute tests are assumed true.
+    """
+    selector = _PSEUDO_FUNCTION.sub("", selector)
+    selector = _ATTRIBUTE.sub("", selector)
+    selector = _PSEUDO.sub("", selector)
+    for compound in re.split(r"[\s>+~]+", selector.strip()):
+        for kind, name in _COMPOUND_PARTS.findall(compound):
+            if kind == "." and name not in fold.classes:
+                return False
+            if kind == "#" and name not in fold.ids:
+                return False
+            if not kind and name.lower() not in fold.tags:
+                return False
+    return True
+
+def _rule_matches(prelude, fold):
+    return any(selector_matches(selector, fold) for selector in prelude.split(","))
+
+
+def select_critical(css, fold):
+    """The rules from `css` needed to paint the fold, in source order"""
+    parts, keyframes = [], {}
+    for prelude, body, text in parse_rules(css):
+        lowered = prelude.lower()
+        if body is None:
+            if lowered.startswith("@import") or lowered.startswith("@charset"):
+                parts.append(text)
+        elif lowered.startswith(_GROUP_RULES):
+            inner = select_critical(body, fold)
+            if inner:
+                parts.append(f"{prelude}{{{inner}}}")
+        elif lowered.startswith("@keyframes") or lowered.startswith("@-webkit-keyframes"):
+            keyframes[prelude.split(None, 1)[-1].strip()] = text
+        elif lowered.startswith("@font-face"):
+            parts.append(text)
+        elif not lowered.startswith("@") and _rule_matches(prelude, fold):
+            parts.append(f"{prelude}{{{body}}}")
+    critical = "".join(parts)
+    # Animations used by the selected rules
+    used = [text for name, text in keyframes.items() if re.search(rf"(?<![\w-]){re.escape(name)}(?![\w-])", critical)]
+    return critical + "".join(used)
+
+
+# ========== HTML ==========
+
+class _FoldScanner(HTMLParser):
+    """Collects tags/classes/ids and image sources up to the end of the fold"""
+
+    def __init__(self, fold_bytes):
+        super().__init__(convert_charrefs=True)
+        self.fold_bytes = fold_bytes
+        self.tags, self.classes, self.ids = {"html", "body"}, set(), set()
+        self.images = []
+        self.external_origins = {}  # third-party host of a stylesheet/script -> fetched with CORS?
+        self._in_body = False
+        self._in_main = False
+        self._open_sections = 0     # <section> nesting once the first one in <main> opened
+        self.done = False
+        self._chars = 0
+
+    def _note_origin(self, url, attrs):
+        parts = urlsplit(url or "")
+        if parts.scheme in ("http", "https") and parts.netloc:
+            origin = f"{parts.scheme}://{parts.netloc}"
+            cors = "crossorigin" in attrs
+            self.external_origins[origin] = self.external_origins.get(origin, False) or cors
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "link" and "stylesheet" in (attrs.get("rel") or "").lower().split():
+            self._note_origin(attrs.get("href"), attrs)
+        if tag == "script" and attrs.get("src"):
+            self._note_origin(attrs.get("src"), attrs)
+        if tag == "body":
+            self._in_body = True
+        if not self._in_body or self.done:
+            return
+        self.tags.add(tag)
+        self.classes.update((attrs.get("class") or "").split())
+        if attrs.get("id"):
+            self.ids.add(attrs["id"])
+        if tag == "img" and attrs.get("src") and not attrs["src"].startswith("data:"):
+            if (attrs.get("loading") or "").lower() != "lazy":
+                self.images.append(attrs["src"])
+        if tag == "main":
+            self._in_main = True
+        elif tag == "section" and self._in_main:
+            self._open_sections += 1
+
+    def handle_endtag(self, tag):
+        if tag == "section" and self._open_sections and not self.done:
+            self._open_sections -= 1
+            if not self._open_sections:
+                self.done = True  # end of the first section: the fold
+
+    def handle_data(self, data):
+        if self._in_body and not self.done:
+            self._chars += len(data)
+            if self._chars > self.fold_bytes:
+                self.done = True
+
+
+class Fold:
+    def __init__(self, scanner):
+        self.tags, self.classes, self.ids = scanner.tags, scanner.classes, scanner.ids
+        self.images = scanner.images
+        self.external_origins = scanner.external_origins
+
+def scan_fold(page, fold_bytes=CRITICAL_FOLD_BYTES):
+    scanner = _FoldScanner(fold_bytes)
+    scanner.feed(page)
+    scanner.close()
+    return Fold(scanner)
+
+
+def _is_local(url):
+    parts = urlsplit(url)
+    return not parts.scheme and not parts.netloc and not url.startswith("data:")
+
+def _link_url(url):
+    """URL for a Link header: root-relative (pages are served from the site root) and escaped"""
+    if _is_local(url) and not url.startswith("/"):
+        url = "/" + posixpath.normpath(url)
+    # A raw comma would split the header's list, a space or '>' would end the URL
+    return quote(url, safe="/:?&=%#@+;~!$'()*")
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+def _rebase_urls(css, stylesheet_href):
+    """url() references are relative to the stylesheet; make them work inline"""
+    base = posixpath.dirname(stylesheet_href.lstrip("/"))
+
+    def rebase(match):
+        mark, url = match.groups()
+        if not _is_local(url) or url.startswith("/"):
+            return match.group(0)
+        return f"url({mark}/{posixpath.normpath(posixpath.join(base, url))}{mark})"
+
+    return _CSS_URL.sub(rebase, css)
+
+
+_STYLESHEET_LINK = re.compile(r"""<link\b[^>]*\brel\s*=\s*["']?stylesheet["']?[^>]*>""", re.I)
+_HREF = re.compile(r"""\bhref\s*=\s*["']([^"']+)["']""", re.I)
+
+
+class CriticalPage:
+    """A page with its critical CSS inlined, plus the Link header value for its first paint"""
+
+    def __init__(self, html_text, link_header, critical_bytes, stylesheet_bytes):
+        self.html = html_text
+        self.link_header = link_header
+        self.stats = {"critical_bytes": critical_bytes, "stylesheet_bytes": stylesheet_bytes}
+
+
+def build_critical_page(page, load_stylesheet, fold_bytes=CRITICAL_FOLD_BYTES,
+                        preload_images=CRITICAL_PRELOAD_IMAGES):
+    """
+    Inline critical CSS for the page's local stylesheets. load_stylesheet(href)
+    returns a stylesheet's text, or None to leave that link alone (e.g. a CDN).
+    """
+    fold = scan_fold(page, fold_bytes)
+    links, critical_bytes, stylesheet_bytes = [], 0, 0
+
+    def inline(match):
+        nonlocal critical_bytes, stylesheet_bytes
+        tag = match.group(0)
+        href_match = _HREF.search(tag)
+        href = html.unescape(href_match.group(1)) if href_match else None
+        css = load_stylesheet(href) if href and _is_local(href) else None
+        if css is None:
+            return tag
+        critical = _rebase_urls(select_critical(css, fold), href)
+        critical_bytes += len(critical.encode("utf-8"))
+        stylesheet_bytes += len(css.encode("utf-8"))
+        links.append(f"<{_link_url(href)}>; rel=preload; as=style")
+        for url in _CSS_URL.findall(critical):
+            ext = os.path.splitext(urlsplit(url[1]).path)[1].lower()
+            if ext in FONT_TYPES:
+                links.append(f"<{_link_url(url[1])}>; rel=preload; as=font; type={FONT_TYPES[ext]}; crossorigin")
+        critical = critical.replace("</", "<\\/")  # can't close the <style> early
+        return (f"<style data-critical>{critical}</style>"
+                f"<link rel=\"preload\" href=\"{href_match.group(1)}\" as=\"style\" onload=\"this.onload=null;this.rel='stylesheet'\">"
+                f"<noscript>{tag}</noscript>")
+
+    rewritten = _STYLESHEET_LINK.sub(inline, page)
+    for src in fold.images[:preload_images]:
+        links.append(f"<{_link_url(src)}>; rel=preload; as=image")
+    for origin, cors in fold.external_origins.items():
+        # A preconnect is only reused by requests with the same CORS mode
+        links.append(f"<{origin}>; rel=preconnect" + ("; crossorigin" if cors else ""))
+    return CriticalPage(rewritten, ", ".join(links), critical_bytes, stylesheet_bytes)
+
+
+# ========== CLI ==========
+
+if __name__ == "__main__":
+    import sys
+
+    frontend = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Damsole_Frentend")
+    name = sys.argv[1] if len(sys.argv) > 1 else "index.html"
+
+    def from_disk(href):
+        path = os.path.join(frontend, *href.lstrip("/").split("/"))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    with open(os.path.join(frontend, name), "r", encoding="utf-8") as f:
+        result = build_critical_page(f.read(), from_disk)
+    print("="*70)
+    print(f"🎨 {name}: {result.stats['critical_bytes']} of {result.stats['stylesheet_bytes']} stylesheet bytes inlined")
+    print("   Link:")
+    for link in result.link_header.split(", "):
+        print(f"   • {link}")
+    print("="*70)
@@ -0,0 +1,169 @@
+"""
+🩺 Damsole Technologies - Cached Health Monitor
+Background probes periodically check dependencies (database, SMTP, LLM,
+queues, sessions) and store the result as a pre-serialized snapshot.
+Health endpoints only return the latest snapshot, so they answer in
+microseconds and never probe on the request path. Probes run in parallel,
+each time-boxed, and a snapshot that has not been refreshed for a few
+intervals is reported as degraded.
+
+Config (.env):
+    HEALTH_PROBE_INTERVAL=30   # seconds between probe rounds
+    HEALTH_PROBE_TIMEOUT=5     # seconds before a probe that hasn't answered counts as failing
+    HEALTH_STALE_AFTER=3       # probe intervals without a new snapshot before it's "degraded"
+"""
+
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+from structured_logging import get_logger
+
+logger = get_logger("health")
+
+try:
+    HEALTH_PROBE_INTERVAL = max(1.0, float(os.getenv("HEALTH_PROBE_INTERVAL", "30")))
+except ValueError:
+    HEALTH_PROBE_INTERVAL = 30.0
+
+try:
+    HEALTH_PROBE_TIMEOUT = max(0.1, float(os.getenv("HEALTH_PROBE_TIMEOUT", "5")))
+except ValueError:
+    HEALTH_PROBE_TIMEOUT = 5.0
+
+try:
+    HEALTH_STALE_AFTER = max(2.0, float(os.getenv("HEALTH_STALE_AFTER", "3")))
+except ValueError:
+    HEALTH_STALE_AFTER = 3.0
+
+
+class HealthMonitor:
+    """
+    Runs registered probes on a background thread.
+    A probe returns a dict with at least {"ok": bool}; an exception counts
+    as a failure, and so does a probe still running after `timeout` seconds.
+    A failing critical probe marks the worker "degraded" (503).
+    """
+
+    def __init__(self, base_info=None, interval=HEALTH_PROBE_INTERVAL, timeout=HEALTH_PROBE_TIMEOUT,
+                 stale_after=HEALTH_STALE_AFTER):
+        self.base_info = base_info or {}
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._probes = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._pid = None
+        self._summary = self._serialize({**self.base_info, "status": "starting"})
+        self._deep = self._summary
+        self._status_code = 503
+        self._published_at = None  # monotonic time of the last probe round
+        self._checked_at = None
+        self._running = {}  # probe name -> thread of a run that outlived its time box
+
+    def add_probe(self, name, fn, critical=False):
+        self._probes.append((name, fn, critical))
+
+    # --- Serving ---
+    def snapshot(self, deep=False):
+        """Return (json_bytes, http_status) of the latest probe round"""
+        self.start()
+        with self._lock:
+            published_at, checked_at = self._published_at, self._checked_at
+            body, status_code = (self._deep if deep else self._summary), self._status_code
+        if published_at is not None and time.monotonic() - published_at > self.interval * self.stale_after:
+            # The probe thread is stuck or dead; don't keep vouching for an old result
+            return self._serialize({
+                **self.base_info,
+                "status": "degraded",
+                "checked_at": checked_at,
+                "error": "health snapshot is stale",
+            }), 503
+        return body, status_code
+
+    # --- Background Probing ---
+    def start(self):
+        """Start the probe thread (once per process, so forked workers get their own)"""
+        pid = os.getpid()
+        if self._started and self._pid == pid:
+            return
+        with self._lock:
+            if self._started and self._pid == pid:
+                return
+            self._started = True
+            self._pid = pid
+        threading.Thread(target=self._run, name="health-probes", daemon=True).start()
+
+    def _run(self):
+        while True:
+            self.run_probes()
+            time.sleep(self.interval)
+
+    def run_probes(self):
+        """Run every probe once, in parallel and time-boxed, and publish a new snapshot"""
+        runs = []
+        for name, fn, critical in self._probes:
+            previous = self._running.get(name)
+            if previous is not None and previous.is_alive():
+                # Still hung from an earlier round; don't stack another thread on it
+                runs.append((name, critical, None, {"ok": False, "error": "previous probe still running"}))
+                continue
+            self._running.pop(name, None)
+            result = {}
+            thread = threading.Thread(target=self._probe, args=(fn, result), name=f"health-probe-{name}", daemon=True)
+            thread.start()
+            runs.append((name, critical, thread, result))
+
+        deadline = time.monotonic() + self.timeout
+        checks = {}
+        degraded = False
+        for name, critical, thread, result in runs:
+            if thread is not None:
+                thread.join(max(0.0, deadline - time.monotonic()))
+                if thread.is_alive():
+                    self._running[name] = thread
+                    result = {"ok": False, "error": f"timed out after {self.timeout:g}s"}
+            result = dict(result)
+            result["critical"] = critical
+            checks[name] = result
+            if critical and not result.get("ok"):
+                degraded = True
+
+        status = "degraded" if degraded else "ok"
+        checked_at = datetime.datetime.now().isoformat(timespec="seconds")
+        summary = {
+            **self.base_info,
+            "status": status,
+            "checked_at": checked_at,
+            "checks": {name: "ok" if result.get("ok") else "failing" for name, result in checks.items()},
+        }
+        deep = {**summary, "checks": checks, "probe_interval_s": self.interval, "probe_timeout_s": self.timeout}
+
+        with self._lock:
+            previous_code = self._status_code
+            self._summary = self._serialize(summary)
+            self._deep = self._serialize(deep)
+            self._status_code = 503 if degraded else 200
+            self._published_at = time.monotonic()
+            self._checked_at = checked_at
+        if self._status_code != previous_code:
+            logger.log(logging.WARNING if degraded else logging.INFO, "Health status changed to %s", status)
+
+    @staticmethod
+    def _probe(fn, result):
+        """Run one probe on its own thread, filling `result` in place"""
+        start = time.perf_counter()
+        try:
+            outcome = dict(fn())
+        except Exception as e:
+            outcome = {"ok": False, "error": str(e)}
+        outcome["latency_ms"] = round((time.perf_counter() - start) * 1000.0, 2)
+        result.update(outcome)
+
+    @staticmethod
+    def _serialize(payload):
+        return json.dumps(payload, default=str).encode("utf-8")
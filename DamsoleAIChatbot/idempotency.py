@@ -0,0 +1,167 @@
+"""
+🔁 Damsole Technologies - Idempotency Keys
+Clients may send an `Idempotency-Key` header on POST /chat and /contact.
+The first request with a key runs normally and its response is stored in a
+bounded TTL table; retries with the same key get the stored response
+without re-running validation, the DB insert or the SMTP send. Concurrent
+duplicates wait for the first in-flight execution instead of running in
+parallel.
+
+Config (.env):
+    IDEMPOTENCY_TTL=600            # seconds a stored response is replayed
+    IDEMPOTENCY_MAX_KEYS=5000      # bound on stored responses (oldest evicted)
+    IDEMPOTENCY_WAIT_TIMEOUT=30    # seconds a duplicate waits for the original
+"""
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request, jsonify, make_response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def _env_int(key, default):
+    try:
+        return int(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+class IdempotencyConflict(Exception):
+    """The original request for this key is still running (wait timed out)"""
+
+
+class IdempotencyMismatch(Exception):
+    """The key was reused with a different request payload"""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "event", "result", "expires_at")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.event = threading.Event()
+        self.result = None
+        self.expires_at = None  # None while in flight
+
+
+class IdempotencyStore:
+    """Bounded, TTL-expiring table of in-flight and completed executions"""
+
+    def __init__(self, ttl=None, max_entries=None, wait_timeout=None):
+        self.ttl = ttl if ttl is not None else _env_int("IDEMPOTENCY_TTL", 600)
+        self.max_entries = max_entries if max_entries is not None else _env_int("IDEMPOTENCY_MAX_KEYS", 5000)
+        self.wait_timeout = wait_timeout if wait_timeout is not None else _env_int("IDEMPOTENCY_WAIT_TIMEOUT", 30)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"executed": 0, "replayed": 0, "waited": 0}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def execute(self, key, fingerprint, fn, cacheable=lambda result: True):
+        """
+        Run fn() once per key. Returns (result, replayed).
+        Results rejected by `cacheable` are shared with concurrent waiters
+        but not stored, so a later retry runs again.
+        """
+        while True:
+            with self._lock:
+                self._evict(time.monotonic())
+                entry = self._entries.get(key)
+                owner = entry is None
+                if owner:
+                    entry = _Entry(fingerprint)
+                    self._entries[key] = entry
+                elif entry.fingerprint != fingerprint:
+                    raise IdempotencyMismatch(key)
+
+            if owner:
+                return self._run_owner(key, entry, fn, cacheable), False
+
+            if entry.expires_at is None:
+                self.stats["waited"] += 1
+                if not entry.event.wait(self.wait_timeout):
+                    raise IdempotencyConflict(key)
+            if entry.result is not None:
+                self.stats["replayed"] += 1
+                return entry.result, True
+            # The original execution failed; try again as the new owner
+
+    def _run_owner(self, key, entry, fn, cacheable):
+        try:
+            result = fn()
+        except BaseException:
+            with self._lock:
+                self._entries.pop(key, None)
+            entry.event.set()
+            raise
+
+        self.stats["executed"] += 1
+        with self._lock:
+            entry.result = result
+            if cacheable(result):
+                entry.expires_at = time.monotonic() + self.ttl
+                self._entries.move_to_end(key)
+            else:
+                self._entries.pop(key, None)
+            self._evict(time.monotonic())
+        entry.event.set()
+        return result
+
+    def _evict(self, now):
+        """Drop expired entries, then the oldest completed ones beyond the bound"""
+        for key in [k for k, e in self._entries.items() if e.expires_at is not None and e.expires_at <= now]:
+            del self._entries[key]
+        if len(self._entries) > self.max_entries:
+            for key in [k for k, e in self._entries.items() if e.expires_at is not None]:
+                if len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[key]
+
+
+def idempotent(store):
+    """
+    Flask view decorator: honour the Idempotency-Key header.
+    Requests without the header run exactly as before. 5xx responses are
+    not stored, so clients can retry after a transient failure.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER, "").strip()
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({"success": False, "message": f"{IDEMPOTENCY_HEADER} is too long."}), 400
+
+            scoped_key = f"{request.path}:{key}"
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+
+            def run_view():
+                response = make_response(view(*args, **kwargs))
+                return response.get_data(), response.status_code, list(response.headers.items())
+
+            try:
+                (body, status, headers), replayed = store.execute(
+                    scoped_key, fingerprint, run_view,
+                    cacheable=lambda result: result[1] < 500
+                )
+            except IdempotencyMismatch:
+                return jsonify({"success": False, "message": f"{IDEMPOTENCY_HEADER} was already used with a different request."}), 422
+            except IdempotencyConflict:
+                return jsonify({"success": False, "message": "The original request is still being processed. Please retry shortly."}), 409
+
+            response = make_response(body, status, headers)
+            if replayed:
+                response.headers["Idempotent-Replayed"] = "true"
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,316 @@
+"""
+🧠 Damsole Technologies - Local Intent Classifier
+Character n-gram (plus whole-word) multinomial Naive Bayes in NumPy, trained from the bundled
+English/Hinglish corpus (intent_corpus.tsv). Classifies a message as one of
+INTENTS in about 50-100 µs (the keyword rules take a few µs), so small phrasing
+changes no longer fall through to a paid OpenAI call.
+
+A prediction only overrides the "other" fallback (support agent) when it is
+both confident (INTENT_CONFIDENCE_THRESHOLD) and covered by the training data:
+at least INTENT_MIN_COVERAGE of the message's n-grams were seen in examples of
+the predicted intent. Naive Bayes is confidently wrong on topics it has never
+seen ("company history"), and a wrong "pricing", "contact" or "services"
+answers with the wrong canned text, so those intents need the stricter
+INTENT_ANSWER_CONFIDENCE_THRESHOLD / INTENT_ANSWER_MIN_COVERAGE.
+
+CLI:
+    python intent_classifier.py train             # corpus -> intent_model.npz
+    python intent_classifier.py bench             # accuracy + latency vs keyword rules
+    python intent_classifier.py "website chahiye" # classify one message
+
+NumPy is optional: without it classify_intent() always returns ("other", 0.0)
+and the chatbot keeps using its keyword rules only.
+"""
+
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from structured_logging import get_logger
+
+logger = get_logger("intent")
+
+INTENTS = ["greeting", "create_project", "pricing", "contact", "services", "other"]
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_PATH = os.path.join(BASE_DIR, "intent_corpus.tsv")
+MODEL_PATH = os.getenv("INTENT_MODEL_PATH", os.path.join(BASE_DIR, "intent_model.npz"))
+
+try:
+    INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.7"))
+except ValueError:
+    INTENT_CONFIDENCE_THRESHOLD = 0.7
+try:
+    INTENT_MIN_COVERAGE = float(os.getenv("INTENT_MIN_COVERAGE", "0.7"))
+except ValueError:
+    INTENT_MIN_COVERAGE = 0.7
+try:
+    INTENT_ANSWER_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_ANSWER_CONFIDENCE_THRESHOLD", "0.95"))
+except ValueError:
+    INTENT_ANSWER_CONFIDENCE_THRESHOLD = 0.95
+try:
+    INTENT_ANSWER_MIN_COVERAGE = float(os.getenv("INTENT_ANSWER_MIN_COVERAGE", "0.75"))
+except ValueError:
+    INTENT_ANSWER_MIN_COVERAGE = 0.75
+
+# intent -> (confidence, coverage) it needs; intents answered from the
+# knowledge base are held to the stricter pair. Others use the defaults.
+INTENT_THRESHOLDS = {
+    intent: (INTENT_ANSWER_CONFIDENCE_THRESHOLD, INTENT_ANSWER_MIN_COVERAGE)
+    for intent in ("pricing", "contact", "services")
+}
+
+NGRAM_SIZES = (2, 3, 4)
+N_FEATURES = 1 << 15  # hashed n-gram buckets
+SMOOTHING = 0.1       # additive (Lidstone) smoothing
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+# --- Features ---
+def _normalize(text):
+    return f" {_NON_WORD.sub(' ', text.lower()).strip()} "
+
+def _bucket(token):
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(token.encode()) & (N_FEATURES - 1)
+
+def extract_features(text):
+    """Hashed character n-gram and whole-word counts as (indices, counts) arrays"""
+    normalized = _normalize(text)
+    grams = Counter()
+    for n in NGRAM_SIZES:
+        for i in range(len(normalized) - n + 1):
+            grams[_bucket(normalized[i:i + n])] += 1
+    for word in normalized.split():
+        grams[_bucket(f"w:{word}")] += 1
+    indices = np.fromiter(grams.keys(), dtype=np.int64, count=len(grams))
+    counts = np.fromiter(grams.values(), dtype=np.float32, count=len(grams))
+    return indices, counts
+
+
+# --- Model ---
+class IntentClassifier:
+    """Multinomial Naive Bayes over hashed character n-grams and words"""
+
+    def __init__(self, labels, log_prior, log_likelihood):
+        self.labels = list(labels)
+        self.log_prior = log_prior.astype(np.float32)
+        self.log_likelihood = log_likelihood.astype(np.float32)  # (classes, N_FEATURES)
+        # Buckets never seen in a class keep only the smoothing mass: the row minimum
+        self._unseen = self.log_likelihood.min(axis=1)
+
+    @classmethod
+    def train(cls, examples, smoothing=SMOOTHING):
+        """Fit from (label, text) pairs"""
+        labels = [label for label in INTENTS if any(l == label for l, _ in examples)]
+        index = {label: i for i, label in enumerate(labels)}
+        feature_counts = np.zeros((len(labels), N_FEATURES), dtype=np.float64)
+        class_counts = np.zeros(len(labels), dtype=np.float64)
+
+        for label, text in examples:
+            row = index[label]
+            indices, counts = extract_features(text)
+            np.add.at(feature_counts[row], indices, counts)
+            class_counts[row] += 1
+
+        log_prior = np.log(class_counts / class_counts.sum())
+        smoothed = feature_counts + smoothing
+        log_likelihood = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+        return cls(labels, log_prior, log_likelihood)
+
+    def predict(self, text):
+        """Return (label, confidence) where confidence is the posterior probability"""
+        return self.score(text)[:2]
+
+    def score(self, text):
+        """
+        Return (label, confidence, coverage): coverage is the share of the
+        message's n-grams seen in training examples of the predicted label
+        """
+        indices, counts = extract_features(text)
+        if not indices.size:
+            return "other", 0.0, 0.0
+        scores = self.log_prior + self.log_likelihood[:, indices] @ counts
+        # Naive Bayes posteriors are overconfident; temper by n-gram count
+        scores = scores / np.sqrt(counts.sum())
+        probs = np.exp(scores - scores.max())
+        probs /= probs.sum()
+        best = int(probs.argmax())
+        seen = self.log_likelihood[best, indices] > self._unseen[best]
+        return self.labels[best], float(probs[best]), float(counts[seen].sum() / counts.sum())
+
+    def save(self, path=MODEL_PATH):
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            log_prior=self.log_prior,
+            log_likelihood=self.log_likelihood
+        )
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path) as data:
+            return cls(data["labels"].tolist(), data["log_prior"], data["log_likelihood"])
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Read `label<TAB>text` lines; `#` starts a comment"""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            label, _, text = line.partition("\t")
+            if label in INTENTS and text:
+                examples.append((label, text))
+    return examples
+
+
+# --- Default Model ---
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Load the trained model file, or train from the bundled corpus if there is none"""
+    global _model
+    if _model is None and NUMPY_AVAILABLE:
+        with _model_lock:
+            if _model is None:
+                if os.path.exists(MODEL_PATH):
+                    _model = IntentClassifier.load(MODEL_PATH)
+                else:
+                    _model = IntentClassifier.train(load_corpus())
+                    logger.info("Intent model trained from bundled corpus (no %s found)", os.path.basename(MODEL_PATH))
+    return _model
+
+def accepts(intent, confidence, coverage, threshold=None):
+    """
+    True when a prediction clears its intent's confidence and coverage bars
+    (INTENT_THRESHOLDS, else the defaults; `threshold` overrides the default
+    confidence but never loosens a stricter per-intent one)
+    """
+    min_confidence = INTENT_CONFIDENCE_THRESHOLD if threshold is None else threshold
+    min_coverage = INTENT_MIN_COVERAGE
+    if intent in INTENT_THRESHOLDS:
+        strict_confidence, strict_coverage = INTENT_THRESHOLDS[intent]
+        min_confidence = max(min_confidence, strict_confidence)
+        min_coverage = max(min_coverage, strict_coverage)
+    return confidence >= min_confidence and coverage >= min_coverage
+
+def classify_intent(message, threshold=None):
+    """
+    Classify a message into INTENTS. Predictions below their intent's
+    confidence or coverage bar come back as "other". Returns (intent, confidence).
+    """
+    model = get_model()
+    if model is None:
+        return "other", 0.0
+    intent, confidence, coverage = model.score(message)
+    if not accepts(intent, confidence, coverage, threshold):
+        return "other", confidence
+    return intent, confidence
+
+
+# --- Offline Training & Benchmark ---
+def _split(examples, test_fraction=0.2, seed=7):
+    """Deterministic stratified split"""
+    import random
+    rng = random.Random(seed)
+    train, test = [], []
+    for label in INTENTS:
+        rows = [example for example in examples if example[0] == label]
+        rng.shuffle(rows)
+        cut = max(1, int(len(rows) * test_fraction))
+        test.extend(rows[:cut])
+        train.extend(rows[cut:])
+    return train, test
+
+def _keyword_intent(message, app_module):
+    """What the keyword functions alone would decide"""
+    if app_module.wants_to_create_project(message):
+        return "create_project"
+    if app_module.is_greeting(message):
+        return "greeting"
+    kb = app_module.KNOWLEDGE_BASE
+    answer = app_module.get_hardcoded_response(message)
+    for intent in ("pricing", "contact", "services"):
+        if answer is not None and answer == kb[intent]:
+            return intent
+    return "other"
+
+BENCH_SPLITS = 10
+
+def run_benchmark(splits=BENCH_SPLITS):
+    """
+    Accuracy and wrong knowledge-base answers summed over several held-out
+    splits (one split of a few hundred examples is too small to compare on)
+    """
+    import time
+    import app as app_module
+
+    examples = load_corpus()
+    answered = ("pricing", "contact", "services")
+    keyword_predict = lambda text: _keyword_intent(text, app_module)
+    totals = {"Keyword rules:": [0, 0], "Classifier:": [0, 0]}
+    tested = 0
+
+    for seed in range(splits):
+        train, test = _split(examples, seed=seed)
+        model = IntentClassifier.train(train)
+
+        def classifier_predict(text):
+            intent, confidence, coverage = model.score(text)
+            return intent if accepts(intent, confidence, coverage) else "other"
+
+        for name, predict in (("Keyword rules:", keyword_predict), ("Classifier:", classifier_predict)):
+            for label, text in test:
+                predicted = predict(text)
+                totals[name][0] += predicted == label
+                # The message would get the knowledge-base answer of another intent
+                totals[name][1] += predicted in answered and predicted != label
+        tested += len(test)
+
+    def latency(predict):
+        start = time.perf_counter()
+        for _ in range(20):
+            for _, text in test:
+                predict(text)
+        return (time.perf_counter() - start) * 1e6 / (20 * len(test))
+
+    print("="*70)
+    print(f"📊 Intent benchmark ({len(examples)} examples, {splits} splits, {tested} held-out predictions)")
+    for name, predict in (("Keyword rules:", keyword_predict), ("Classifier:", classifier_predict)):
+        correct, wrong = totals[name]
+        print(f"   • {name:<16} accuracy {correct / tested:.1%}, {wrong} wrong KB answer(s), "
+              f"{latency(predict):.1f} µs/message")
+    print(f"   (classifier threshold {INTENT_CONFIDENCE_THRESHOLD}, coverage {INTENT_MIN_COVERAGE}; "
+          f"knowledge-base intents {INTENT_ANSWER_CONFIDENCE_THRESHOLD}, {INTENT_ANSWER_MIN_COVERAGE})")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if not NUMPY_AVAILABLE:
+        print("❌ NumPy is required: pip install numpy")
+        sys.exit(1)
+    command = sys.argv[1] if len(sys.argv) > 1 else "bench"
+    if command == "train":
+        corpus = load_corpus()
+        IntentClassifier.train(corpus).save(MODEL_PATH)
+        print(f"✅ Trained on {len(corpus)} examples -> {MODEL_PATH}")
+    elif command == "bench":
+        run_benchmark()
+    else:
+        intent, confidence = classify_intent(" ".join(sys.argv[1:]))
+        print(f"{intent} ({confidence:.2f})")
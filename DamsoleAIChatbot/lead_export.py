@@ -0,0 +1,286 @@
+"""
+📤 Damsole Technologies - Streaming Lead Export
+Streams the `leads` table as CSV or NDJSON using server-side cursors
+(named cursor on PostgreSQL, unbuffered cursor on MySQL, SQLite cursors
+step lazily anyway), so memory use stays constant regardless of table size.
+
+CLI:
+    python lead_export.py --format csv --since 2024-01-01 > leads.csv
+    python lead_export.py --format ndjson --incremental > new_leads.ndjson
+"""
+
+import contextlib
+import csv
+import datetime
+import io
+import json
+import os
+import sys
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+# app.py prints its startup status on import; keep that out of CSV on stdout
+with contextlib.redirect_stdout(sys.stderr):
+    from app import get_db_connection, DB_TYPE, _env_str
+from sqlite_store import adapt_query
+
+LEAD_COLUMNS = [
+    "id", "full_name", "email", "phone_number", "address",
+    "project_requirement", "deadline", "timestamp"
+]
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+EXPORT_BATCH_SIZE = int(_env_str("LEAD_EXPORT_BATCH_SIZE", "500"))
+EXPORT_STATE_FILE = _env_str(
+    "LEAD_EXPORT_STATE_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".lead_export_state.json")
+)
+
+
+class ExportError(Exception):
+    """Raised when an export cannot be started"""
+
+
+class ExportUnavailableError(ExportError):
+    """Raised when the database is not configured or unreachable"""
+
+
+# --- Incremental State ---
+def load_last_exported_id():
+    """Return the highest lead id delivered by the last completed incremental export"""
+    try:
+        with open(EXPORT_STATE_FILE, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("last_id", 0))
+    except (OSError, ValueError, TypeError):
+        return 0
+
+def save_last_exported_id(last_id):
+    """Persist the incremental export high-water mark atomically"""
+    tmp_path = EXPORT_STATE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "last_id": last_id,
+            "exported_at": datetime.datetime.now().isoformat(timespec="seconds")
+        }, f)
+    os.replace(tmp_path, EXPORT_STATE_FILE)
+
+@contextlib.contextmanager
+def _state_lock():
+    """
+    Exclusive lock on `<state file>.lock` for the whole incremental export,
+    so two overlapping runs cannot read the same high-water mark and
+    deliver the same leads twice.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(EXPORT_STATE_FILE + ".lock", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise ExportError("Another incremental export is already running. Try again when it finishes.")
+        yield
+
+
+# --- Query ---
+def parse_timestamp(value):
+    """Parse an ISO-8601 date/datetime filter value (None passes through)"""
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise ExportError(f"Invalid timestamp '{value}'. Use ISO format, e.g. 2024-01-31 or 2024-01-31T18:30:00.")
+
+def _build_query(since=None, until=None, after_id=None):
+    """Build the filtered export query and its parameters"""
+    clauses = []
+    params = []
+    if DB_TYPE == "sqlite":
+        # SQLite stores timestamps as 'YYYY-MM-DD HH:MM:SS' text; compare like with like
+        since = since.isoformat(sep=" ") if since is not None else None
+        until = until.isoformat(sep=" ") if until is not None else None
+    if since is not None:
+        clauses.append("timestamp >= %s")
+        params.append(since)
+    if until is not None:
+        clauses.append("timestamp < %s")
+        params.append(until)
+    if after_id:
+        clauses.append("id > %s")
+        params.append(after_id)
+
+    query = f"SELECT {', '.join(LEAD_COLUMNS)} FROM leads"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY id"
+    if DB_TYPE == "sqlite":
+        query = adapt_query(query)
+    return query, tuple(params)
+
+def _open_streaming_cursor(conn):
+    """Open a server-side cursor so rows are fetched in batches, not all at once"""
+    if DB_TYPE == "postgres":
+        cur = conn.cursor(name="damsole_lead_export")
+        cur.itersize = EXPORT_BATCH_SIZE
+        return cur
+    if DB_TYPE == "sqlite":
+        return conn.cursor()
+    # mysql-connector cursors are unbuffered unless buffered=True is requested
+    return conn.cursor(buffered=False)
+
+def iter_lead_rows(since=None, until=None, incremental=False, batch_size=None):
+    """
+    Generate lead row tuples in id order from a server-side cursor. The
+    connection is opened on the first next() and released when the
+    generator finishes or is closed, so an export that is never iterated
+    holds nothing. With incremental=True only rows newer than the last
+    completed incremental export are returned; the high-water mark is read
+    and advanced under an exclusive lock, and only once the stream has been
+    fully consumed.
+    """
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+    with _state_lock() if incremental else contextlib.nullcontext():
+        after_id = load_last_exported_id() if incremental else None
+        query, params = _build_query(since, until, after_id)
+
+        conn = get_db_connection()
+        if not conn:
+            raise ExportUnavailableError("Database not configured or unavailable.")
+        try:
+            cur = _open_streaming_cursor(conn)
+            cur.execute(query, params)
+        except Exception as e:
+            _close_quietly(conn)
+            raise ExportUnavailableError(f"Export query failed: {e}")
+
+        last_id = after_id or 0
+        try:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+                last_id = rows[-1][0]
+        finally:
+            _close_quietly(cur)
+            _close_quietly(conn)
+
+        if incremental:
+            save_last_exported_id(last_id)
+
+def _close_quietly(resource):
+    """Close a cursor/connection without masking the exception that ended the stream"""
+    try:
+        resource.close()
+    except Exception:
+        pass  # unbuffered MySQL cursors/connections complain about unread rows after a client disconnect
+
+def _started(rows):
+    """
+    Advance a row generator to its first row, so connection and query
+    errors are raised here rather than after the response has started.
+    The returned generator yields every row and closes the source.
+    """
+    try:
+        first = next(rows)
+    except StopIteration:
+        return iter(())
+
+    def resume():
+        try:
+            yield first
+            yield from rows
+        finally:
+            rows.close()
+    return resume()
+
+
+# --- Serializers ---
+def _format_value(value):
+    """Render DB timestamps the same way in CSV and NDJSON"""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+# Cells starting with these are run as formulas by Excel/Sheets
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def _csv_cell(value):
+    """Format a value for CSV; user-supplied text that looks like a formula is quoted with a leading '"""
+    value = _format_value(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def stream_csv(rows, rows_per_chunk=200):
+    """Serialize rows to CSV text chunks (header first)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LEAD_COLUMNS)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue()
+
+def stream_ndjson(rows, rows_per_chunk=200):
+    """Serialize rows to newline-delimited JSON text chunks"""
+    lines = []
+    for row in rows:
+        record = {column: _format_value(value) for column, value in zip(LEAD_COLUMNS, row)}
+        lines.append(json.dumps(record, ensure_ascii=False, default=str))
+        if len(lines) >= rows_per_chunk:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def stream_leads(fmt="csv", since=None, until=None, incremental=False):
+    """Return a generator of text chunks for the requested export format"""
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unsupported format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    rows = _started(iter_lead_rows(parse_timestamp(since), parse_timestamp(until), incremental))
+    if fmt == "csv":
+        return stream_csv(rows)
+    return stream_ndjson(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream Damsole leads as CSV or NDJSON")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--since", help="Only leads with timestamp >= this ISO date/datetime")
+    parser.add_argument("--until", help="Only leads with timestamp < this ISO date/datetime")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only leads added since the last incremental export")
+    parser.add_argument("--output", help="Write to this file instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        chunks = stream_leads(args.format, args.since, args.until, args.incremental)
+        out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+    except ExportError as e:
+        print(f"❌ Export failed: {e}", file=sys.stderr)
+        sys.exit(1)
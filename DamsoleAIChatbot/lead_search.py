@@ -0,0 +1,302 @@
+"""
+🔎 Damsole Technologies - Indexed Lead Search
+Keyword and date search over the `leads` table for the sales team, without
+`LIKE '%...%'` scans that read every row and slow down `save_to_db` inserts.
+
+Each backend searches a full-text index over name, email, phone, address and
+project requirement:
+  • PostgreSQL: GIN index on a `to_tsvector('simple', ...)` expression,
+    queried with prefix terms (`bakery:* & pune:*`)
+  • MySQL:      FULLTEXT index, queried IN BOOLEAN MODE (`+bakery* +pune*`);
+    words shorter than innodb_ft_min_token_size (default 3) are not indexed
+  • SQLite:     in-process inverted index (term -> lead ids), built on first
+    search and caught up with new rows (id > last indexed) before each search
+
+Every term must match (prefix match, case-insensitive). Results are newest
+first and paginated by keyset: `next_cursor` is the last id of the page, and
+the next page is `id < cursor`. No OFFSET, so page 50 costs the same as page 1.
+
+Config (.env):
+    LEAD_SEARCH_PAGE_SIZE=20
+    LEAD_SEARCH_MAX_PAGE_SIZE=100
+
+CLI:
+    python lead_search.py "bakery website" --since 2024-01-01 --limit 10
+"""
+
+import bisect
+import contextlib
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# app.py prints its startup status on import; keep that out of CLI output
+with contextlib.redirect_stdout(sys.stderr):
+    from app import get_db_connection, DB_TYPE, _env_str
+from lead_export import LEAD_COLUMNS, ExportError, parse_timestamp, _format_value
+from sqlite_store import adapt_query
+from structured_logging import get_logger
+
+logger = get_logger("lead_search")
+
+SEARCH_PAGE_SIZE = int(_env_str("LEAD_SEARCH_PAGE_SIZE", "20"))
+SEARCH_MAX_PAGE_SIZE = int(_env_str("LEAD_SEARCH_MAX_PAGE_SIZE", "100"))
+SEARCH_FIELDS = ["full_name", "email", "phone_number", "address", "project_requirement"]
+MAX_TERMS = 8
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+# Same expression in the index and the query, or PostgreSQL won't use the index
+_PG_DOCUMENT = "to_tsvector('simple', " + " || ' ' || ".join(f"coalesce({field}, '')" for field in SEARCH_FIELDS) + ")"
+
+
+class SearchError(Exception):
+    """Raised for an invalid search request"""
+
+
+class SearchUnavailableError(SearchError):
+    """Raised when the database is not configured or unreachable"""
+
+
+def tokenize(text):
+    """Lower-cased word terms; anything else (operators, quotes) is dropped"""
+    return [term.lower() for term in _TERM.findall(text or "")]
+
+def search_terms(query):
+    """Terms of a search query, at most MAX_TERMS of them"""
+    return tokenize(query)[:MAX_TERMS]
+
+
+# --- Index Setup ---
+def init_search_index():
+    """Create the full-text and timestamp indexes (idempotent; called at startup)"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    try:
+        cur = conn.cursor()
+        if DB_TYPE == "postgres":
+            cur.execute(f"CREATE INDEX IF NOT EXISTS leads_search_idx ON leads USING GIN ({_PG_DOCUMENT})")
+            cur.execute("CREATE INDEX IF NOT EXISTS leads_timestamp_idx ON leads (timestamp)")
+        elif DB_TYPE == "sqlite":
+            cur.execute("CREATE INDEX IF NOT EXISTS leads_timestamp_idx ON leads (timestamp)")
+        else:  # MySQL has no CREATE INDEX IF NOT EXISTS
+            cur.execute("""
+                SELECT index_name FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'leads'
+            """)
+            existing = {row[0] for row in cur.fetchall()}
+            if "leads_search_idx" not in existing:
+                cur.execute(f"ALTER TABLE leads ADD FULLTEXT INDEX leads_search_idx ({', '.join(SEARCH_FIELDS)})")
+            if "leads_timestamp_idx" not in existing:
+                cur.execute("CREATE INDEX leads_timestamp_idx ON leads (timestamp)")
+        conn.commit()
+        cur.close()
+        logger.info("Lead search indexes ready (%s)", DB_TYPE)
+        return True
+    except Exception as e:
+        logger.warning("Could not create lead search indexes: %s", e)
+        return False
+    finally:
+        conn.close()
+
+
+# --- SQLite Inverted Index ---
+class LeadIndex:
+    """term -> ascending lead ids, kept in memory and caught up incrementally by id"""
+
+    def __init__(self):
+        self._postings = defaultdict(list)
+        self._terms = []              # sorted, for prefix lookups
+        self._terms_stale = False
+        self._timestamps = {}         # id -> 'YYYY-MM-DD HH:MM:SS'
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def refresh(self, conn):
+        """Index rows added since the last refresh (by this or any other worker)"""
+        with self._lock:
+            return self._refresh(conn)
+
+    def _refresh(self, conn):
+        cur = conn.cursor()
+        cur.execute(adapt_query(f"SELECT id, timestamp, {', '.join(SEARCH_FIELDS)} FROM leads WHERE id > %s ORDER BY id"),
+                    (self._last_id,))
+        added = 0
+        for row in cur:
+            lead_id, timestamp = row[0], row[1]
+            # Every word of every field: MAX_TERMS limits queries, not documents
+            for term in set(tokenize(" ".join(str(value) for value in row[2:] if value))):
+                if term not in self._postings:
+                    self._terms_stale = True
+                self._postings[term].append(lead_id)
+            self._timestamps[lead_id] = str(timestamp or "")
+            self._last_id = lead_id
+            added += 1
+        cur.close()
+        if self._terms_stale:
+            self._terms = sorted(self._postings)
+            self._terms_stale = False
+        return added
+
+    def _matching(self, prefix):
+        ids = set()
+        start = bisect.bisect_left(self._terms, prefix)
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            ids.update(self._postings[term])
+        return ids
+
+    def search(self, conn, terms, since=None, until=None, before_id=None, limit=SEARCH_PAGE_SIZE):
+        """Ids of matching leads, newest first"""
+        with self._lock:
+            self._refresh(conn)
+            candidates = None
+            for term in sorted(terms, key=len, reverse=True):  # longest (rarest) prefix first
+                ids = self._matching(term)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+            matches = []
+            for lead_id in sorted(candidates, reverse=True):
+                if before_id is not None and lead_id >= before_id:
+                    continue
+                timestamp = self._timestamps.get(lead_id, "")
+                if (since and timestamp < since) or (until and timestamp >= until):
+                    continue
+                matches.append(lead_id)
+                if len(matches) >= limit:
+                    break
+            return matches
+
+
+sqlite_index = LeadIndex()
+
+def warm_search_index():
+    """Build the SQLite inverted index before traffic (pre-fork, so workers inherit it)"""
+    if DB_TYPE != "sqlite":
+        return False
+    conn = get_db_connection()
+    if not conn:
+        return False
+    try:
+        sqlite_index.refresh(conn)
+    finally:
+        conn.close()
+    return True
+
+
+# --- Query ---
+def _build_query(terms, since, until, before_id, limit):
+    """Search SQL for PostgreSQL/MySQL (and SQLite without keywords), newest first"""
+    clauses, params = [], []
+    if terms and DB_TYPE == "postgres":
+        clauses.append(f"{_PG_DOCUMENT} @@ to_tsquery('simple', %s)")
+        params.append(" & ".join(f"{term}:*" for term in terms))
+    elif terms:
+        clauses.append(f"MATCH ({', '.join(SEARCH_FIELDS)}) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(" ".join(f"+{term}*" for term in terms))
+    if since is not None:
+        clauses.append("timestamp >= %s")
+        params.append(since)
+    if until is not None:
+        clauses.append("timestamp < %s")
+        params.append(until)
+    if before_id is not None:
+        clauses.append("id < %s")
+        params.append(before_id)
+
+    query = f"SELECT {', '.join(LEAD_COLUMNS)} FROM leads"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY id DESC LIMIT %s"
+    params.append(limit)
+    if DB_TYPE == "sqlite":
+        query = adapt_query(query)
+    return query, tuple(params)
+
+def _fetch_by_ids(cur, ids):
+    placeholders = ", ".join("?" for _ in ids)
+    cur.execute(f"SELECT {', '.join(LEAD_COLUMNS)} FROM leads WHERE id IN ({placeholders}) ORDER BY id DESC", ids)
+    return cur.fetchall()
+
+def search_leads(query="", since=None, until=None, cursor=None, limit=None):
+    """
+    One page of matching leads:
+    {"results": [...], "next_cursor": id or None, "took_ms": ..., "backend": ...}
+    """
+    try:
+        since, until = parse_timestamp(since), parse_timestamp(until)
+    except ExportError as e:
+        raise SearchError(str(e))
+    try:
+        before_id = int(cursor) if cursor not in (None, "") else None
+        limit = int(limit) if limit not in (None, "") else SEARCH_PAGE_SIZE
+    except (TypeError, ValueError):
+        raise SearchError("cursor and limit must be integers.")
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+    terms = search_terms(query)
+    if DB_TYPE == "sqlite":
+        # SQLite stores timestamps as 'YYYY-MM-DD HH:MM:SS' text; compare like with like
+        since = since.isoformat(sep=" ") if since is not None else None
+        until = until.isoformat(sep=" ") if until is not None else None
+
+    conn = get_db_connection()
+    if not conn:
+        raise SearchUnavailableError("Database not configured or unavailable.")
+    start = time.perf_counter()
+    try:
+        cur = conn.cursor()
+        if terms and DB_TYPE == "sqlite":
+            backend = "inverted-index"
+            ids = sqlite_index.search(conn, terms, since, until, before_id, limit + 1)
+            rows = _fetch_by_ids(cur, ids) if ids else []
+        else:
+            backend = {"postgres": "tsvector-gin", "sqlite": "btree"}.get(DB_TYPE, "fulltext") if terms else "btree"
+            sql, params = _build_query(terms, since, until, before_id, limit + 1)
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        cur.close()
+    except Exception as e:
+        raise SearchUnavailableError(f"Search query failed: {e}")
+    finally:
+        conn.close()
+    took_ms = (time.perf_counter() - start) * 1000.0
+
+    # One extra row tells us whether there is a next page
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    logger.info("Lead search: %s term(s), %s result(s) in %.1f ms (%s)", len(terms), len(rows), took_ms, backend)
+    return {
+        "results": [{column: _format_value(value) for column, value in zip(LEAD_COLUMNS, row)} for row in rows],
+        "next_cursor": rows[-1][0] if has_more else None,
+        "took_ms": round(took_ms, 2),
+        "backend": backend,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Search Damsole leads")
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--since", help="Only leads with timestamp >= this ISO date/datetime")
+    parser.add_argument("--until", help="Only leads with timestamp < this ISO date/datetime")
+    parser.add_argument("--cursor", help="next_cursor from the previous page")
+    parser.add_argument("--limit", type=int, default=SEARCH_PAGE_SIZE)
+    args = parser.parse_args()
+
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            init_search_index()
+        print(json.dumps(search_leads(args.query, args.since, args.until, args.cursor, args.limit),
+                         ensure_ascii=False, indent=2, default=str))
+    except SearchError as e:
+        print(f"❌ Search failed: {e}", file=sys.stderr)
+        sys.exit(1)
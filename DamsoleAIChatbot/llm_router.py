@@ -0,0 +1,381 @@
+"""
+🔀 Damsole Technologies - Multi-Provider LLM Router
+Sends each support completion to one of several chat-completion providers
+(OpenAI or any OpenAI-compatible API, plus local mocks for tests).
+
+Selection policy:
+  • priority - providers in LLM_PROVIDERS order
+  • latency  - fastest observed median first
+Either way, providers that keep failing move to the back.
+
+Hedged requests: if the chosen provider hasn't answered by its own observed
+p95 latency, the request is also sent to the next provider. A provider with
+too few samples for a p95 is not hedged (every hedge is a second paid
+request) unless LLM_HEDGE_INITIAL_DELAY_MS seeds a delay for it. The first answer
+wins and the loser is cancelled: a streaming HTTP response is closed, and a
+mock stops waiting. A provider that fails outright fails over to the next
+one immediately.
+
+Config (.env):
+    LLM_PROVIDERS=openai              # comma separated, in priority order
+    LLM_ROUTING_POLICY=priority       # priority or latency
+    LLM_HEDGE_ENABLED=1
+    LLM_HEDGE_MIN_DELAY_MS=500        # never hedge earlier than this
+    LLM_HEDGE_INITIAL_DELAY_MS=0      # hedge delay before a p95 exists (0 = don't hedge until then)
+    LLM_TIMEOUT=30                    # seconds per provider call
+    # Per provider <NAME> (upper-cased): LLM_<NAME>_API_KEY, LLM_<NAME>_BASE_URL, LLM_<NAME>_MODEL
+    # "openai" defaults to OPENAI_API_KEY; a name starting with "mock" is a local MockProvider.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from structured_logging import get_logger
+
+logger = get_logger("llm_router")
+
+def _env_float(key, default):
+    try:
+        return float(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+LLM_ROUTING_POLICY = os.getenv("LLM_ROUTING_POLICY", "priority").lower()
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "1").lower() not in ("0", "false", "no")
+LLM_HEDGE_MIN_DELAY = _env_float("LLM_HEDGE_MIN_DELAY_MS", 500) / 1000.0
+LLM_TIMEOUT = _env_float("LLM_TIMEOUT", 30)
+LLM_HEDGE_INITIAL_DELAY = _env_float("LLM_HEDGE_INITIAL_DELAY_MS", 0) / 1000.0 or None
+MIN_LATENCY_SAMPLES = 20
+LATENCY_WINDOW = 200
+FAILURE_PENALTY = 3         # consecutive failures before a provider moves to the back
+
+
+class LLMError(Exception):
+    """Every provider failed; `errors` maps provider name to its exception"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors.items()) or "No LLM provider configured")
+
+
+class LLMCancelled(Exception):
+    """The provider call was cancelled because another provider answered first"""
+
+
+# --- Providers ---
+class LLMProvider(ABC):
+    """Interface: complete() returns the reply text or raises"""
+
+    name = "provider"
+
+    @property
+    def configured(self):
+        return True
+
+    def warm_up(self):
+        """Build clients / connection pools ahead of traffic"""
+
+    @abstractmethod
+    def complete(self, messages, temperature, max_tokens, cancel_event):
+        """Reply text for `messages`; raise LLMCancelled once `cancel_event` is set"""
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI or any OpenAI-compatible chat-completions API"""
+
+    def __init__(self, name, model, api_key, base_url=None, timeout=LLM_TIMEOUT):
+        self.name = name
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url or None
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def configured(self):
+        return bool(self.api_key)
+
+    def _get_client(self):
+        # One client (and its HTTP connection pool) reused across requests
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout)
+        return self._client
+
+    def warm_up(self):
+        if self.configured:
+            self._get_client()
+
+    def complete(self, messages, temperature, max_tokens, cancel_event):
+        try:
+            client = self._get_client()
+        except (ImportError, AttributeError):
+            # openai<1.0 has no client object and no way to abort a call
+            import openai
+            response = openai.ChatCompletion.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                api_key=self.api_key
+            )
+            return response.choices[0].message.content.strip()
+
+        # Streamed, so a hedged loser can be cancelled by closing its connection
+        stream = client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        parts = []
+        try:
+            for chunk in stream:
+                if cancel_event.is_set():
+                    raise LLMCancelled(self.name)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+        finally:
+            stream.close()
+        return "".join(parts).strip()
+
+
+class MockProvider(LLMProvider):
+    """
+    Local provider for deterministic tests and load experiments.
+    `latencies` (seconds) and `failures` (bools) are cycled call by call.
+    """
+
+    def __init__(self, name="mock", reply="Mock reply to: {message}", latencies=(0.05,), failures=(False,)):
+        self.name = name
+        self.reply = reply
+        self.latencies = list(latencies)
+        self.failures = list(failures)
+        self.calls = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def complete(self, messages, temperature, max_tokens, cancel_event):
+        with self._lock:
+            call = self.calls
+            self.calls += 1
+        latency = self.latencies[call % len(self.latencies)]
+        if cancel_event.wait(latency):
+            with self._lock:
+                self.cancelled += 1
+            raise LLMCancelled(self.name)
+        if self.failures[call % len(self.failures)]:
+            raise RuntimeError(f"{self.name} simulated failure")
+        return self.reply.format(message=messages[-1]["content"], provider=self.name)
+
+
+# --- Latency Tracking ---
+class ProviderStats:
+    """Rolling latency window and outcome counters for one provider"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.wins = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.hedges = 0
+        self.consecutive_failures = 0
+
+    def record(self, latency, outcome):
+        with self._lock:
+            self.calls += 1
+            if outcome == "error":
+                self.errors += 1
+                self.consecutive_failures += 1
+                return
+            self.consecutive_failures = 0
+            # A cancelled call took at least this long; keeping it stops a
+            # provider that always loses from looking fast
+            self._latencies.append(latency)
+            if outcome == "cancelled":
+                self.cancelled += 1
+            else:
+                self.wins += 1
+
+    def percentile(self, fraction):
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self):
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "calls": self.calls,
+            "wins": self.wins,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "hedges": self.hedges,
+            "consecutive_failures": self.consecutive_failures,
+            "p50_ms": round(p50 * 1000.0, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000.0, 1) if p95 is not None else None,
+        }
+
+
+# --- Router ---
+class LLMRouter:
+    def __init__(self, providers, policy=LLM_ROUTING_POLICY, hedge=LLM_HEDGE_ENABLED,
+                 hedge_min_delay=LLM_HEDGE_MIN_DELAY, hedge_initial_delay=LLM_HEDGE_INITIAL_DELAY, max_workers=16):
+        self.providers = [provider for provider in providers if provider.configured]
+        self.policy = policy
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_initial_delay = hedge_initial_delay
+        self.max_workers = max_workers
+        self.stats = {provider.name: ProviderStats() for provider in self.providers}
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self.providers)
+
+    def warm_up(self):
+        for provider in self.providers:
+            provider.warm_up()
+        return [provider.name for provider in self.providers]
+
+    def snapshot(self):
+        return {
+            "policy": self.policy,
+            "hedging": self.hedge,
+            "providers": {name: stats.snapshot() for name, stats in self.stats.items()},
+        }
+
+    def _get_executor(self):
+        # Worker threads don't survive fork(); each process gets its own pool
+        pid = os.getpid()
+        if self._executor_pid != pid:
+            with self._lock:
+                if self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm")
+                    self._executor_pid = pid
+        return self._executor
+
+    def ordered_providers(self):
+        """Providers in the order they should be tried under the current policy"""
+        def sort_key(indexed):
+            index, provider = indexed
+            stats = self.stats[provider.name]
+            failing = stats.consecutive_failures >= FAILURE_PENALTY
+            if self.policy == "latency":
+                p50 = stats.percentile(0.5)
+                return (failing, p50 if p50 is not None else 0.0, index)
+            return (failing, index)
+        return [provider for _, provider in sorted(enumerate(self.providers), key=sort_key)]
+
+    def _hedge_at(self, provider):
+        """When to hedge a call to this provider (monotonic time), or None for no hedge"""
+        if not self.hedge:
+            return None
+        delay = self.stats[provider.name].percentile(0.95)
+        if delay is None:
+            delay = self.hedge_initial_delay
+            if delay is None:
+                return None
+        return time.monotonic() + max(self.hedge_min_delay, delay)
+
+    def _run(self, provider, messages, temperature, max_tokens, cancel_event):
+        start = time.perf_counter()
+        try:
+            result = provider.complete(messages, temperature, max_tokens, cancel_event)
+        except LLMCancelled:
+            self.stats[provider.name].record(time.perf_counter() - start, "cancelled")
+            raise
+        except Exception:
+            self.stats[provider.name].record(time.perf_counter() - start, "error")
+            raise
+        if cancel_event.is_set():
+            # Finished after the other provider had already won
+            self.stats[provider.name].record(time.perf_counter() - start, "cancelled")
+            raise LLMCancelled(provider.name)
+        self.stats[provider.name].record(time.perf_counter() - start, "ok")
+        return result
+
+    def complete(self, messages, temperature=0.7, max_tokens=250):
+        """Return (reply, provider name); raises LLMError when every provider fails"""
+        queue = self.ordered_providers()
+        if not queue:
+            raise LLMError({})
+
+        executor = self._get_executor()
+        running = {}  # future -> (provider, cancel event)
+        errors = {}
+
+        def launch():
+            provider = queue.pop(0)
+            cancel_event = threading.Event()
+            future = executor.submit(self._run, provider, messages, temperature, max_tokens, cancel_event)
+            running[future] = (provider, cancel_event)
+            return provider
+
+        current = launch()
+        hedge_at = self._hedge_at(current)
+        deadline = time.monotonic() + LLM_TIMEOUT
+
+        while running:
+            now = time.monotonic()
+            timeout = deadline - now
+            if hedge_at is not None and queue:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+            if timeout <= 0 and now >= deadline:
+                break
+            done, _ = wait(list(running), timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider, _ = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors[provider.name] = e
+                    continue
+                for _, cancel_event in running.values():
+                    cancel_event.set()
+                return result, provider.name
+
+            if done and not running and queue:
+                # Everything in flight failed: fail over right away
+                current = launch()
+                hedge_at = self._hedge_at(current)
+            elif not done and hedge_at is not None and queue and time.monotonic() >= hedge_at:
+                hedged = launch()
+                self.stats[current.name].hedges += 1
+                logger.info("Hedging LLM request: %s is slow, also asking %s", current.name, hedged.name)
+                hedge_at = None
+
+        for provider, cancel_event in running.values():
+            cancel_event.set()
+            errors[provider.name] = TimeoutError(f"no reply within {LLM_TIMEOUT:.0f}s")
+        raise LLMError(errors)
+
+
+def build_providers_from_env(default_model, default_api_key):
+    """Providers named in LLM_PROVIDERS, configured from LLM_<NAME>_* variables"""
+    providers = []
+    for name in [n.strip() for n in os.getenv("LLM_PROVIDERS", "openai").split(",") if n.strip()]:
+        prefix = f"LLM_{name.upper().replace('-', '_')}_"
+        if name.lower().startswith("mock"):
+            providers.append(MockProvider(name, latencies=(_env_float(prefix + "LATENCY_MS", 50) / 1000.0,)))
+            continue
+        providers.append(OpenAIProvider(
+            name,
+            model=os.getenv(prefix + "MODEL", default_model),
+            api_key=os.getenv(prefix + "API_KEY", default_api_key if name == "openai" else ""),
+            base_url=os.getenv(prefix + "BASE_URL")
+        ))
+    return providers
@@ -0,0 +1,217 @@
+"""
+🌐 Damsole Technologies - Pre-rendered Localized Pages
+Renders each HTML page once per site language at startup, instead of
+main.js rewriting every `[data-translate]` node in the browser after load
+(no flash of English, no client-side translation work, one language per
+download).
+
+Rendering follows main.js applyTranslations(): for each element with
+data-translate="a.b.c", a string at translations[lang].a.b.c replaces the
+element's text (its `placeholder` for inputs); missing keys leave the
+source text as is. The HTML source is the English text, so "en" is the
+page itself. Other languages are overlays in
+Damsole_Frentend/assets/i18n/translations.json, shaped like the client-side
+`translations` object.
+
+The language comes from the `websiteLanguage` cookie (set by the language
+switcher), then Accept-Language, then English.
+
+    python localization.py keys      # translatable keys with their English text
+    python localization.py coverage  # missing keys per language
+"""
+
+import html
+import json
+import os
+import re
+from html.parser import HTMLParser
+
+from structured_logging import get_logger
+
+logger = get_logger("localization")
+
+LANGUAGES = ("en", "zh", "en-IN")
+DEFAULT_LANGUAGE = "en"
+LANGUAGE_COOKIE = "websiteLanguage"
+# Same mapping as main.js detectUserLanguage()
+LANGUAGE_MAP = {"zh": "zh", "zh-cn": "zh", "zh-tw": "zh", "zh-hk": "zh", "en": "en", "en-in": "en-IN"}
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Damsole_Frentend")
+CATALOG_PATH = os.path.join(FRONTEND_DIR, "assets", "i18n", "translations.json")
+VARY_HEADER = "Accept-Language, Cookie"
+
+_VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input",
+                        "link", "meta", "source", "track", "wbr"))
+_PLACEHOLDER_ATTR = re.compile(r"""(\splaceholder\s*=\s*)(?:"[^"]*"|'[^']*'|[^\s>]+)""", re.I)
+_HTML_TAG = re.compile(r"<html\b", re.I)
+
+
+def load_catalog(path=CATALOG_PATH):
+    """{language: nested translations}; an unreadable catalog means English only"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Could not load translations from %s: %s", path, e)
+        return {}
+    return {lang: tree for lang, tree in catalog.items() if lang in LANGUAGES and isinstance(tree, dict)}
+
+def lookup(tree, key):
+    value = tree
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value if isinstance(value, str) else None
+
+
+def negotiate_language(cookie_value=None, accept_language=None):
+    """Cookie first (an explicit choice), then the best Accept-Language match"""
+    if cookie_value in LANGUAGES:
+        return cookie_value
+    ranked = []
+    for position, part in enumerate((accept_language or "").split(",")):
+        tag, _, params = part.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                continue
+        if tag and quality > 0:
+            ranked.append((-quality, position, tag.strip().lower()))
+    for _, _, tag in sorted(ranked):
+        lang = LANGUAGE_MAP.get(tag) or LANGUAGE_MAP.get(tag.split("-")[0])
+        if lang:
+            return lang
+    return DEFAULT_LANGUAGE
+
+
+class _Slot:
+    """A translatable span of the source: element content, or a placeholder attribute value"""
+    __slots__ = ("key", "start", "end", "attribute")
+
+    def __init__(self, key, start, end, attribute=False):
+        self.key, self.start, self.end, self.attribute = key, start, end, attribute
+
+
+class _SlotFinder(HTMLParser):
+    def __init__(self, source):
+        super().__init__(convert_charrefs=True)
+        self.slots = []
+        self.source_text = {}  # key -> English text, for the CLI
+        self._stack = []       # (tag, key, content start)
+        # HTMLParser counts lines by "\n" only
+        self._line_offsets = [0] + [m.end() for m in re.finditer("\n", source)]
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self._line_offsets[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, void=tag in _VOID_TAGS)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, void=True)
+
+    def _start(self, tag, attrs, void):
+        attrs = dict(attrs)
+        key = attrs.get("data-translate")
+        start = self._offset()
+        tag_text = self.get_starttag_text()
+        if key and "placeholder" in attrs:
+            match = _PLACEHOLDER_ATTR.search(tag_text)
+            if match:
+                self.slots.append(_Slot(key, start + match.start(), start + match.end(), attribute=True))
+                self.source_text.setdefault(key, attrs.get("placeholder") or "")
+            key = None  # client sets the placeholder, not the text
+        if not void:
+            self._stack.append((tag, key, start + len(tag_text)))
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _, _ in self._stack):
+            return
+        end = self._offset()
+        while self._stack:
+            open_tag, key, content_start = self._stack.pop()
+            if key:
+                self.slots.append(_Slot(key, content_start, end))
+            if open_tag == tag:
+                break
+
+
+class PageTemplate:
+    """A page parsed once, rendered per language"""
+
+    def __init__(self, source):
+        self.source = source
+        finder = _SlotFinder(source)
+        finder.feed(source)
+        finder.close()
+        self.slots = sorted(finder.slots, key=lambda slot: slot.start)
+        self.keys = {slot.key for slot in self.slots}
+        self.source_text = dict(finder.source_text)
+        for slot in self.slots:
+            if not slot.attribute:
+                text = re.sub(r"<[^>]*>", "", source[slot.start:slot.end])
+                self.source_text.setdefault(slot.key, html.unescape(" ".join(text.split())))
+
+    def render(self, lang, translations):
+        """The page as main.js would leave it after applyTranslations() in `lang`"""
+        parts, cursor = [], 0
+        for slot in self.slots:
+            if slot.start < cursor:
+                continue  # inside an element whose text was already replaced
+            value = lookup(translations, slot.key)
+            if value is None:
+                continue
+            parts.append(self.source[cursor:slot.start])
+            if slot.attribute:
+                prefix = _PLACEHOLDER_ATTR.match(self.source, slot.start).group(1)
+                parts.append(f'{prefix}"{html.escape(value, quote=True)}"')
+            else:
+                parts.append(html.escape(value, quote=False))
+            cursor = slot.end
+        parts.append(self.source[cursor:])
+        rendered = "".join(parts)
+        # Tell main.js the page is already in `lang`
+        return _HTML_TAG.sub(f'<html data-lang="{lang}"', rendered, count=1)
+
+
+def render_variants(source, catalog):
+    """{language: html} for every site language"""
+    template = PageTemplate(source)
+    return {lang: template.render(lang, catalog.get(lang, {})) for lang in LANGUAGES}
+
+
+# ========== CLI ==========
+
+if __name__ == "__main__":
+    import sys
+
+    pages = [name for name in sorted(os.listdir(FRONTEND_DIR)) if name.endswith(".html")]
+    source_text = {}
+    for name in pages:
+        with open(os.path.join(FRONTEND_DIR, name), "r", encoding="utf-8") as f:
+            for key, text in PageTemplate(f.read()).source_text.items():
+                source_text.setdefault(key, text)
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "keys":
+        for key in sorted(source_text):
+            print(f"{key:<36} {source_text[key]}")
+    elif command == "coverage":
+        catalog = load_catalog()
+        print("="*70)
+        for lang in LANGUAGES:
+            if lang == DEFAULT_LANGUAGE:
+                continue
+            missing = [key for key in sorted(source_text) if lookup(catalog.get(lang, {}), key) is None]
+            print(f"   • {lang:<6} {len(source_text) - len(missing)}/{len(source_text)} keys translated")
+            for key in missing:
+                print(f"        - {key}")
+        print("="*70)
+    else:
+        print("Usage: python localization.py keys|coverage")
@@ -0,0 +1,285 @@
+"""
+📬 Damsole Technologies - Admin Notification Digest
+Coalesces lead and contact form emails into a single digest email per
+window (or per N notifications) instead of one SMTP session each.
+Urgent notifications bypass the digest and are sent immediately.
+Pending notifications are persisted to a local JSON-lines file so none are
+lost if the server restarts before the digest goes out. Under a pre-forked
+server each worker keeps its own `<file>.<pid>` and, on startup, adopts
+files left behind by workers that are no longer running.
+
+Config (.env):
+    NOTIFY_DIGEST_WINDOW=300        # seconds; 0 disables digest mode (default)
+    NOTIFY_DIGEST_MAX_ITEMS=20      # send early once this many are pending
+    NOTIFY_URGENT_KEYWORDS=urgent,asap,emergency,immediately
+    NOTIFY_DIGEST_FILE=.pending_notifications.jsonl
+"""
+
+import datetime
+import glob
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process, single pending file
+    fcntl = None
+
+from structured_logging import get_logger
+
+logger = get_logger("notifications")
+
+def _env_int(key, default):
+    try:
+        return int(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+DIGEST_WINDOW = _env_int("NOTIFY_DIGEST_WINDOW", 0)
+DIGEST_MAX_ITEMS = max(1, _env_int("NOTIFY_DIGEST_MAX_ITEMS", 20))
+DIGEST_RETRY_DELAY = 60
+URGENT_KEYWORDS = [
+    keyword.strip().lower()
+    for keyword in os.getenv("NOTIFY_URGENT_KEYWORDS", "urgent,asap,emergency,immediately").split(",")
+    if keyword.strip()
+]
+DIGEST_FILE = os.getenv(
+    "NOTIFY_DIGEST_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pending_notifications.jsonl")
+)
+
+KIND_LABELS = {
+    "lead": "chatbot lead(s)",
+    "contact": "contact form(s)",
+}
+
+
+def is_urgent(data):
+    """Urgent rule: any text value mentions one of NOTIFY_URGENT_KEYWORDS"""
+    for value in data.values():
+        if isinstance(value, str):
+            value_lower = value.lower()
+            if any(keyword in value_lower for keyword in URGENT_KEYWORDS):
+                return True
+    return False
+
+
+class NotificationDigest:
+    """Buffers admin notifications and delivers them as one digest email"""
+
+    def __init__(self, send_fn, window=DIGEST_WINDOW, max_items=DIGEST_MAX_ITEMS, path=DIGEST_FILE):
+        self.send_fn = send_fn  # send_fn(subject, body) -> bool
+        self.window = window
+        self.max_items = max_items
+        self.base_path = path
+        self.path = path
+        self._pending = []
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._started_pid = None
+        self._lock_file = None
+        self._retry_at = 0.0
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending)
+
+    # --- Public API ---
+    def notify(self, kind, subject, body, urgent=False):
+        """Send now (digest disabled or urgent) or queue for the next digest"""
+        if not self.enabled or urgent:
+            return self.send_fn(subject, body)
+
+        self.start()
+        item = {"kind": kind, "subject": subject, "body": body, "created_at": time.time()}
+        with self._cond:
+            self._pending.append(item)
+            self._append_to_file(item)
+            self._cond.notify()
+        logger.info("Notification queued for digest (%s pending)", len(self._pending))
+        return True
+
+    def start(self):
+        """Reload persisted notifications and start the background flusher (once per process)"""
+        if not self.enabled:
+            return
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._cond:
+            if self._started_pid == pid:
+                return
+            # Anything inherited across fork() belongs to the parent process
+            self._started_pid = pid
+            self._pending = self._claim_files()
+            if self._pending:
+                logger.info("Restored %s pending notification(s) into %s", len(self._pending), self.path)
+        threading.Thread(target=self._run, name="notification-digest", daemon=True).start()
+
+    def flush(self):
+        """Send everything pending right now (e.g. from an admin command)"""
+        with self._cond:
+            items = list(self._pending)
+        if items:
+            self._deliver(items)
+
+    # --- Background Flusher ---
+    def _seconds_until_due(self):
+        if not self._pending:
+            return None
+        now = time.time()
+        if now < self._retry_at:
+            return self._retry_at - now
+        if len(self._pending) >= self.max_items:
+            return 0
+        return max(0.0, self._pending[0]["created_at"] + self.window - now)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                timeout = self._seconds_until_due()
+                while timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
+                    timeout = self._seconds_until_due()
+                items = list(self._pending)
+            self._deliver(items)
+
+    def _deliver(self, items):
+        with self._send_lock:
+            with self._cond:
+                # Skip anything a concurrent flush() already delivered
+                pending_ids = {id(item) for item in self._pending}
+                items = [item for item in items if id(item) in pending_ids]
+            if items:
+                self._send_and_ack(items)
+
+    def _send_and_ack(self, items):
+        if len(items) == 1:
+            sent = self.send_fn(items[0]["subject"], items[0]["body"])
+        else:
+            subject, body = self._format_digest(items)
+            sent = self.send_fn(subject, body)
+
+        with self._cond:
+            if sent:
+                delivered = {id(item) for item in items}
+                self._pending = [item for item in self._pending if id(item) not in delivered]
+                self._rewrite_file()
+                self._retry_at = 0.0
+            else:
+                logger.warning("Digest send failed. Retrying in %ss.", DIGEST_RETRY_DELAY)
+                self._retry_at = time.time() + DIGEST_RETRY_DELAY
+
+    def _format_digest(self, items):
+        counts = {}
+        for item in items:
+            counts[item["kind"]] = counts.get(item["kind"], 0) + 1
+        summary = ", ".join(f"{count} {KIND_LABELS.get(kind, kind)}" for kind, count in counts.items())
+        subject = f"📬 Damsole Digest - {len(items)} new notifications ({summary})"
+
+        separator = "━" * 80
+        sections = []
+        for index, item in enumerate(items, 1):
+            received = datetime.datetime.fromtimestamp(item["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            sections.append(f"#{index} {item['subject']}\nReceived: {received}\n\n{item['body']}")
+
+        body = (
+            f"Damsole Technologies notification digest: {summary}\n\n"
+            + f"\n\n{separator}\n{separator}\n\n".join(sections)
+        )
+        return subject, body
+
+    # --- Persistence ---
+    def _append_to_file(self, item):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.warning("Could not persist pending notification: %s", e)
+
+    def _rewrite_file(self):
+        try:
+            if not self._pending:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for item in self._pending:
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not update pending notifications file: %s", e)
+
+    def _claim_files(self):
+        """Pick this process's pending file and adopt orphaned ones"""
+        if fcntl is None:
+            self.path = self.base_path
+            return self._load_file(self.path)
+
+        self.path = f"{self.base_path}.{os.getpid()}"
+        # Held for the life of the process; marks self.path as owned
+        self._lock_file = open(self.path + ".lock", "w")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+
+        items = []
+        with open(self.base_path + ".adopt.lock", "w") as adopt_lock:
+            fcntl.flock(adopt_lock, fcntl.LOCK_EX)
+            for path in sorted(glob.glob(glob.escape(self.base_path) + "*")):
+                if path.endswith(".lock"):
+                    # Lock left by an exited worker that had nothing pending
+                    data_path = path[:-len(".lock")]
+                    if (path not in (self.path + ".lock", adopt_lock.name)
+                            and not os.path.exists(data_path) and self._is_orphan(data_path)):
+                        os.remove(path)
+                    continue
+                if path == self.path or path.endswith(".tmp"):
+                    continue
+                if path != self.base_path and not self._is_orphan(path):
+                    continue
+                items.extend(self._load_file(path))
+                os.remove(path)
+                if os.path.exists(path + ".lock"):
+                    os.remove(path + ".lock")
+
+        if items:
+            self._pending = items
+            self._rewrite_file()
+        return items
+
+    @staticmethod
+    def _is_orphan(path):
+        """A worker file is orphaned when nobody holds its lock"""
+        try:
+            with open(path + ".lock", "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+        except OSError:
+            return False
+
+    def _load_file(self, path):
+        items = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        items.append(json.loads(line))
+                    except ValueError:
+                        logger.warning("Skipping corrupt line in pending notifications file.")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not read pending notifications file: %s", e)
+        return items
@@ -0,0 +1,247 @@
+"""
+🔬 Damsole Technologies - On-Demand Request Profiling
+Profiles selected requests and reports where the time went.
+
+A request is profiled when PROFILE_ENABLED=1 and either:
+  • it carries `X-Damsole-Profile: 1` plus a valid admin Authorization header, or
+  • it is picked by PROFILE_SAMPLE_RATE (0.0 - 1.0).
+
+Profiled requests get:
+  • a `Server-Timing` header with per-stage durations (intent, validate, llm, db, email...)
+  • a profile file in PROFILE_DIR (newest PROFILE_MAX_FILES kept):
+      sampling mode      -> <name>.collapsed  (collapsed stacks, feed to flamegraph.pl / speedscope)
+      deterministic mode -> <name>.prof       (cProfile stats, open with snakeviz / flameprof)
+    Only one cProfile can be active per process (Python 3.12+ raises on a second
+    one), so a deterministic request that overlaps another falls back to sampling.
+
+With PROFILE_ENABLED unset nothing is wrapped or registered, so overhead is zero.
+"""
+
+import cProfile
+import functools
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import request, g
+
+from structured_logging import get_logger
+
+logger = get_logger("profiling")
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sampling").lower()  # "sampling" or "deterministic"
+PROFILE_HEADER = "X-Damsole-Profile"
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+
+try:
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+except ValueError:
+    PROFILE_SAMPLE_RATE = 0.0
+try:
+    PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+except ValueError:
+    PROFILE_MAX_FILES = 50
+try:
+    PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000.0
+except ValueError:
+    PROFILE_INTERVAL = 0.005
+
+_local = threading.local()
+# Held while a cProfile.Profile is enabled; there can be only one at a time
+_cprofile_lock = threading.Lock()
+
+
+# --- Stage Timings ---
+def profile_stage(name, fn):
+    """
+    Wrap fn so its duration is reported as a Server-Timing stage on profiled
+    requests. Returns fn unchanged when profiling is disabled.
+    """
+    if not PROFILE_ENABLED:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        timings = getattr(_local, "timings", None)
+        if timings is None:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings.append((name, (time.perf_counter() - start) * 1000.0))
+    return wrapper
+
+def _sum_stages(timings):
+    """Total milliseconds per stage name (a stage may run several times)"""
+    totals = {}
+    for name, duration in timings:
+        totals[name] = round(totals.get(name, 0.0) + duration, 3)
+    return totals
+
+def _server_timing_header(totals, total_ms):
+    parts = [f"{name};dur={duration:.2f}" for name, duration in totals.items()]
+    parts.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(parts)
+
+
+# --- Sampling Profiler ---
+class StackSampler:
+    """One background thread samples the stacks of all threads being profiled"""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self._targets = {}  # thread id -> Counter of collapsed stacks
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        counts = Counter()
+        with self._lock:
+            self._targets[thread_id] = counts
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return counts
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._targets.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                targets = dict(self._targets)
+            if not targets:
+                self._wakeup.clear()
+                self._wakeup.wait()
+                continue
+            frames = sys._current_frames()
+            for thread_id, counts in targets.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    counts[_collapse(frame)] += 1
+            time.sleep(self.interval)
+
+def _collapse(frame):
+    """Render a frame's stack as `root;...;leaf` (collapsed-stack format)"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    stack.reverse()
+    return ";".join(stack)
+
+_sampler = StackSampler()
+
+
+# --- Output ---
+def _profile_path(extension):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_path = request.path.strip("/").replace("/", "_") or "root"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}_{request.method}_{safe_path}_{uuid.uuid4().hex[:8]}{extension}"
+    return os.path.join(PROFILE_DIR, name)
+
+def _rotate():
+    try:
+        files = [os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR)]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[PROFILE_MAX_FILES:]:
+            os.remove(path)
+    except OSError as e:
+        logger.warning("Could not rotate profile directory: %s", e)
+
+def _write_collapsed(counts):
+    path = _profile_path(".collapsed")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+# --- Flask Integration ---
+def _stop_cprofile(profiler):
+    try:
+        profiler.disable()
+    finally:
+        _cprofile_lock.release()
+
+def init_profiling(app, authorize):
+    """
+    Register profiling hooks on the Flask app.
+    `authorize(request)` decides whether the X-Damsole-Profile header is honoured.
+    """
+    if not PROFILE_ENABLED:
+        return
+
+    def should_profile():
+        if request.headers.get(PROFILE_HEADER) == "1" and authorize(request):
+            return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    @app.before_request
+    def _start_profile():
+        if not should_profile():
+            return
+        g.profile_start = time.perf_counter()
+        _local.timings = []
+        if PROFILE_MODE == "deterministic" and _cprofile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                g.profiler = profiler
+                return
+            except ValueError as e:  # another profiler/tool (e.g. a debugger) is already active
+                _cprofile_lock.release()
+                logger.debug("cProfile unavailable, sampling instead: %s", e)
+        g.profile_counts = _sampler.start(threading.get_ident())
+
+    @app.after_request
+    def _finish_profile(response):
+        start = g.pop("profile_start", None)
+        if start is None:
+            return response
+        total_ms = (time.perf_counter() - start) * 1000.0
+        timings = getattr(_local, "timings", None) or []
+        _local.timings = None
+
+        try:
+            profiler = g.pop("profiler", None)
+            if profiler is not None:
+                _stop_cprofile(profiler)
+                path = _profile_path(".prof")
+                profiler.dump_stats(path)
+            else:
+                g.pop("profile_counts", None)
+                path = _write_collapsed(_sampler.stop(threading.get_ident()))
+            _rotate()
+            response.headers["X-Damsole-Profile-File"] = os.path.basename(path)
+        except Exception as e:
+            logger.warning("Could not write request profile: %s", e)
+
+        g.stage_timings = _sum_stages(timings)
+        response.headers["Server-Timing"] = _server_timing_header(g.stage_timings, total_ms)
+        return response
+
+    @app.teardown_request
+    def _cleanup_profile(exc):
+        # Make sure an aborted request never leaves this thread profiled
+        if getattr(_local, "timings", None) is not None:
+            _local.timings = None
+            _sampler.stop(threading.get_ident())
+            profiler = g.pop("profiler", None)
+            if profiler is not None:
+                _stop_cprofile(profiler)
+
+    logger.info("Request profiling enabled (%s, sample rate %s)", PROFILE_MODE, PROFILE_SAMPLE_RATE)
@@ -0,0 +1,101 @@
+"""
+🛬 Damsole Technologies - Single-Flight Request Coalescing
+When many visitors ask the same question at the same moment, only the first
+call goes upstream (OpenAI, Google Search); concurrent callers with the same
+key wait for it and share its result, or its exception. Nothing is cached
+afterwards: the next call with that key after the flight lands goes upstream
+again.
+
+Works for threads (`do`) and for asyncio tasks (`do_async`), which use
+separate in-flight tables so a thread never blocks on an event loop.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from structured_logging import get_logger
+
+logger = get_logger("single_flight")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution"""
+
+    def __init__(self, name):
+        self.name = name
+        self._flights = {}        # key -> concurrent.futures.Future
+        self._async_flights = {}  # (event loop id, key) -> asyncio.Future
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "executed": 0, "collapsed": 0}
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights) + len(self._async_flights)
+
+    # --- Threads ---
+    def do(self, key, fn):
+        """Return fn()'s result, sharing one execution among concurrent callers with this key"""
+        with self._lock:
+            self.stats["calls"] += 1
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._flights[key] = future
+                self.stats["executed"] += 1
+            else:
+                self.stats["collapsed"] += 1
+
+        if not leader:
+            logger.debug("Joined in-flight %s call", self.name)
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    # --- asyncio ---
+    async def do_async(self, key, coro_fn):
+        """Async variant: `await coro_fn()` once per key per event loop"""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            self.stats["calls"] += 1
+            future = self._async_flights.get(flight_key)
+            leader = future is None
+            if leader:
+                future = loop.create_future()
+                self._async_flights[flight_key] = future
+                self.stats["executed"] += 1
+            else:
+                self.stats["collapsed"] += 1
+
+        if not leader:
+            # shield(): one waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(future)
+
+        try:
+            result = await coro_fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited flight doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._async_flights.pop(flight_key, None)
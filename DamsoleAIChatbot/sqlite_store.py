@@ -0,0 +1,153 @@
+"""
+🗄️ Damsole Technologies - Embedded SQLite Backend
+DB_TYPE=sqlite stores leads in a local SQLite file: no database server, no
+network round trip, and it works offline for tests and benchmarks.
+
+  • WAL journal: readers (exports, health probes) never block the writer
+  • one cached connection per thread (and per process, so forked workers
+    never share a handle), so sqlite3's per-connection statement cache keeps
+    the INSERT prepared across requests
+  • get_db_connection() callers keep their usual `conn.close()`; for SQLite
+    that rolls back anything left uncommitted and returns the connection to
+    the thread's cache instead of closing it
+
+Config (.env):
+    DB_TYPE=sqlite
+    SQLITE_PATH=leads.db             # relative to DamsoleAIChatbot/
+    SQLITE_SYNCHRONOUS=NORMAL        # FULL also survives power loss, at some write latency
+
+Run `python sqlite_store.py --bench` to measure insert latency.
+"""
+
+import os
+import sqlite3
+import threading
+
+from structured_logging import get_logger
+
+logger = get_logger("sqlite")
+
+SQLITE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.getenv("SQLITE_PATH", "leads.db")
+)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+if SQLITE_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    SQLITE_SYNCHRONOUS = "NORMAL"
+BUSY_TIMEOUT_MS = 5000
+
+LEADS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS leads (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        full_name VARCHAR(255),
+        email VARCHAR(255),
+        phone_number VARCHAR(20),
+        address TEXT,
+        project_requirement TEXT,
+        deadline VARCHAR(255),
+        timestamp TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    )
+"""
+
+# Archived chat transcripts (TRANSCRIPT_ARCHIVE=db)
+TRANSCRIPTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS transcripts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id VARCHAR(255),
+        reason VARCHAR(32),
+        archived_at TIMESTAMP,
+        turns INTEGER,
+        messages TEXT
+    )
+"""
+
+
+class _PooledConnection:
+    """The thread's cached sqlite3 connection; close() hands it back instead of closing"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn.in_transaction:
+            self._conn.rollback()
+
+
+class SQLiteConnections:
+    """Per-thread, per-process cache of configured connections to one database file"""
+
+    def __init__(self, path=SQLITE_PATH, synchronous=SQLITE_SYNCHRONOUS):
+        self.path = path
+        self.synchronous = synchronous
+        self._local = threading.local()
+
+    def connect(self):
+        cached = getattr(self._local, "conn", None)
+        if cached is not None and self._local.pid == os.getpid():
+            return cached
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000.0, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._local.conn = _PooledConnection(conn)
+        self._local.pid = os.getpid()
+        return self._local.conn
+
+    def init_schema(self):
+        conn = self.connect()
+        conn.execute(LEADS_TABLE_SQL)
+        conn.commit()
+
+
+def adapt_query(query):
+    """DB-API '%s' placeholders (MySQL/PostgreSQL) -> sqlite3 '?'"""
+    return query.replace("%s", "?")
+
+
+# --- Benchmark ---
+def run_benchmark(inserts=2000):
+    import tempfile
+    import time
+
+    row = ("Asha Patil", "asha@example.com", "9876543210", "12 MG Road, Pune",
+           "E-commerce website for my bakery", "2 months")
+    insert = adapt_query("""
+        INSERT INTO leads (full_name, email, phone_number, address, project_requirement, deadline)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteConnections(path=os.path.join(tmp, "leads.db"))
+        store.init_schema()
+        latencies = []
+        for _ in range(inserts):
+            start = time.perf_counter()
+            conn = store.connect()
+            cur = conn.cursor()
+            cur.execute(insert, row)
+            conn.commit()
+            cur.close()
+            conn.close()
+            latencies.append((time.perf_counter() - start) * 1000.0)
+        latencies.sort()
+
+    print("="*70)
+    print(f"📊 SQLite lead inserts ({inserts}, WAL, synchronous={SQLITE_SYNCHRONOUS})")
+    print(f"   • p50: {latencies[len(latencies) // 2]:.3f} ms")
+    print(f"   • p95: {latencies[int(len(latencies) * 0.95)]:.3f} ms")
+    print(f"   • max: {latencies[-1]:.3f} ms")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        run_benchmark()
+    else:
+        print("Usage: python sqlite_store.py --bench")
@@ -0,0 +1,454 @@
+"""
+🎬 Damsole Technologies - Traffic Record & Replay
+Captures a sample of real /chat and /contact traffic and replays it against
+a local build, so a performance regression shows up before a deploy
+instead of after it. Synthetic load gets the mix of greetings, knowledge-base
+hits, LLM questions and lead collections wrong; recorded traffic doesn't.
+
+Recording (TRAFFIC_RECORD=1) samples whole chat sessions (so a lead
+collection is kept end to end) and individual contact submissions. Each
+sampled request is buffered in memory and flushed by a background thread as
+gzip NDJSON to a per-worker file in TRAFFIC_DIR:
+    {"ts": 1718000000.123, "path": "/chat", "kind": "collecting:Email",
+     "body": {...}, "status": 200, "ms": 12.4}
+Payloads are anonymized before they are buffered. Every letter becomes "x",
+every digit "5", and punctuation is kept. Lead field answers and contact form
+fields are masked whole. Support questions only have email addresses and long
+digit runs masked, because their wording decides the intent. Masking keeps
+each value's shape, so a valid email is still valid and a 9-digit phone
+number is still rejected, and the replay follows the same path.
+WebSocket (/chat/ws) traffic is not recorded. The server keeps one chat
+session for every visitor, so replayed sessions share it just as they did live.
+
+Config (.env):
+    TRAFFIC_RECORD=0
+    TRAFFIC_SAMPLE_RATE=0.1          # fraction of chat sessions / contact submissions
+    TRAFFIC_DIR=traffic
+    TRAFFIC_FLUSH_INTERVAL=5
+
+Replay against a local instance with mocked LLM, SMTP and database:
+    python traffic_replay.py serve-mock --port 5055              # terminal 1 (build A)
+    python traffic_replay.py replay traffic/ --target http://127.0.0.1:5055 --speed 2 --out a.json
+    ... switch to build B, restart serve-mock, replay again with --out b.json ...
+    python traffic_replay.py compare a.json b.json               # exit 1 on regression
+"""
+
+import datetime
+import glob
+import gzip
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+
+from structured_logging import get_logger
+
+logger = get_logger("traffic")
+
+def _env_float(key, default):
+    try:
+        return float(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+TRAFFIC_RECORD = os.getenv("TRAFFIC_RECORD", "0").lower() in ("1", "true", "yes")
+TRAFFIC_SAMPLE_RATE = min(1.0, max(0.0, _env_float("TRAFFIC_SAMPLE_RATE", 0.1)))
+TRAFFIC_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.getenv("TRAFFIC_DIR", "traffic")
+)
+TRAFFIC_FLUSH_INTERVAL = max(0.5, _env_float("TRAFFIC_FLUSH_INTERVAL", 5))
+TRAFFIC_MAX_BUFFER = 10000
+RECORDED_PATHS = ("/chat", "/contact")
+REGRESSION_THRESHOLD = 0.10     # compare: relative p95 increase that fails
+REGRESSION_MIN_MS = 5.0         # ...and only if it is also this many ms slower
+
+
+# --- Anonymization ---
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_LONG_DIGITS = re.compile(r"\d[\d\s\-()]{5,}\d")
+
+def mask(value):
+    """Replace letters and digits but keep length, case class and punctuation"""
+    if not isinstance(value, str):
+        return value
+    out = []
+    for ch in value:
+        if ch.isdigit():
+            out.append("5")
+        elif ch.isalpha():
+            # Non-ASCII letters stay non-ASCII (name validation only accepts A-Z)
+            out.append(("X" if ch.isupper() else "x") if ch.isascii() else "é")
+        else:
+            out.append(ch)
+    return "".join(out)
+
+def mask_contact_details(text):
+    """Mask only email addresses and phone-like digit runs in free text"""
+    if not isinstance(text, str):
+        return text
+    text = _EMAIL.sub(lambda m: mask(m.group(0)), text)
+    return _LONG_DIGITS.sub(lambda m: mask(m.group(0)), text)
+
+def anonymize(path, kind, body):
+    if not isinstance(body, dict):
+        return None
+    if path == "/contact":
+        return {key: value if key in ("services", "countryCode") else mask(value) for key, value in body.items()}
+    message = body.get("message")
+    if kind.startswith("collecting"):
+        return {"message": mask(message)}
+    return {"message": mask_contact_details(message)}
+
+
+# --- Recorder ---
+class TrafficRecorder:
+    """Samples requests into a bounded buffer; a background thread appends them to gzip NDJSON"""
+
+    def __init__(self, enabled=TRAFFIC_RECORD, sample_rate=TRAFFIC_SAMPLE_RATE, directory=TRAFFIC_DIR,
+                 interval=TRAFFIC_FLUSH_INTERVAL):
+        self.enabled = enabled and sample_rate > 0
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.interval = interval
+        self._salt = random.getrandbits(32)  # a different sample of sessions every run
+        self._buffer = deque(maxlen=TRAFFIC_MAX_BUFFER)
+        self._lock = threading.Lock()
+        self._started_pid = None
+        self.stats = {"recorded": 0, "dropped": 0, "written": 0}
+
+    def sampled(self, key=None):
+        """Same answer for every request of one session; a fresh draw when key is None"""
+        if key is None:
+            return random.random() < self.sample_rate
+        return zlib.crc32(f"{self._salt}:{key}".encode("utf-8")) / 2**32 < self.sample_rate
+
+    def record(self, path, kind, body, status, elapsed_ms):
+        entry = {"ts": round(time.time(), 3), "path": path, "kind": kind, "body": body,
+                 "status": status, "ms": round(elapsed_ms, 2)}
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.stats["dropped"] += 1
+            self._buffer.append(entry)
+            self.stats["recorded"] += 1
+        self.start()
+
+    def start(self):
+        """Start the flush thread (once per process, so forked workers get their own)"""
+        pid = os.getpid()
+        if not self.enabled or self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+        threading.Thread(target=self._run, name="traffic-recorder", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Traffic log flush failed")
+
+    def flush(self):
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+        if not batch:
+            return 0
+        data = "".join(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n" for entry in batch)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"traffic-{datetime.date.today():%Y%m%d}-{os.getpid()}.ndjson.gz")
+        # One gzip member per flush; members concatenate into one stream
+        with open(path, "ab") as f:
+            f.write(gzip.compress(data.encode("utf-8")))
+        with self._lock:
+            self.stats["written"] += len(batch)
+        return len(batch)
+
+
+def init_traffic_recorder(app, recorder, session_id_fn, describe_chat):
+    """
+    Record sampled POSTs to RECORDED_PATHS. describe_chat(payload) labels a
+    chat message from the session state before it is handled
+    ("support", "collecting:<field>", "auto_start").
+    """
+    if not recorder.enabled:
+        return False
+    import atexit
+    from flask import g, request
+
+    atexit.register(recorder.flush)
+
+    @app.before_request
+    def _start_recording():
+        if request.method != "POST" or request.path not in RECORDED_PATHS:
+            return
+        if request.path == "/chat":
+            if not recorder.sampled(session_id_fn()):
+                return
+            body = request.get_json(silent=True)
+            kind = describe_chat(body)
+        else:
+            if not recorder.sampled():
+                return
+            body = request.get_json(silent=True)
+            kind = "contact"
+        g.traffic_sample = (kind, anonymize(request.path, kind, body), time.perf_counter())
+
+    @app.after_request
+    def _finish_recording(response):
+        sample = g.pop("traffic_sample", None)
+        if sample is not None:
+            kind, body, start = sample
+            recorder.record(request.path, kind, body, response.status_code, (time.perf_counter() - start) * 1000.0)
+        return response
+
+    logger.info("Recording %.0f%% of /chat sessions and /contact submissions to %s",
+                recorder.sample_rate * 100, recorder.directory)
+    return True
+
+
+# ========== Replay ==========
+
+def load_traffic(paths):
+    """Recorded requests from files and/or directories, in time order"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "traffic-*.ndjson.gz"))))
+        else:
+            files.append(path)
+    entries = []
+    for path in files:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except (EOFError, OSError) as e:
+            logger.warning("Stopped reading %s early: %s", path, e)  # torn final member
+    entries.sort(key=lambda entry: entry["ts"])
+    return entries
+
+def _group(entry):
+    """Report bucket: the kind without the lead field (collecting:Email -> collecting)"""
+    return f"{entry['path']} {entry['kind'].split(':')[0]}"
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+def summarize(results, wall_seconds):
+    groups = {}
+    for result in results:
+        groups.setdefault(result["group"], []).append(result)
+    groups["all"] = list(results)
+    summary = {}
+    for name, items in sorted(groups.items()):
+        latencies = sorted(item["ms"] for item in items if item["ms"] is not None)
+        summary[name] = {
+            "requests": len(items),
+            "errors": sum(1 for item in items if item["status"] is None or item["status"] >= 500),
+            "status_changed": sum(1 for item in items if item["status"] != item["recorded_status"]),
+            "p50_ms": _percentile(latencies, 0.50),
+            "p95_ms": _percentile(latencies, 0.95),
+            "p99_ms": _percentile(latencies, 0.99),
+        }
+    summary["all"]["throughput_rps"] = round(len(results) / wall_seconds, 2) if wall_seconds > 0 else None
+    summary["all"]["wall_seconds"] = round(wall_seconds, 2)
+    return summary
+
+def replay(entries, target, speed=1.0, concurrency=16, timeout=60):
+    """
+    Re-issue recorded requests against `target`, keeping their original spacing
+    divided by `speed` (0 = as fast as `concurrency` allows).
+    """
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+
+    local = threading.local()
+    results = []
+    results_lock = threading.Lock()
+
+    def send(entry):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            status = session.post(target.rstrip("/") + entry["path"], json=entry["body"], timeout=timeout).status_code
+        except requests.RequestException as e:
+            logger.warning("Replay of %s failed: %s", entry["path"], e)
+            status = None
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        with results_lock:
+            results.append({"group": _group(entry), "status": status, "recorded_status": entry.get("status"),
+                            "ms": round(elapsed_ms, 2) if status is not None else None})
+
+    if not entries:
+        return summarize([], 0)
+    first_ts = entries[0]["ts"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay") as pool:
+        for entry in entries:
+            if speed > 0:
+                delay = (entry["ts"] - first_ts) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, entry)
+    return summarize(results, time.perf_counter() - start)
+
+
+def compare(base, candidate, threshold=REGRESSION_THRESHOLD, min_ms=REGRESSION_MIN_MS):
+    """Rows of (group, metric, base, candidate, change %, regressed)"""
+    rows = []
+    for group in sorted(set(base["summary"]) & set(candidate["summary"])):
+        before, after = base["summary"][group], candidate["summary"][group]
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "errors"):
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100.0 if old else (0.0 if new == old else float("inf"))
+            if metric == "p95_ms":
+                regressed = new > old * (1 + threshold) and new - old >= min_ms
+            elif metric == "throughput_rps":
+                regressed = new < old * (1 - threshold)
+            elif metric == "errors":
+                regressed = new > old
+            else:
+                regressed = False
+            rows.append((group, metric, old, new, change, regressed))
+    return rows
+
+
+# ========== Mock Target ==========
+
+class _MockSMTP:
+    """Stands in for smtplib.SMTP: waits like a real mail server, sends nothing"""
+    latency = 0.3
+
+    def __init__(self, *args, **kwargs):
+        time.sleep(self.latency / 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, *args):
+        pass
+
+    def send_message(self, *args, **kwargs):
+        time.sleep(self.latency / 2)
+
+    def quit(self):
+        pass
+
+
+def serve_mock(port, llm_latency_ms, smtp_latency_ms, dev=False):
+    """Run main.py with the LLM, SMTP and database replaced by local stand-ins"""
+    import smtplib
+    import sys
+    import tempfile
+
+    workdir = tempfile.mkdtemp(prefix="damsole-replay-")
+    # Set before main/app are imported; load_dotenv() does not override them
+    os.environ.update({
+        "PORT": str(port),
+        "DB_TYPE": "sqlite",
+        "SQLITE_PATH": os.path.join(workdir, "leads.db"),
+        "SESSION_FILE": os.path.join(workdir, "sessions.jsonl"),
+        "LLM_PROVIDERS": "mock",
+        "LLM_MOCK_LATENCY_MS": str(llm_latency_ms),
+        "ADMIN_EMAIL": "replay@example.com",
+        "ADMIN_PASSWORD": "replay",
+        "GOOGLE_API_KEY": "",
+        "GOOGLE_CSE_ID": "",
+        "TRANSCRIPT_ARCHIVE": "off",
+        "TRAFFIC_RECORD": "0",
+    })
+    _MockSMTP.latency = smtp_latency_ms / 1000.0
+    smtplib.SMTP = _MockSMTP
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import main
+    print(f"🎬 Mock target on http://127.0.0.1:{port} (LLM {llm_latency_ms} ms, SMTP {smtp_latency_ms} ms, data in {workdir})")
+    if dev:
+        main.initialize_server()
+        main.app.run(host="127.0.0.1", port=port, threaded=True)
+    else:
+        main.serve()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Replay recorded /chat and /contact traffic")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("replay", help="re-issue a traffic log against a server")
+    run.add_argument("logs", nargs="+", help="traffic files or directories")
+    run.add_argument("--target", default="http://127.0.0.1:5055")
+    run.add_argument("--speed", type=float, default=1.0, help="2 = twice as fast, 0 = no pauses")
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--label", default="", help="build name stored in the report (e.g. a git sha)")
+    run.add_argument("--out", help="write the JSON report here")
+
+    diff = commands.add_parser("compare", help="latency/throughput diff of two replay reports")
+    diff.add_argument("base")
+    diff.add_argument("candidate")
+    diff.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD * 100, help="percent")
+
+    mock = commands.add_parser("serve-mock", help="run this build with mocked LLM, SMTP and database")
+    mock.add_argument("--port", type=int, default=5055)
+    mock.add_argument("--llm-latency-ms", type=int, default=800)
+    mock.add_argument("--smtp-latency-ms", type=int, default=300)
+    mock.add_argument("--dev", action="store_true", help="Flask dev server instead of gunicorn")
+    args = parser.parse_args()
+
+    if args.command == "serve-mock":
+        serve_mock(args.port, args.llm_latency_ms, args.smtp_latency_ms, args.dev)
+    elif args.command == "replay":
+        entries = load_traffic(args.logs)
+        print(f"🎬 Replaying {len(entries)} request(s) against {args.target} at {args.speed}x")
+        report = {"label": args.label, "target": args.target, "speed": args.speed,
+                  "replayed_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                  "summary": replay(entries, args.target, args.speed, args.concurrency)}
+        print("="*70)
+        for group, stats in report["summary"].items():
+            print(f"   • {group:<26} n={stats['requests']:<6} p50={stats['p50_ms']} p95={stats['p95_ms']} "
+                  f"p99={stats['p99_ms']} ms  errors={stats['errors']}  status changed={stats['status_changed']}")
+        print(f"   Throughput: {report['summary']['all']['throughput_rps']} req/s")
+        print("="*70)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    else:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.candidate, encoding="utf-8") as f:
+            candidate = json.load(f)
+        rows = compare(base, candidate, threshold=args.threshold / 100.0)
+        print("="*70)
+        print(f"📊 {base.get('label') or args.base}  ->  {candidate.get('label') or args.candidate}")
+        if base.get("speed") != candidate.get("speed"):
+            print(f"   ⚠️ Replayed at different speeds ({base.get('speed')}x vs {candidate.get('speed')}x); throughput is not comparable")
+        for group, metric, old, new, change, regressed in rows:
+            flag = "  ❌ REGRESSION" if regressed else ""
+            print(f"   {group:<26} {metric:<15} {old:>10} -> {new:<10} {change:+7.1f}%{flag}")
+        print("="*70)
+        sys.exit(1 if any(row[-1] for row in rows) else 0)
@@ -0,0 +1,321 @@
+"""
+🗃️ Damsole Technologies - Conversation Transcript Archive
+Keeps chat transcripts for later analysis (which questions drive LLM cost)
+without touching the /chat hot path. Off unless TRANSCRIPT_ARCHIVE is set
+to file or db.
+
+A finished conversation (lead collected, widget restarted) or one idle for
+TRANSCRIPT_IDLE_AFTER seconds is handed to `archive()`, which only appends
+to an in-memory buffer. A background thread flushes the buffer every
+TRANSCRIPT_FLUSH_INTERVAL seconds (sooner once TRANSCRIPT_BATCH_SIZE are
+waiting), either:
+  • file: one compressed NDJSON frame appended to the worker's current
+    segment in TRANSCRIPT_DIR (zstd if `zstandard` is installed, else gzip);
+    segments rotate at TRANSCRIPT_SEGMENT_MAX_MB or at midnight
+  • db:   one bulk INSERT into the `transcripts` table (falls back to a
+    segment file if the database is unavailable)
+
+The buffer is bounded (TRANSCRIPT_MAX_BUFFER); if the writer can't keep up
+the oldest transcripts are dropped and counted. Transcripts contain whatever
+visitors typed; treat the directory like the leads table. Only support turns
+are archived: lead-collection answers never enter `conversation_history`
+(it is sent to the LLM as context), so they are in the leads table only.
+
+Config (.env):
+    TRANSCRIPT_ARCHIVE=off           # off, file or db
+    TRANSCRIPT_DIR=transcripts
+    TRANSCRIPT_COMPRESSION=zstd      # zstd or gzip
+    TRANSCRIPT_FLUSH_INTERVAL=30
+    TRANSCRIPT_BATCH_SIZE=200
+    TRANSCRIPT_MAX_BUFFER=5000
+    TRANSCRIPT_SEGMENT_MAX_MB=16
+    TRANSCRIPT_IDLE_AFTER=1800
+
+Read the archive offline:
+    python transcript_archive.py scan [--since 2024-01-01] [--top 20]
+"""
+
+import datetime
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from collections import deque
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from structured_logging import get_logger
+
+logger = get_logger("transcripts")
+
+def _env_int(key, default):
+    try:
+        return int(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+TRANSCRIPT_ARCHIVE = os.getenv("TRANSCRIPT_ARCHIVE", "off").lower()
+TRANSCRIPT_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.getenv("TRANSCRIPT_DIR", "transcripts")
+)
+TRANSCRIPT_COMPRESSION = os.getenv("TRANSCRIPT_COMPRESSION", "zstd").lower()
+if TRANSCRIPT_COMPRESSION == "zstd" and zstandard is None:
+    TRANSCRIPT_COMPRESSION = "gzip"
+TRANSCRIPT_FLUSH_INTERVAL = max(1, _env_int("TRANSCRIPT_FLUSH_INTERVAL", 30))
+TRANSCRIPT_BATCH_SIZE = max(1, _env_int("TRANSCRIPT_BATCH_SIZE", 200))
+TRANSCRIPT_MAX_BUFFER = max(1, _env_int("TRANSCRIPT_MAX_BUFFER", 5000))
+TRANSCRIPT_SEGMENT_MAX_BYTES = max(1, _env_int("TRANSCRIPT_SEGMENT_MAX_MB", 16)) * 1024 * 1024
+TRANSCRIPT_IDLE_AFTER = max(60, _env_int("TRANSCRIPT_IDLE_AFTER", 1800))
+
+SEGMENT_EXTENSIONS = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz"}
+
+
+# --- Segment Codecs ---
+def _compress(data, compression):
+    """One self-contained frame/member; appended frames decode as one stream"""
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+def _iter_segment_lines(path, chunk_size=64 * 1024):
+    """
+    Complete lines from every frame in a segment, decoded frame by frame so
+    everything before a torn final frame is still returned before EOFError.
+    """
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} needs the zstandard package (pip install zstandard)")
+        new_decoder = lambda: zstandard.ZstdDecompressor().decompressobj()
+    else:
+        new_decoder = lambda: zlib.decompressobj(wbits=31)  # gzip member
+
+    decoder, in_frame, pending = new_decoder(), False, b""
+    with open(path, "rb") as raw:
+        for data in iter(lambda: raw.read(chunk_size), b""):
+            while data:
+                in_frame = True
+                pending += decoder.decompress(data)
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    yield line.decode("utf-8")
+                if not decoder.eof:
+                    break
+                data, decoder, in_frame = decoder.unused_data, new_decoder(), False
+    if in_frame:
+        raise EOFError("segment ends in the middle of a frame")
+
+
+class TranscriptArchiver:
+    """Buffers finished conversations in memory and writes them out in compressed batches"""
+
+    def __init__(self, mode=TRANSCRIPT_ARCHIVE, directory=TRANSCRIPT_DIR, compression=TRANSCRIPT_COMPRESSION,
+                 db_writer=None, idle_sweep=None, interval=TRANSCRIPT_FLUSH_INTERVAL,
+                 batch_size=TRANSCRIPT_BATCH_SIZE, max_buffer=TRANSCRIPT_MAX_BUFFER,
+                 segment_max_bytes=TRANSCRIPT_SEGMENT_MAX_BYTES):
+        self.mode = mode
+        self.enabled = mode in ("file", "db")
+        self.directory = directory
+        self.compression = compression
+        self.db_writer = db_writer      # db_writer(records) -> bool
+        self.idle_sweep = idle_sweep    # called each round to archive idle conversations
+        self.interval = interval
+        self.batch_size = batch_size
+        self.segment_max_bytes = segment_max_bytes
+        self._buffer = deque(maxlen=max_buffer)
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._started_pid = None
+        self._segment = None            # (path, day) of this worker's open segment
+        self.stats = {"archived": 0, "written": 0, "dropped": 0, "flushes": 0,
+                      "segments": 0, "last_flush_ms": None, "last_batch": 0}
+
+    def snapshot(self):
+        with self._cond:
+            return {"mode": self.mode, "buffered": len(self._buffer), **self.stats}
+
+    # --- Hot Path ---
+    def archive(self, session_id, messages, reason):
+        """Queue a transcript; never blocks on I/O"""
+        if not self.enabled or not messages:
+            return False
+        record = {
+            "session_id": session_id,
+            "reason": reason,
+            "archived_at": datetime.datetime.now().isoformat(sep=" ", timespec="seconds"),
+            "turns": sum(1 for message in messages if message.get("role") == "user"),
+            "messages": list(messages),
+        }
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.stats["dropped"] += 1
+            self._buffer.append(record)
+            self.stats["archived"] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        self.start()
+        return True
+
+    # --- Background Writer ---
+    def start(self):
+        """Start the flush thread (once per process, so forked workers get their own)"""
+        pid = os.getpid()
+        if not self.enabled or self._started_pid == pid:
+            return
+        with self._cond:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+            self._segment = None
+        threading.Thread(target=self._run, name="transcript-archive", daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._buffer) >= self.batch_size, timeout=self.interval)
+            try:
+                if self.idle_sweep is not None:
+                    self.idle_sweep()
+                self.flush()
+            except Exception:
+                logger.exception("Transcript flush failed")
+
+    def flush(self):
+        """Write everything buffered now; returns how many transcripts were written"""
+        with self._write_lock:
+            with self._cond:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+            start = time.perf_counter()
+            written = False
+            if self.mode == "db" and self.db_writer is not None:
+                try:
+                    written = self.db_writer(batch)
+                except Exception as e:
+                    logger.warning("Transcript DB insert failed: %s", e)
+                if not written:
+                    logger.warning("Writing %s transcript(s) to %s instead of the database", len(batch), self.directory)
+            if not written:
+                self._append_segment(batch)
+
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            with self._cond:
+                self.stats["written"] += len(batch)
+                self.stats["flushes"] += 1
+                self.stats["last_flush_ms"] = round(elapsed_ms, 2)
+                self.stats["last_batch"] = len(batch)
+            logger.debug("Archived %s transcript(s) in %.1f ms", len(batch), elapsed_ms)
+            return len(batch)
+
+    def _append_segment(self, batch):
+        data = "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+                       for record in batch).encode("utf-8")
+        path = self._current_segment()
+        with open(path, "ab") as f:
+            f.write(_compress(data, self.compression))
+
+    def _current_segment(self):
+        """This worker's segment; a new one after midnight or once it reaches the size limit"""
+        today = datetime.date.today()
+        if self._segment is not None:
+            path, day = self._segment
+            try:
+                if day == today and os.path.getsize(path) < self.segment_max_bytes:
+                    return path
+            except OSError:
+                pass
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.stats["segments"] += 1
+        name = f"transcripts-{stamp}-{os.getpid()}-{self.stats['segments']:03d}{SEGMENT_EXTENSIONS[self.compression]}"
+        path = os.path.join(self.directory, name)
+        self._segment = (path, today)
+        return path
+
+
+# --- Offline Reader ---
+def list_segments(directory=TRANSCRIPT_DIR):
+    paths = []
+    for extension in SEGMENT_EXTENSIONS.values():
+        paths.extend(glob.glob(os.path.join(directory, f"transcripts-*{extension}")))
+    return sorted(paths)
+
+def iter_transcripts(directory=TRANSCRIPT_DIR, since=None):
+    """
+    Stream transcript records from every segment, oldest first.
+    `since` (ISO date/datetime) skips segments last written before it.
+    A torn frame at the end of a segment (crash mid-write) ends that segment.
+    """
+    cutoff = datetime.datetime.fromisoformat(since) if since else None
+    for path in list_segments(directory):
+        if cutoff and datetime.datetime.fromtimestamp(os.path.getmtime(path)) < cutoff:
+            continue
+        try:
+            for line in _iter_segment_lines(path):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if cutoff and record.get("archived_at", "") < cutoff.isoformat(sep=" "):
+                    continue
+                yield record
+        except (EOFError, OSError, zlib.error) as e:
+            logger.warning("Stopped reading %s early: %s", path, e)
+        except Exception as e:
+            if zstandard is not None and isinstance(e, zstandard.ZstdError):
+                logger.warning("Stopped reading %s early: %s", path, e)
+            else:
+                raise
+
+
+def create_transcript_archiver(**kwargs):
+    """A TranscriptArchiver that flushes what is buffered when the process exits"""
+    import atexit
+
+    archiver = TranscriptArchiver(**kwargs)
+    atexit.register(archiver.flush)
+    return archiver
+
+
+if __name__ == "__main__":
+    import argparse
+    import re
+    from collections import Counter
+
+    parser = argparse.ArgumentParser(description="Scan the archived chat transcripts")
+    parser.add_argument("command", choices=["scan"])
+    parser.add_argument("--dir", default=TRANSCRIPT_DIR)
+    parser.add_argument("--since", help="only transcripts archived on/after this ISO date")
+    parser.add_argument("--top", type=int, default=20, help="most frequent visitor messages to list")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    records = messages = 0
+    reasons, questions = Counter(), Counter()
+    for record in iter_transcripts(args.dir, args.since):
+        records += 1
+        reasons[record.get("reason")] += 1
+        for message in record.get("messages", []):
+            messages += 1
+            if message.get("role") == "user":
+                questions[re.sub(r"\s+", " ", str(message.get("content", "")).lower()).strip()] += 1
+    elapsed = time.perf_counter() - start
+    size_mb = sum(os.path.getsize(path) for path in list_segments(args.dir)) / (1024 * 1024)
+
+    print("="*70)
+    print(f"🗃️ {records} transcript(s), {messages} message(s) from {size_mb:.2f} MB "
+          f"in {elapsed:.2f}s ({records / max(elapsed, 1e-9):.0f} transcripts/s)")
+    print(f"   By reason: {dict(reasons)}")
+    print(f"   Top {args.top} visitor messages:")
+    for text, count in questions.most_common(args.top):
+        print(f"   {count:>6}  {text[:80]}")
+    print("="*70)
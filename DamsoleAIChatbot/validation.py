@@ -0,0 +1,283 @@
+"""
+✅ Damsole Technologies - Shared Validation Engine
+Precompiled patterns and declarative schemas used by both the chatbot
+lead collection flow and the website contact form.
+
+Run `python validation.py --bench` to benchmark against a large corpus.
+"""
+
+import re
+
+# --- Precompiled Patterns ---
+NAME_PATTERN = re.compile(r'^[a-zA-Z\s\.]+$')
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PHONE_STRIP_PATTERN = re.compile(r'[\s\-\(\)\+]')
+
+
+# --- Chatbot Field Validators ---
+def _text(value):
+    """Field value as text: bulk records may carry None or numbers (e.g. an int phone from a DB row)"""
+    return "" if value is None else str(value)
+
+def validate_name(name):
+    """Validate name: minimum 2 letters"""
+    name = _text(name)
+    if not name or len(name.strip()) < 2:
+        return False, "Please provide your full name (at least 2 letters)."
+    if not NAME_PATTERN.match(name.strip()):
+        return False, "Name should only contain letters, spaces, and dots."
+    return True, None
+
+def validate_email(email):
+    """Validate email format"""
+    email = _text(email)
+    if not email or not email.strip():
+        return False, "Please provide a valid email address."
+    if not EMAIL_PATTERN.match(email.strip()):
+        return False, "Please enter a valid email address (e.g., name@example.com)."
+    return True, None
+
+def validate_phone(phone):
+    """Validate phone: minimum 10 digits"""
+    phone = _text(phone)
+    if not phone or not phone.strip():
+        return False, "Please provide your phone number."
+    digits_only = PHONE_STRIP_PATTERN.sub('', phone)
+    if not digits_only.isdigit():
+        return False, "Phone number should only contain digits."
+    if len(digits_only) < 10:
+        return False, "Phone number must be at least 10 digits."
+    return True, None
+
+def validate_address(address):
+    """Validate address: minimum 5 characters"""
+    address = _text(address)
+    if not address or len(address.strip()) < 5:
+        return False, "Please provide a complete address (at least 5 characters)."
+    return True, None
+
+def validate_project(project):
+    """Validate project requirement: must be clear"""
+    project = _text(project)
+    if not project or len(project.strip()) < 3:
+        return False, "Please tell us what you want to build (e.g., website, app, logo, software)."
+    return True, None
+
+def validate_deadline(deadline):
+    """Validate deadline: any format allowed"""
+    deadline = _text(deadline)
+    if not deadline or len(deadline.strip()) < 2:
+        return False, "Please provide a deadline."
+    return True, None
+
+
+# --- Contact Form Rules ---
+def _required(field):
+    """Build a rule that rejects empty values for a contact form field"""
+    message = f"Please fill in the {field} field."
+    def check(value):
+        if not value:
+            return False, message
+        return True, None
+    return check
+
+def _at_least_one_service(services):
+    """Contact form must select at least one service"""
+    if not services or len(services) == 0:
+        return False, "Please select at least one service."
+    return True, None
+
+def _contact_email(email):
+    """Contact form email format check"""
+    if not isinstance(email, str) or not EMAIL_PATTERN.match(email):
+        return False, "Please enter a valid email address."
+    return True, None
+
+
+# --- Declarative Schemas ---
+# A schema is an ordered list of (field, rule) pairs. Rules return
+# (is_valid, error_msg). A field may have several rules; evaluation of a
+# field stops at its first failing rule.
+LEAD_SCHEMA = [
+    ("Full Name", validate_name),
+    ("Email", validate_email),
+    ("Phone Number", validate_phone),
+    ("Address", validate_address),
+    ("Project Requirement", validate_project),
+    ("Deadline", validate_deadline),
+]
+
+CONTACT_SCHEMA = [
+    ("firstName", _required("firstName")),
+    ("lastName", _required("lastName")),
+    ("email", _required("email")),
+    ("phone", _required("phone")),
+    ("message", _required("message")),
+    ("services", _at_least_one_service),
+    ("email", _contact_email),
+]
+
+# Field -> first rule lookup for single-field validation (chat flow)
+LEAD_VALIDATORS = dict(LEAD_SCHEMA)
+
+
+def validate_field(field, value, validators=LEAD_VALIDATORS):
+    """Validate a single field value; unknown fields are accepted"""
+    validator = validators.get(field)
+    if validator is None:
+        return True, None
+    return validator(value)
+
+def validate_record(record, schema=LEAD_SCHEMA):
+    """
+    Validate a whole record against a schema.
+    Returns (is_valid, errors) where errors is an ordered {field: message}.
+    """
+    errors = {}
+    get = record.get
+    for field, rule in schema:
+        if field in errors:
+            continue
+        is_valid, error_msg = rule(get(field))
+        if not is_valid:
+            errors[field] = error_msg
+    return not errors, errors
+
+def validate_records(records, schema=LEAD_SCHEMA):
+    """Validate a list of records (bulk imports) in one call"""
+    return [validate_record(record, schema) for record in records]
+
+def first_error(errors):
+    """Return the first error message of a validate_record() result"""
+    return next(iter(errors.values()), None)
+
+
+# --- Benchmark ---
+# The chat flow's validators as they were before this module existed
+# (app.py, 81e4c5c), kept verbatim so the benchmark compares like for like.
+def _baseline_validate_name(name):
+    if not name or len(name.strip()) < 2:
+        return False, "Please provide your full name (at least 2 letters)."
+    if not re.match(r'^[a-zA-Z\s\.]+$', name.strip()):
+        return False, "Name should only contain letters, spaces, and dots."
+    return True, None
+
+def _baseline_validate_email(email):
+    if not email or not email.strip():
+        return False, "Please provide a valid email address."
+    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    if not re.match(email_pattern, email.strip()):
+        return False, "Please enter a valid email address (e.g., name@example.com)."
+    return True, None
+
+def _baseline_validate_phone(phone):
+    if not phone or not phone.strip():
+        return False, "Please provide your phone number."
+    digits_only = re.sub(r'[\s\-\(\)\+]', '', phone)
+    if not digits_only.isdigit():
+        return False, "Phone number should only contain digits."
+    if len(digits_only) < 10:
+        return False, "Phone number must be at least 10 digits."
+    return True, None
+
+def _baseline_validate_address(address):
+    if not address or len(address.strip()) < 5:
+        return False, "Please provide a complete address (at least 5 characters)."
+    return True, None
+
+def _baseline_validate_project(project):
+    if not project or len(project.strip()) < 3:
+        return False, "Please tell us what you want to build (e.g., website, app, logo, software)."
+    return True, None
+
+def _baseline_validate_deadline(deadline):
+    if not deadline or len(deadline.strip()) < 2:
+        return False, "Please provide a deadline."
+    return True, None
+
+_BASELINE_VALIDATORS = [
+    ("Full Name", _baseline_validate_name),
+    ("Email", _baseline_validate_email),
+    ("Phone Number", _baseline_validate_phone),
+    ("Address", _baseline_validate_address),
+    ("Project Requirement", _baseline_validate_project),
+    ("Deadline", _baseline_validate_deadline),
+]
+
+def _baseline_validate(record):
+    """Validate a record field by field with the baseline validators"""
+    errors = {}
+    for field, validator in _BASELINE_VALIDATORS:
+        is_valid, error_msg = validator(record.get(field))
+        if not is_valid:
+            errors[field] = error_msg
+    return not errors, errors
+
+# Per-field samples: typical input, unicode, padding, empty/None and
+# boundary lengths, so every branch of every validator gets exercised.
+_SAMPLES = {
+    "Full Name": [
+        "Rahul Sharma", "Dr. A. P. J. Kalam", "  Priya  ", "Li", "R", "",
+        None, "   ", "José Müller", "राहुल शर्मा", "O'Brien", "R2-D2",
+        "Anna-Lena Vogel", "A" * 120, "Mary Ann\tSmith",
+    ],
+    "Email": [
+        "rahul.sharma@example.com", "first.last+tag@mail.example.co.in",
+        "  padded@example.com  ", "a@b.co", "rahul@example", "no-at-sign.com",
+        "x@y.c", "ünï@example.com", "name@exämple.com", "two@@example.com",
+        "", None, "   ", "user@sub_domain.example.org",
+    ],
+    "Phone Number": [
+        "+91 (935) 691-7424", "9876543210", "098765 43210", "(022) 2345-6789",
+        "+1 415 555 0100", "98765", "12345abc", "+91 98765 43210 ext 12",
+        "٩٨٧٦٥٤٣٢١٠", "９８７６５４３２１０", "", None, "   ", "+-() ",
+        "123.456.7890",
+    ],
+    "Address": [
+        "Madhuban Complex, Manchar 410503", "Pune", "  Pune  ", "Delhi",
+        "मुंबई, महाराष्ट्र", "", None, "    ", "Flat 4B, " * 20,
+    ],
+    "Project Requirement": [
+        "E-commerce website", "App", "ab", "  ab  ", "लोगो डिज़ाइन", "",
+        None, "CRM + billing software for 40 stores",
+    ],
+    "Deadline": ["2 weeks", "ASAP", "1", " 1 ", "", None, "कल", "15/08"],
+}
+
+def _build_corpus(size, seed=42):
+    """Build a seeded corpus of lead records mixing samples field by field"""
+    import random
+    rng = random.Random(seed)
+    fields = list(_SAMPLES.items())
+    return [{field: rng.choice(samples) for field, samples in fields} for _ in range(size)]
+
+def run_benchmark(size=100000):
+    """Compare bulk schema validation against the baseline per-call validators"""
+    import time
+
+    corpus = _build_corpus(size)
+
+    start = time.perf_counter()
+    baseline_results = [_baseline_validate(record) for record in corpus]
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = validate_records(corpus)
+    bulk = time.perf_counter() - start
+
+    mismatches = sum(1 for old, new in zip(baseline_results, results) if old != new)
+    valid_count = sum(1 for is_valid, _ in results if is_valid)
+    print("="*70)
+    print(f"📊 Validation benchmark ({size} records, {valid_count} valid)")
+    print(f"   • Baseline validators:     {baseline * 1e6 / size:.2f} µs/record")
+    print(f"   • Schema validate_records: {bulk * 1e6 / size:.2f} µs/record")
+    print(f"   • Verdicts differing from baseline: {mismatches}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    import sys
+    if "--bench" in sys.argv:
+        run_benchmark()
+    else:
+        print("Usage: python validation.py --bench")
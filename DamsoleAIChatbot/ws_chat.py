@@ -0,0 +1,260 @@
+"""
+🔌 Damsole Technologies - WebSocket Chat Transport
+One persistent connection per open widget at /chat/ws, next to POST /chat.
+Chat turns travel as JSON frames carrying the same reply protocol as /chat,
+and the server can push messages of its own (e.g. follow-up prompts).
+
+Frames, client -> server:
+    {"type": "message", "id": "<client id>", "message": "..."}
+    {"type": "ping"} / {"type": "pong"}
+Frames, server -> client:
+    {"type": "reply", "id": "<client id>", "status": 200, "reply": "...", "showSuggestions": ...}
+    {"type": "push", "reply": "..."}          # server-initiated
+    {"type": "ping"} / {"type": "pong"}
+    {"type": "error", "message": "..."}
+
+The server pings after WS_HEARTBEAT_INTERVAL seconds of silence, drops a
+peer that stays silent for two intervals, and closes connections with no
+chat message for WS_IDLE_TIMEOUT seconds (the widget reconnects on its next
+message). A visitor who goes quiet halfway through lead collection gets one
+"still there?" push after WS_FOLLOW_UP_AFTER seconds. Each open socket holds one worker thread, so at most
+WS_MAX_CONNECTIONS are accepted per process; the widget falls back to
+POST /chat when a connection is refused.
+
+Requires flask-sock (pip install flask-sock); without it only POST /chat is served.
+
+Config (.env):
+    WS_MAX_CONNECTIONS=50
+    WS_HEARTBEAT_INTERVAL=25
+    WS_IDLE_TIMEOUT=300
+    WS_FOLLOW_UP_AFTER=90            # 0 disables follow-up pushes
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+from structured_logging import get_logger, bind_log_context
+
+logger = get_logger("ws_chat")
+
+def _env_float(key, default):
+    try:
+        return float(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+WS_MAX_CONNECTIONS = max(0, int(_env_float("WS_MAX_CONNECTIONS", 50)))
+WS_HEARTBEAT_INTERVAL = max(1.0, _env_float("WS_HEARTBEAT_INTERVAL", 25))
+WS_IDLE_TIMEOUT = max(WS_HEARTBEAT_INTERVAL, _env_float("WS_IDLE_TIMEOUT", 300))
+WS_FOLLOW_UP_AFTER = max(0.0, _env_float("WS_FOLLOW_UP_AFTER", 90))
+WS_MAX_MESSAGE_BYTES = 16 * 1024
+LATENCY_WINDOW = 500
+
+CLOSE_IDLE = 4000          # application close codes (4000-4999)
+CLOSE_TOO_MANY = 4001
+CLOSE_UNRESPONSIVE = 4002
+
+
+class _Connection:
+    def __init__(self, conn_id, ws, session_id):
+        self.id = conn_id
+        self.ws = ws
+        self.session_id = session_id
+        self.send_lock = threading.Lock()
+        now = time.monotonic()
+        self.last_received = now    # any frame (liveness)
+        self.last_message = now     # chat message (activity)
+        self.last_sent = now
+        self.idle_prompted = False
+
+    def send(self, frame):
+        data = json.dumps(frame, ensure_ascii=False)
+        with self.send_lock:
+            self.ws.send(data)
+            self.last_sent = time.monotonic()
+
+
+class ChatSocketHub:
+    """Tracks open chat sockets, pushes server-initiated messages and keeps stats"""
+
+    def __init__(self, max_connections=WS_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self._connections = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {"opened": 0, "rejected": 0, "closed_idle": 0, "closed_unresponsive": 0,
+                      "messages": 0, "pushes": 0, "peak_connections": 0}
+
+    def connection_count(self):
+        with self._lock:
+            return len(self._connections)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            info = {"connections": len(self._connections), **self.stats}
+        if latencies:
+            info["message_p50_ms"] = round(latencies[len(latencies) // 2], 2)
+            info["message_p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2)
+        return info
+
+    def _register(self, ws, session_id):
+        with self._lock:
+            if len(self._connections) >= self.max_connections:
+                self.stats["rejected"] += 1
+                return None
+            conn = _Connection(next(self._ids), ws, session_id)
+            self._connections[conn.id] = conn
+            self.stats["opened"] += 1
+            self.stats["peak_connections"] = max(self.stats["peak_connections"], len(self._connections))
+            return conn
+
+    def _unregister(self, conn):
+        with self._lock:
+            self._connections.pop(conn.id, None)
+
+    def push(self, session_id, payload):
+        """Send a server-initiated message to every open socket of a session; returns how many got it"""
+        with self._lock:
+            targets = [conn for conn in self._connections.values() if conn.session_id == session_id]
+        delivered = 0
+        for conn in targets:
+            try:
+                conn.send({"type": "push", **payload})
+                delivered += 1
+            except Exception as e:
+                logger.debug("Push to connection %s failed: %s", conn.id, e)
+        self._count("pushes", delivered)
+        return delivered
+
+    # --- Connection Loop ---
+    def serve(self, ws, session_id, handle_message, on_idle=None, after_message=None):
+        """
+        Run one connection until it closes.
+        handle_message(text, message_id) -> (payload dict, status); on_idle(session_id) may
+        return a payload to push once the visitor has been quiet for
+        WS_FOLLOW_UP_AFTER seconds; after_message() runs after each handled message.
+        """
+        conn = self._register(ws, session_id)
+        if conn is None:
+            logger.warning("WebSocket refused: %s connections open", self.max_connections)
+            ws.close(reason=CLOSE_TOO_MANY, message="Too many connections")
+            return
+        logger.debug("WebSocket %s opened", conn.id)
+        follow_up = on_idle is not None and WS_FOLLOW_UP_AFTER > 0
+        try:
+            while True:
+                now = time.monotonic()
+                if now - conn.last_message >= WS_IDLE_TIMEOUT:
+                    self._count("closed_idle")
+                    ws.close(reason=CLOSE_IDLE, message="Idle timeout")
+                    return
+                if now - conn.last_received >= 2 * WS_HEARTBEAT_INTERVAL:
+                    self._count("closed_unresponsive")
+                    ws.close(reason=CLOSE_UNRESPONSIVE, message="No heartbeat")
+                    return
+
+                if follow_up and not conn.idle_prompted and now - conn.last_message >= WS_FOLLOW_UP_AFTER:
+                    conn.idle_prompted = True
+                    payload = on_idle(session_id)
+                    if payload:
+                        conn.send({"type": "push", **payload})
+                        self._count("pushes")
+
+                if now - max(conn.last_sent, conn.last_received) >= WS_HEARTBEAT_INTERVAL:
+                    conn.send({"type": "ping"})
+
+                # Sleep until the next deadline: heartbeat, follow-up or idle close
+                deadlines = [
+                    max(conn.last_sent, conn.last_received) + WS_HEARTBEAT_INTERVAL,
+                    conn.last_message + WS_IDLE_TIMEOUT,
+                ]
+                if follow_up and not conn.idle_prompted:
+                    deadlines.append(conn.last_message + WS_FOLLOW_UP_AFTER)
+                data = ws.receive(timeout=max(0.05, min(deadlines) - time.monotonic()))
+                if data is None:
+                    continue
+
+                conn.last_received = time.monotonic()
+                self._handle_frame(conn, data, handle_message, after_message)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._unregister(conn)
+            logger.debug("WebSocket %s closed", conn.id)
+
+    def _count(self, stat, n=1):
+        with self._lock:
+            self.stats[stat] += n
+
+    def _handle_frame(self, conn, data, handle_message, after_message):
+        if isinstance(data, bytes) or len(data.encode("utf-8")) > WS_MAX_MESSAGE_BYTES:
+            conn.send({"type": "error", "message": "Unsupported frame."})
+            return
+        try:
+            frame = json.loads(data)
+        except ValueError:
+            conn.send({"type": "error", "message": "Frames must be JSON."})
+            return
+        if not isinstance(frame, dict):
+            conn.send({"type": "error", "message": "Frames must be JSON objects."})
+            return
+
+        kind = frame.get("type")
+        if kind == "ping":
+            conn.send({"type": "pong"})
+            return
+        if kind == "pong":
+            return
+        if kind != "message":
+            conn.send({"type": "error", "message": f"Unknown frame type: {kind}"})
+            return
+
+        start = time.perf_counter()
+        conn.last_message = time.monotonic()
+        conn.idle_prompted = False
+        bind_log_context(ws_message_id=str(frame.get("id", ""))[:64])
+        message = frame.get("message")
+        message_id = frame.get("id")
+        payload, status = handle_message(message.strip() if isinstance(message, str) else "",
+                                         message_id if isinstance(message_id, str) else None)
+        if after_message is not None:
+            after_message()
+        conn.send({"type": "reply", "id": message_id, "status": status, **payload})
+
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            self.stats["messages"] += 1
+            self._latencies.append(elapsed_ms)
+
+
+def init_websocket_chat(app, hub, handle_message, session_id_fn, on_idle=None, after_message=None, path="/chat/ws"):
+    """Register the WebSocket route; returns False when flask-sock is not installed"""
+    if not WEBSOCKETS_AVAILABLE:
+        logger.info("flask-sock not installed; WebSocket chat disabled (POST /chat still works)")
+        return False
+
+    sock = Sock(app)
+    # Server-side pings are in-protocol frames; no library-level ping needed
+    app.config.setdefault("SOCK_SERVER_OPTIONS", {"ping_interval": None, "max_message_size": WS_MAX_MESSAGE_BYTES})
+
+    @sock.route(path)
+    def chat_socket(ws):
+        session_id = session_id_fn()
+        bind_log_context(session_id=session_id, transport="websocket")
+        hub.serve(ws, session_id, handle_message, on_idle=on_idle, after_message=after_message)
+
+    return True
@@ -10,6 +10,8 @@
   window.DamsoleChatbotConfig = {
     endpoint: existingConfig.endpoint || DEFAULT_ENDPOINT,
     credentials: existingConfig.credentials || 'same-origin',
+    // Persistent chat connection (defaults to <endpoint>/ws); false disables it
+    websocketEndpoint: existingConfig.websocketEndpoint ?? null,
     autoStartPayload: '__damsole_auto_start__'
   };
 
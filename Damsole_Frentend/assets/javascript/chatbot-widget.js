@@ -8,7 +8,11 @@
     endpoint: '/chat',
     autoStartPayload: '__damsole_auto_start__',
     initialMessage: 'Hello! How can I help you today?',
-    credentials: 'same-origin'
+    credentials: 'same-origin',
+    // WebSocket URL for persistent connections; derived from `endpoint` when
+    // unset (/chat -> ws(s)://<host>/chat/ws). Set to false to always use fetch.
+    websocketEndpoint: null,
+    replyTimeout: 60000
   };
 
   const mergeConfig = () => {
@@ -16,6 +20,120 @@
     return { ...defaultConfig, ...userConfig };
   };
 
+  // Unique per message; lets the server replay the reply if the request is retried
+  const createIdempotencyKey = () => {
+    if (window.crypto && typeof window.crypto.randomUUID === 'function') {
+      return window.crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+  };
+
+  const resolveWebSocketUrl = (config) => {
+    if (config.websocketEndpoint === false || typeof window.WebSocket !== 'function') return null;
+    try {
+      const url = new URL(config.websocketEndpoint || `${config.endpoint.replace(/\/+$/, '')}/ws`, window.location.href);
+      url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+      return url.toString();
+    } catch (error) {
+      return null;
+    }
+  };
+
+  // Socket close codes from the server (ws_chat.py)
+  const CLOSE_TOO_MANY = 4001;
+  const SOCKET_RETRY_DELAY = 60000;
+
+  // One persistent connection per widget: replies are matched to messages by id,
+  // and the server may push messages of its own (e.g. follow-up prompts)
+  class ChatSocket {
+    constructor(url, { onPush, replyTimeout }) {
+      this.url = url;
+      this.onPush = onPush;
+      this.replyTimeout = replyTimeout;
+      this.ws = null;
+      this.opening = null;
+      this.pending = new Map();
+      this.disabledUntil = 0;
+    }
+
+    isAvailable() {
+      return Boolean(this.url) && Date.now() >= this.disabledUntil;
+    }
+
+    connect() {
+      if (this.ws && this.ws.readyState === WebSocket.OPEN) return Promise.resolve();
+      if (this.opening) return this.opening;
+
+      this.opening = new Promise((resolve, reject) => {
+        const ws = new WebSocket(this.url);
+        let opened = false;
+
+        ws.addEventListener('open', () => {
+          opened = true;
+          this.ws = ws;
+          this.opening = null;
+          resolve();
+        });
+        ws.addEventListener('message', (event) => this.handleFrame(event.data));
+        ws.addEventListener('close', (event) => {
+          if (this.ws === ws) this.ws = null;
+          this.opening = null;
+          if (!opened || event.code === CLOSE_TOO_MANY) {
+            // Unreachable or full: use fetch for a while
+            this.disabledUntil = Date.now() + SOCKET_RETRY_DELAY;
+          }
+          this.failPending(new Error(`Chat socket closed (${event.code})`));
+          if (!opened) reject(new Error('Chat socket unavailable'));
+        });
+      });
+      return this.opening;
+    }
+
+    async send(message, id) {
+      await this.connect();
+      return new Promise((resolve, reject) => {
+        const timer = setTimeout(() => {
+          this.pending.delete(id);
+          const error = new Error('Chat socket reply timed out');
+          error.timedOut = true;
+          reject(error);
+        }, this.replyTimeout);
+        this.pending.set(id, { resolve, reject, timer });
+        this.ws.send(JSON.stringify({ type: 'message', id, message }));
+      });
+    }
+
+    handleFrame(raw) {
+      let frame;
+      try {
+        frame = JSON.parse(raw);
+      } catch (error) {
+        return;
+      }
+      if (frame.type === 'ping') {
+        if (this.ws) this.ws.send(JSON.stringify({ type: 'pong' }));
+      } else if (frame.type === 'reply') {
+        const entry = this.pending.get(frame.id);
+        if (!entry) return;
+        this.pending.delete(frame.id);
+        clearTimeout(entry.timer);
+        entry.resolve(frame);
+      } else if (frame.type === 'push') {
+        this.onPush(frame);
+      } else if (frame.type === 'error') {
+        console.warn('⚠️ Chat socket error:', frame.message);
+      }
+    }
+
+    failPending(error) {
+      this.pending.forEach((entry) => {
+        clearTimeout(entry.timer);
+        entry.reject(error);
+      });
+      this.pending.clear();
+    }
+  }
+
   const ready = (fn) => {
     if (document.readyState === 'loading') {
       document.addEventListener('DOMContentLoaded', fn, { once: true });
@@ -29,7 +147,19 @@
       this.config = config;
       this.isSending = false;
       this.hasAutoStarted = false;
+      // Suggestion chips; the server sends its current list with greeting replies
+      this.suggestions = [
+        'I want to create website',
+        'I want to create logo',
+        'I want to create app',
+        'I want marketing services',
+        'Our services'
+      ];
       this.elements = {};
+      const socketUrl = resolveWebSocketUrl(config);
+      this.socket = socketUrl
+        ? new ChatSocket(socketUrl, { onPush: (data) => this.showReply(data), replyTimeout: config.replyTimeout })
+        : null;
     }
 
     mount() {
@@ -207,15 +337,7 @@
       const suggestionsContainer = document.createElement('div');
       suggestionsContainer.className = 'chatbot-suggestions';
       
-      const suggestions = [
-        'I want to create website',
-        'I want to create logo',
-        'I want to create app',
-        'I want marketing services',
-        'Our services'
-      ];
-
-      suggestions.forEach(suggestion => {
+      this.suggestions.forEach(suggestion => {
         const btn = document.createElement('button');
         btn.type = 'button';
         btn.className = 'chatbot-suggestion-btn';
@@ -250,6 +372,73 @@
       this.elements.sendBtn.disabled = state;
     }
 
+    showReply(data) {
+      const reply = data.reply || data.response || data.message;
+      // If reply is empty (like for auto-start), don't add message
+      // Widget already shows initial greeting
+      if (reply && reply.trim()) {
+        if (Array.isArray(data.suggestions) && data.suggestions.length) {
+          this.suggestions = data.suggestions;
+        }
+        // Check if we should show suggestions for this reply
+        const showSuggestions = this.shouldShowSuggestions(reply, data);
+        this.addMessage(reply, 'bot', showSuggestions);
+      }
+    }
+
+    // Send over the WebSocket when it is available, otherwise POST to the endpoint.
+    // The same id is reused on retry, over either transport: the server keys both by
+    // this id and the message text, so a turn that already ran is replayed, not re-run.
+    async exchange(message) {
+      const id = createIdempotencyKey();
+      let data = null;
+      if (this.socket && this.socket.isAvailable()) {
+        for (let attempt = 0; attempt < 2 && !data && this.socket.isAvailable(); attempt += 1) {
+          try {
+            data = await this.socket.send(message, id);
+          } catch (error) {
+            // Still being processed server-side: resending over fetch could run it twice
+            if (error.timedOut) throw error;
+            console.warn('⚠️ Chat socket failed, retrying:', error.message);
+          }
+        }
+      }
+      if (!data) {
+        return this.postMessage(message, id);
+      }
+      if (data.status >= 400) {
+        throw new Error(`Chatbot request failed with status ${data.status}: ${data.reply || ''}`);
+      }
+      return data;
+    }
+
+    async postMessage(message, idempotencyKey) {
+      const endpoint = this.config.endpoint;
+      console.log('📤 Sending message to:', endpoint, 'Message:', message);
+
+      const response = await fetch(endpoint, {
+        method: 'POST',
+        headers: { 
+          'Content-Type': 'application/json',
+          'Accept': 'application/json',
+          'Idempotency-Key': idempotencyKey
+        },
+        body: JSON.stringify({ message }),
+        credentials: this.config.credentials,
+        mode: 'cors'
+      });
+
+      console.log('📥 Response status:', response.status, response.statusText);
+
+      if (!response.ok) {
+        const errorText = await response.text();
+        console.error('❌ Server error:', errorText);
+        throw new Error(`Chatbot request failed with status ${response.status}: ${errorText}`);
+      }
+
+      return response.json();
+    }
+
     async requestReply(message, options = {}) {
       const { skipUserMessage = false, silentFailure = false } = options;
 
@@ -261,39 +450,9 @@
       this.setTypingVisible(true);
 
       try {
-        const endpoint = this.config.endpoint;
-        console.log('📤 Sending message to:', endpoint, 'Message:', message);
-
-        const response = await fetch(endpoint, {
-          method: 'POST',
-          headers: { 
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-          },
-          body: JSON.stringify({ message }),
-          credentials: this.config.credentials,
-          mode: 'cors'
-        });
-
-        console.log('📥 Response status:', response.status, response.statusText);
-
-        if (!response.ok) {
-          const errorText = await response.text();
-          console.error('❌ Server error:', errorText);
-          throw new Error(`Chatbot request failed with status ${response.status}: ${errorText}`);
-        }
-
-        const data = await response.json();
+        const data = await this.exchange(message);
         console.log('✅ Response data:', data);
-        
-        const reply = data.reply || data.response || data.message;
-        // If reply is empty (like for auto-start), don't add message
-        // Widget already shows initial greeting
-        if (reply && reply.trim()) {
-          // Check if we should show suggestions for this reply
-          const showSuggestions = this.shouldShowSuggestions(reply, data);
-          this.addMessage(reply, 'bot', showSuggestions);
-        }
+        this.showReply(data);
       } catch (error) {
         console.error('❌ Damsole chatbot error:', error);
         console.error('Error details:', {
@@ -40,6 +40,13 @@ class WebsiteManager {
   }
 
   detectUserLanguage() {
+    // Pages served by main.py arrive already rendered in the visitor's language
+    const renderedLang = document.documentElement.getAttribute('data-lang');
+    if (renderedLang) {
+      this.currentLang = renderedLang;
+      return;
+    }
+
     let savedLang = null;
 
     try {
@@ -129,6 +136,13 @@ class WebsiteManager {
         console.warn('localStorage unavailable', e);
       }
 
+      if (document.documentElement.hasAttribute('data-lang')) {
+        // Ask the server for the page pre-rendered in the new language
+        document.cookie = `websiteLanguage=${encodeURIComponent(this.currentLang)}; path=/; max-age=31536000; SameSite=Lax`;
+        window.location.reload();
+        return;
+      }
+
       this.applyTranslations();
     });
   }
@@ -2,13 +2,16 @@
 🚀 Damsole Technologies - Unified Server
 This file runs both the Frontend Website and Chatbot Backend together.
 Just run: python main.py
+Production (gunicorn, warmed before it forks its worker): python main.py serve
 """
 
-from flask import Flask, send_from_directory, send_file, request, jsonify, render_template
+from flask import Flask, send_from_directory, send_file, request, jsonify, render_template, Response, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
+import hashlib
 import os
 import sys 
+import time
  
 # Add chatbot directory to path
 chatbot_path = os.path.join(os.path.dirname(__file__), 'DamsoleAIChatbot')
@@ -28,83 +31,390 @@ app = Flask(__name__,
 # Enable CORS for all routes
 CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 
+# Structured, non-blocking logging (queue + background writer thread)
+try:
+    from structured_logging import (
+        configure_logging, get_logger, bind_log_context, init_request_logging,
+        queue_depth, dropped_records
+    )
+except ImportError:
+    # DamsoleAIChatbot folder missing: plain stdlib logging
+    import logging
+
+    def configure_logging():
+        logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+
+    def get_logger(name):
+        return logging.getLogger(f"damsole.{name}")
+
+    def bind_log_context(**fields):
+        pass
+
+    def init_request_logging(app):
+        pass
+
+    def queue_depth():
+        return 0
+
+    def dropped_records():
+        return 0
+
+configure_logging()
+logger = get_logger("main")
+init_request_logging(app)
+
 # Import chatbot functions from app.py
 try:
     from app import (
         init_db, send_email, save_to_db, 
         user_sessions,
-        get_support_response, wants_to_create_project, is_greeting, get_next_question,
+        get_support_response, detect_intent, get_next_question, SUGGESTION_CHIPS, answer_cache,
+        llm_flight, search_flight, llm_lane,
         validate_name, validate_email, validate_phone, validate_address, validate_project, validate_deadline,
-        ADMIN_EMAIL, ADMIN_PASSWORD
+        validate_field,
+        ADMIN_EMAIL, ADMIN_PASSWORD, is_admin_request,
+        notifier, is_urgent,
+        transcript_archiver, archive_conversation,
+        check_database, check_smtp, check_llm,
+        warm_up as warm_up_chatbot
     )
+    from lead_export import stream_leads, ExportError, ExportUnavailableError, EXPORT_FORMATS
+    from lead_search import search_leads, init_search_index, warm_search_index, SearchError, SearchUnavailableError
+    # Persistent WebSocket chat channel next to POST /chat (needs flask-sock)
+    from ws_chat import ChatSocketHub, init_websocket_chat
     CHATBOT_AVAILABLE = True
 except ImportError as e:
-    print(f"⚠️ Warning: Could not import chatbot functions: {e}")
+    logger.warning("Could not import chatbot functions: %s", e)
     CHATBOT_AVAILABLE = False
-    ADMIN_EMAIL = None
-    ADMIN_PASSWORD = None
+    # /contact still emails the admin directly without the chatbot backend
+    ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
+    ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
+
+# Site features whose modules also live in DamsoleAIChatbot/. Without that
+# folder the pages and /contact are still served, just without these extras.
+try:
+    # Shared validation engine (precompiled patterns, used by /contact and /chat)
+    from validation import validate_record, first_error, CONTACT_SCHEMA
+    # Idempotency-Key support so client retries don't repeat DB inserts or emails
+    from idempotency import (
+        IdempotencyStore, idempotent, IdempotencyConflict, IdempotencyMismatch, IDEMPOTENCY_HEADER, MAX_KEY_LENGTH
+    )
+    # On-demand profiling: Server-Timing stages + flamegraph output (no-op unless PROFILE_ENABLED)
+    from profiling import init_profiling, profile_stage
+    # Sampled, anonymized /chat and /contact traffic for replay against new builds (TRAFFIC_RECORD=1)
+    from traffic_replay import TrafficRecorder, init_traffic_recorder
+    # Minified, content-hashed CSS/JS served with immutable caching (built in serve mode)
+    from asset_pipeline import ASSET_PIPELINE_ENABLED, IMMUTABLE_CACHE_CONTROL, build_assets
+    # Pages pre-rendered per language (replaces client-side DOM translation)
+    from localization import LANGUAGE_COOKIE, VARY_HEADER, load_catalog, negotiate_language, render_variants, PageTemplate
+    # Above-the-fold CSS inlined per page, the rest loaded async; Link preload/preconnect hints
+    from critical_css import CRITICAL_CSS_ENABLED, build_critical_page
+    # Background dependency probes; /health and /health/deep only read the cached snapshot
+    from health import HealthMonitor
+except ImportError as e:
+    logger.warning("Site extras not available, serving plain pages: %s", e)
+    import json
+
+    CONTACT_SCHEMA = ("firstName", "lastName", "email", "phone", "message", "services")
+
+    def validate_record(record, schema):
+        """Required-field check only"""
+        record = record if isinstance(record, dict) else {}
+        errors = {field: f"Please fill in the {field} field." for field in schema if not record.get(field)}
+        return not errors, errors
+
+    def first_error(errors):
+        return next(iter(errors.values()), None)
+
+    IdempotencyStore = dict
+
+    def idempotent(store):
+        return lambda view: view
+
+    def init_profiling(app, authorize):
+        pass
+
+    def profile_stage(stage, fn):
+        return fn
+
+    class TrafficRecorder:
+        enabled = False
+        stats = {}
+
+        def flush(self):
+            pass
+
+    def init_traffic_recorder(app, recorder, session_id, describe):
+        pass
+
+    ASSET_PIPELINE_ENABLED = False
+    CRITICAL_CSS_ENABLED = False
+    LANGUAGE_COOKIE = "websiteLanguage"
+    VARY_HEADER = "Accept-Language, Cookie"
+
+    def load_catalog():
+        return {}
+
+    def negotiate_language(cookie_value=None, accept_language=None):
+        return "en"
+
+    def render_variants(source, catalog):
+        return {"en": source}
+
+    class PageTemplate:
+        """Serves the page source as written (English)"""
+        def __init__(self, source):
+            self.source = source
+
+        def render(self, lang, translations):
+            return self.source
+
+    class HealthMonitor:
+        """Fixed "ok" answer; there are no dependencies to probe"""
+        def __init__(self, base_info):
+            self._body = json.dumps({"status": "ok", **base_info}).encode("utf-8")
+
+        def add_probe(self, name, fn, critical=False):
+            pass
+
+        def start(self):
+            pass
+
+        def snapshot(self, deep=False):
+            return self._body, 200
+
+idempotency_store = IdempotencyStore()
+chat_sockets = ChatSocketHub() if CHATBOT_AVAILABLE else None
+if CHATBOT_AVAILABLE:
+    user_sessions.init_app(app)
+
+health_monitor = HealthMonitor(base_info={
+    "message": "Damsole Technologies Server is running",
+    "frontend": "Available",
+    "chatbot": "Available" if CHATBOT_AVAILABLE else "Not Available",
+    "endpoints": {
+        "chat": "/chat",
+        "chat_websocket": "/chat/ws",
+        "health": "/health",
+        "health_deep": "/health/deep"
+    }
+})
+
+def check_queues():
+    """In-process queue depths and store sizes"""
+    info = {
+        "ok": True,
+        "log_queue_depth": queue_depth(),
+        "log_records_dropped": dropped_records(),
+        "idempotency_keys": len(idempotency_store),
+    }
+    if CHATBOT_AVAILABLE:
+        info["notification_digest_pending"] = notifier.pending_count()
+        info["sessions"] = len(user_sessions)
+        info["sessions_unsaved"] = user_sessions.dirty_count()
+        info["session_persistence"] = dict(user_sessions.stats)
+        info["llm_calls_coalesced"] = dict(llm_flight.stats)
+        info["search_calls_coalesced"] = dict(search_flight.stats)
+        info["llm_lane"] = llm_lane.snapshot()
+        info["chat_sockets"] = chat_sockets.snapshot()
+        info["transcript_archive"] = transcript_archiver.snapshot()
+    if traffic_recorder.enabled:
+        info["traffic_recorder"] = dict(traffic_recorder.stats)
+    return info
+
+health_monitor.add_probe("queues", check_queues)
+if CHATBOT_AVAILABLE:
+    health_monitor.add_probe("database", check_database, critical=True)
+    health_monitor.add_probe("smtp", check_smtp)
+    health_monitor.add_probe("llm", check_llm)
+
+init_profiling(app, authorize=lambda req: CHATBOT_AVAILABLE and is_admin_request(req.headers.get("Authorization")))
+validate_record = profile_stage("validate", validate_record)
+if CHATBOT_AVAILABLE:
+    detect_intent = profile_stage("intent", detect_intent)
+    validate_field = profile_stage("validate", validate_field)
+    get_support_response = profile_stage("llm", get_support_response)
+    save_to_db = profile_stage("db", save_to_db)
+    send_email = profile_stage("email", send_email)
 
 # ========== FRONTEND ROUTES ==========
 
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Damsole_Frentend')
+HTML_PAGES = ['index.html', 'about.html', 'Portfolio.html', 'ContactUs.html']
+
+# page name -> {language: (html bytes, etag)}. Filled by load_page_cache() in
+# serve mode; empty in development so edits to the HTML show up without a restart.
+page_cache = {}
+# page name -> Link header value (preloads/preconnects for first paint), sent with the page
+page_hints = {}
+# page name -> (source, Link header) for pages rendered per request
+dev_hints = {}
+# Hashed CSS/JS from the asset pipeline (None in development)
+asset_build = None
+
+def read_page(name):
+    """Page source, with asset references pointing at hashed files when built"""
+    with open(os.path.join(FRONTEND_DIR, name), 'r', encoding='utf-8') as f:
+        source = f.read()
+    if asset_build is not None:
+        source = asset_build.rewrite_html(source)
+    return source
+
+def read_stylesheet(href):
+    """Stylesheet text for critical CSS: the hashed build when there is one, else the file on disk"""
+    path = href.split('?', 1)[0].split('#', 1)[0].lstrip('/')
+    if asset_build is not None:
+        built = asset_build.get(path)
+        if built is not None:
+            return built[0].decode('utf-8')
+    full_path = os.path.normpath(os.path.join(FRONTEND_DIR, *path.split('/')))
+    if not full_path.startswith(FRONTEND_DIR + os.sep):
+        return None
+    try:
+        with open(full_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def load_page_cache():
+    """Build hashed assets and pre-render every page in every language once (before workers fork)"""
+    global asset_build
+    if ASSET_PIPELINE_ENABLED:
+        asset_build = build_assets(FRONTEND_DIR)
+    catalog = load_catalog()
+    for name in HTML_PAGES:
+        source = read_page(name)
+        if CRITICAL_CSS_ENABLED:
+            critical = build_critical_page(source, read_stylesheet)
+            source = critical.html
+            if critical.link_header:
+                page_hints[name] = critical.link_header
+            logger.info("Critical CSS for %s: %s of %s stylesheet bytes inlined", name,
+                        critical.stats["critical_bytes"], critical.stats["stylesheet_bytes"])
+        variants = {}
+        for lang, html in render_variants(source, catalog).items():
+            body = html.encode('utf-8')
+            variants[lang] = (body, hashlib.md5(body).hexdigest())
+        page_cache[name] = variants
+
+def send_early_hints(hints):
+    """103 Early Hints, when the server supports them (gunicorn's wsgi.early_hints)"""
+    send = request.environ.get('wsgi.early_hints')
+    if send is None:
+        return
+    try:
+        send([("Link", hints)])
+    except Exception as e:
+        logger.debug("Could not send early hints: %s", e)
+
+def dev_page_hints(name, source):
+    """Link header for a page rendered per request; recomputed only when the page source changes"""
+    if not CRITICAL_CSS_ENABLED:
+        return None
+    cached = dev_hints.get(name)
+    if cached is None or cached[0] != source:
+        cached = dev_hints[name] = (source, build_critical_page(source, read_stylesheet).link_header)
+    return cached[1]
+
+def serve_page(name):
+    """Serve an HTML page in the visitor's language (cookie, then Accept-Language)"""
+    lang = negotiate_language(request.cookies.get(LANGUAGE_COOKIE), request.headers.get('Accept-Language'))
+    variants = page_cache.get(name)
+    hints = page_hints.get(name)
+    if variants is None:
+        # Development: render from disk on every request
+        source = read_page(name)
+        if hints is None:
+            hints = dev_page_hints(name, source)
+        # Early hints only pay off while the page is still being built. A revalidation
+        # (If-None-Match) is usually answered with a 304 and needs nothing fetched.
+        if hints and not request.if_none_match:
+            send_early_hints(hints)
+        body = PageTemplate(source).render(lang, load_catalog().get(lang, {})).encode('utf-8')
+        etag = hashlib.md5(body).hexdigest()
+    else:
+        # Pre-rendered: the body goes out right away, so the Link header is enough
+        body, etag = variants[lang]
+    response = Response(body, mimetype='text/html', headers={"Vary": VARY_HEADER, "Content-Language": lang})
+    if hints:
+        response.headers["Link"] = hints
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+def serve_hashed_asset(filename):
+    """Serve a content-hashed asset from memory; its URL changes whenever its content does"""
+    if asset_build is None:
+        return None
+    if filename == 'assets/manifest.json':
+        return jsonify(asset_build.manifest)
+    built = asset_build.get(filename)
+    if built is None:
+        return None
+    body, mimetype, etag = built
+    response = Response(body, mimetype=mimetype, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
 @app.route('/')
 def index():
     """Serve main index page"""
-    return send_file('Damsole_Frentend/index.html')
+    return serve_page('index.html')
 
 @app.route('/index.html')
 def index_html():
     """Serve index.html"""
-    return send_file('Damsole_Frentend/index.html')
+    return serve_page('index.html')
 
 @app.route('/about.html')
 def about():
     """Serve about page"""
-    return send_file('Damsole_Frentend/about.html')
+    return serve_page('about.html')
 
 @app.route('/Portfolio.html')
 def portfolio():
     """Serve portfolio page"""
-    return send_file('Damsole_Frentend/Portfolio.html')
+    return serve_page('Portfolio.html')
 
 @app.route('/ContactUs.html')
 def contact():
     """Serve contact page"""
-    return send_file('Damsole_Frentend/ContactUs.html')
+    return serve_page('ContactUs.html')
 
 @app.route('/<path:filename>')
 def serve_static(filename):
     """Serve static files (CSS, JS, images)"""
+    hashed = serve_hashed_asset(filename)
+    if hashed is not None:
+        return hashed
     return send_from_directory('Damsole_Frentend', filename)
  
 # ========== CHATBOT ROUTES ==========
 
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
-    return jsonify({
-        "status": "ok",
-        "message": "Damsole Technologies Server is running",
-        "frontend": "Available",
-        "chatbot": "Available" if CHATBOT_AVAILABLE else "Not Available",
-        "endpoints": {
-            "chat": "/chat",
-            "health": "/health"
-        }
-    })
-
-@app.route('/chat', methods=['POST'])
-def chat():
-    """Chatbot endpoint - handles all chatbot conversations"""
-    if not CHATBOT_AVAILABLE:
-        return jsonify({
-            "reply": "Sorry, chatbot service is not available. Please check server configuration."
-        }), 503
-    
+    """Health check endpoint - serves the latest cached probe snapshot"""
+    body, status = health_monitor.snapshot()
+    return Response(body, status=status, mimetype="application/json", headers={"Cache-Control": "no-store"})
+
+@app.route('/health/deep', methods=['GET'])
+def health_deep():
+    """Detailed dependency, queue and session state from the latest probe round"""
+    body, status = health_monitor.snapshot(deep=True)
+    return Response(body, status=status, mimetype="application/json", headers={"Cache-Control": "no-store"})
+
+CHAT_UNAVAILABLE_REPLY = {
+    "reply": "Sorry, chatbot service is not available. Please check server configuration."
+}
+
+def chat_session_id():
+    """Session key for the current visitor (shared by /chat and /chat/ws)"""
+    return "single_user"
+
+def handle_chat_message(user_message):
+    """Run one chat turn; returns (reply payload, HTTP status). Used by POST /chat and /chat/ws"""
     try:
-        payload = request.get_json(silent=True) or {}
-        user_message = (payload.get("message") or "").strip()
-
-        user_id = "single_user"
+        user_id = chat_session_id()
+        bind_log_context(session_id=user_id)
         
         # Initialize session if not exists
         if user_id not in user_sessions:
@@ -121,19 +431,22 @@ def chat():
 
         # Handle auto-start payload
         if user_message == "__damsole_auto_start__":
+            archive_conversation(user_id, session, "restart")
             session["mode"] = "support"
             session["data"] = {}
             session["current_field"] = None
-            return jsonify({"reply": ""})
+            return {"reply": ""}, 200
 
         # If no message provided
         if not user_message:
-            return jsonify({"reply": "I didn't catch that. Could you please repeat?"}), 400
+            return {"reply": "I didn't catch that. Could you please repeat?"}, 400
 
         # SUPPORT MODE: Answer general questions
         if mode == "support":
+            intent = detect_intent(user_message)
+
             # Check if user wants to create something
-            if wants_to_create_project(user_message):
+            if intent == "create_project":
                 # Switch to collection mode
                 session["mode"] = "collecting"
                 session["data"] = {}
@@ -141,24 +454,24 @@ def chat():
                 
                 # Start with first question
                 first_question = get_next_question(session)
-                return jsonify({"reply": f"Perfect! I'd be happy to help you with that. Let me collect a few details from you.\n\n{first_question}"})
+                return {"reply": f"Perfect! I'd be happy to help you with that. Let me collect a few details from you.\n\n{first_question}"}, 200
             
             # Check if user sent a greeting - show suggestions
-            if is_greeting(user_message):
+            if intent == "greeting":
                 greeting_response = "Hello! How can I help you today?"
                 session["conversation_history"].append({"role": "user", "content": user_message})
                 session["conversation_history"].append({"role": "assistant", "content": greeting_response})
                 # Return response with showSuggestions flag
-                return jsonify({"reply": greeting_response, "showSuggestions": True})
+                return {"reply": greeting_response, "showSuggestions": True, "suggestions": SUGGESTION_CHIPS}, 200
             
             # Otherwise, answer as support agent
             session["conversation_history"].append({"role": "user", "content": user_message})
             
-            support_response = get_support_response(user_message, session["conversation_history"])
+            support_response = get_support_response(user_message, session["conversation_history"], intent)
             
             session["conversation_history"].append({"role": "assistant", "content": support_response})
             
-            return jsonify({"reply": support_response})
+            return {"reply": support_response}, 200
 
         # COLLECTING MODE: Collect required details one by one
         if mode == "collecting":
@@ -190,6 +503,7 @@ def chat():
                     # Save to database and send email
                     db_saved = save_to_db(data)
                     email_sent = send_email(data)
+                    archive_conversation(user_id, session, "lead")
                     
                     success_msg = "Thank you! I have all the required details. Our Damsole team will contact you shortly."
                     
@@ -198,29 +512,15 @@ def chat():
                     session["data"] = {}
                     session["current_field"] = None
                     
-                    return jsonify({"reply": success_msg})
+                    return {"reply": success_msg}, 200
             
             # Validate the current field
-            is_valid = True
-            error_msg = None
-            
-            if current_field == "Full Name":
-                is_valid, error_msg = validate_name(user_message)
-            elif current_field == "Email":
-                is_valid, error_msg = validate_email(user_message)
-            elif current_field == "Phone Number":
-                is_valid, error_msg = validate_phone(user_message)
-            elif current_field == "Address":
-                is_valid, error_msg = validate_address(user_message)
-            elif current_field == "Project Requirement":
-                is_valid, error_msg = validate_project(user_message)
-            elif current_field == "Deadline":
-                is_valid, error_msg = validate_deadline(user_message)
+            is_valid, error_msg = validate_field(current_field, user_message)
             
             if not is_valid:
                 # Invalid answer, ask again politely - keep current_field set
                 question = get_next_question(session)
-                return jsonify({"reply": f"I'm sorry, but that doesn't seem right. {error_msg}\n\n{question}"})
+                return {"reply": f"I'm sorry, but that doesn't seem right. {error_msg}\n\n{question}"}, 200
             
             # Valid answer - store it and clear current_field
             data[current_field] = user_message.strip()
@@ -231,11 +531,12 @@ def chat():
             next_question = get_next_question(session)
             if next_question:
                 # Next question found and current_field is now set for the next input
-                return jsonify({"reply": next_question})
+                return {"reply": next_question}, 200
             else:
                 # All fields collected!
                 db_saved = save_to_db(data)
                 email_sent = send_email(data)
+                archive_conversation(user_id, session, "lead")
                 
                 success_msg = "Thank you! I have all the required details. Our Damsole team will contact you shortly."
                 
@@ -244,39 +545,140 @@ def chat():
                 session["data"] = {}
                 session["current_field"] = None
                 
-                return jsonify({"reply": success_msg})
+                return {"reply": success_msg}, 200
 
     except Exception as e:
-        print(f"❌ Chat error: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"reply": "I apologize, but I encountered an error. Could you please try again?"}), 500
+        logger.exception("Chat error: %s", e)
+        return {"reply": "I apologize, but I encountered an error. Could you please try again?"}, 500
+
+def run_chat_turn(user_message, message_id):
+    """
+    Run a chat turn at most once per message id, whichever transport carries it:
+    POST /chat (Idempotency-Key header) and /chat/ws (frame id) share one key
+    scope and fingerprint the message text, so a socket message whose reply was
+    lost is replayed, not re-run, when the widget falls back to POST.
+    Returns (reply payload, HTTP status, replayed).
+    """
+    if not message_id:
+        return (*handle_chat_message(user_message), False)
+    try:
+        (reply, status), replayed = idempotency_store.execute(
+            f"chat:{message_id}",
+            hashlib.sha256(user_message.encode("utf-8")).hexdigest(),
+            lambda: handle_chat_message(user_message),
+            cacheable=lambda result: result[1] < 500
+        )
+    except IdempotencyMismatch:
+        return {"reply": "That message id was already used for a different message."}, 422, False
+    except IdempotencyConflict:
+        return {"reply": "Your previous message is still being processed. Please try again shortly."}, 409, False
+    return reply, status, replayed
+
+@app.route('/chat', methods=['POST'])
+def chat():
+    """Chatbot endpoint - handles all chatbot conversations"""
+    if not CHATBOT_AVAILABLE:
+        return jsonify(CHAT_UNAVAILABLE_REPLY), 503
+
+    message_id = request.headers.get(IDEMPOTENCY_HEADER, "").strip()
+    if len(message_id) > MAX_KEY_LENGTH:
+        return jsonify({"success": False, "message": f"{IDEMPOTENCY_HEADER} is too long."}), 400
+    payload = request.get_json(silent=True)
+    message = payload.get("message") if isinstance(payload, dict) else None
+    reply, status, replayed = run_chat_turn(message.strip() if isinstance(message, str) else "", message_id)
+    response = jsonify(reply)
+    response.status_code = status
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+# ========== WEBSOCKET CHAT ==========
+
+def socket_chat_message(user_message, message_id):
+    """One /chat/ws message; its frame id is the message's Idempotency-Key (shared with POST /chat)"""
+    if not message_id or len(message_id) > MAX_KEY_LENGTH:
+        message_id = None
+    reply, status, _ = run_chat_turn(user_message, message_id)
+    return reply, status
+
+def socket_follow_up(session_id):
+    """Nudge a visitor who went quiet in the middle of lead collection"""
+    session = user_sessions.peek(session_id)
+    if not session or session.get("mode") != "collecting":
+        return None
+    question = get_next_question(session)
+    if not question:
+        return None
+    return {"reply": f"Still there? No rush, whenever you're ready.\n\n{question}"}
+
+def socket_message_done():
+    # A socket is one long request; snapshot the sessions each message changed
+    user_sessions.end_request()
+    user_sessions.begin_request()
+
+if CHATBOT_AVAILABLE:
+    init_websocket_chat(app, chat_sockets, socket_chat_message, chat_session_id,
+                        on_idle=socket_follow_up, after_message=socket_message_done)
+
+# ========== TRAFFIC RECORDING ==========
+
+def describe_chat_traffic(payload):
+    """Label a /chat request by what the session will do with it (before it is handled)"""
+    message = payload.get("message") if isinstance(payload, dict) else None
+    if message == "__damsole_auto_start__":
+        return "auto_start"
+    session = user_sessions.peek(chat_session_id()) if CHATBOT_AVAILABLE else None
+    if session and session.get("mode") == "collecting":
+        return f"collecting:{session.get('current_field') or 'start'}"
+    return "support"
+
+traffic_recorder = TrafficRecorder()
+init_traffic_recorder(app, traffic_recorder, chat_session_id, describe_chat_traffic)
 
 # ========== CONTACT FORM ENDPOINT ==========
 
-def send_contact_email(form_data):
-    """Send email with contact form data to admin"""
-    if not ADMIN_EMAIL or not ADMIN_PASSWORD:
-        print("⚠️ Email credentials not configured. Skipping email send.")
-        return False
-    
+def send_email_directly(subject, body):
+    """Send one admin email over SMTP (used when the chatbot's digest notifier is unavailable)"""
     try:
         from email.mime.text import MIMEText
         from email.mime.multipart import MIMEMultipart
         import smtplib
-        import datetime
-        
-        subject = "📧 New Contact Form Submission - Damsole Technologies"
-        
-        # Format phone number with country code
-        country_code_map = {
-            "US": "+1", "CA": "+1", "IN": "+91", "GB": "+44", "AU": "+61",
-            "DE": "+49", "FR": "+33", "IT": "+39", "ES": "+34", "NL": "+31"
-        }
-        country_code = country_code_map.get(form_data.get("countryCode", ""), "")
-        full_phone = f"{country_code} {form_data.get('phone', '')}" if country_code else form_data.get('phone', '')
-        
-        body = f"""
+
+        msg = MIMEMultipart()
+        msg["From"] = ADMIN_EMAIL
+        msg["To"] = ADMIN_EMAIL
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "plain"))
+
+        with smtplib.SMTP("smtp.gmail.com", 587) as s:
+            s.starttls()
+            s.login(ADMIN_EMAIL, ADMIN_PASSWORD)
+            s.send_message(msg)
+        logger.info("Contact form email sent successfully to admin!")
+        return True
+    except Exception as e:
+        logger.error("Contact form email send failed: %s", e)
+        return False
+
+def send_contact_email(form_data):
+    """Send email with contact form data to admin (batched into digests if enabled)"""
+    if not ADMIN_EMAIL or not ADMIN_PASSWORD:
+        logger.warning("Email credentials not configured. Skipping email send.")
+        return False
+    
+    import datetime
+    
+    subject = "📧 New Contact Form Submission - Damsole Technologies"
+    
+    # Format phone number with country code
+    country_code_map = {
+        "US": "+1", "CA": "+1", "IN": "+91", "GB": "+44", "AU": "+61",
+        "DE": "+49", "FR": "+33", "IT": "+39", "ES": "+34", "NL": "+31"
+    }
+    country_code = country_code_map.get(form_data.get("countryCode", ""), "")
+    full_phone = f"{country_code} {form_data.get('phone', '')}" if country_code else form_data.get('phone', '')
+    
+    body = f"""
 New Contact Form Submission from Damsole Technologies Website
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -299,53 +701,27 @@ CONTACT DETAILS:
 Timestamp: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 This is an automated email from Damsole Technologies Contact Form.
-        """.strip()
+    """.strip()
 
-        msg = MIMEMultipart()
-        msg["From"] = ADMIN_EMAIL
-        msg["To"] = ADMIN_EMAIL
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain"))
+    if not CHATBOT_AVAILABLE:
+        return send_email_directly(subject, body)
+    return notifier.notify("contact", subject, body, urgent=is_urgent(form_data))
 
-        with smtplib.SMTP("smtp.gmail.com", 587) as s:
-            s.starttls()
-            s.login(ADMIN_EMAIL, ADMIN_PASSWORD)
-            s.send_message(msg)
-        print("✅ Contact form email sent successfully to admin!")
-        return True
-    except Exception as e:
-        print(f"❌ Contact form email send failed: {e}")
-        return False
+send_contact_email = profile_stage("email", send_contact_email)
 
 @app.route('/contact', methods=['POST'])
+@idempotent(idempotency_store)
 def contact_form():
     """Handle contact form submission"""
     try:
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['firstName', 'lastName', 'email', 'phone', 'message']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({
-                    "success": False,
-                    "message": f"Please fill in the {field} field."
-                }), 400
-        
-        # Validate services
-        if not data.get('services') or len(data.get('services', [])) == 0:
+        # Validate required fields, services and email format
+        is_valid, errors = validate_record(data, CONTACT_SCHEMA)
+        if not is_valid:
             return jsonify({
                 "success": False,
-                "message": "Please select at least one service."
-            }), 400
-        
-        # Validate email format
-        import re
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, data.get('email', '')):
-            return jsonify({
-                "success": False,
-                "message": "Please enter a valid email address."
+                "message": first_error(errors)
             }), 400
         
         # Send email
@@ -363,29 +739,112 @@ def contact_form():
             }), 500
             
     except Exception as e:
-        print(f"❌ Contact form error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Contact form error: %s", e)
         return jsonify({
             "success": False,
             "message": "An error occurred. Please try again later."
         }), 500
 
+# ========== ADMIN ENDPOINTS ==========
+
+@app.route('/admin/leads/export', methods=['GET'])
+def export_leads():
+    """
+    Stream leads as CSV or NDJSON (requires `Authorization: Bearer <ADMIN_API_TOKEN>`).
+    Query params: format=csv|ndjson, since, until (ISO timestamps), incremental=1
+    """
+    if not CHATBOT_AVAILABLE:
+        return jsonify({"success": False, "message": "Chatbot backend not available."}), 503
+    if not is_admin_request(request.headers.get("Authorization")):
+        return jsonify({"success": False, "message": "Unauthorized."}), 401
+
+    fmt = request.args.get("format", "csv").lower()
+    incremental = request.args.get("incremental", "").lower() in ("1", "true", "yes")
+    try:
+        chunks = stream_leads(fmt, request.args.get("since"), request.args.get("until"), incremental)
+    except ExportUnavailableError as e:
+        return jsonify({"success": False, "message": str(e)}), 503
+    except ExportError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    filename = f"damsole_leads.{fmt}"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Cache-Control": "no-store"
+        }
+    )
+
+@app.route('/admin/leads/search', methods=['GET'])
+def search_leads_endpoint():
+    """
+    Full-text lead search, newest first (requires `Authorization: Bearer <ADMIN_API_TOKEN>`).
+    Query params: q (keywords, all must match), since, until (ISO timestamps),
+    cursor (next_cursor of the previous page), limit
+    """
+    if not CHATBOT_AVAILABLE:
+        return jsonify({"success": False, "message": "Chatbot backend not available."}), 503
+    if not is_admin_request(request.headers.get("Authorization")):
+        return jsonify({"success": False, "message": "Unauthorized."}), 401
+
+    try:
+        page = search_leads(request.args.get("q", ""), request.args.get("since"), request.args.get("until"),
+                            request.args.get("cursor"), request.args.get("limit"))
+    except SearchUnavailableError as e:
+        return jsonify({"success": False, "message": str(e)}), 503
+    except SearchError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    response = jsonify({"success": True, **page})
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+@app.route('/admin/answers/refresh', methods=['POST'])
+def refresh_prefetched_answers():
+    """Regenerate prefetched chip/FAQ answers now, e.g. after editing the knowledge base (admin only)"""
+    if not CHATBOT_AVAILABLE:
+        return jsonify({"success": False, "message": "Chatbot backend not available."}), 503
+    if not is_admin_request(request.headers.get("Authorization")):
+        return jsonify({"success": False, "message": "Unauthorized."}), 401
+    if not answer_cache.enabled:
+        return jsonify({"success": False, "message": "Answer prefetching is disabled."}), 409
+
+    answer_cache.invalidate()
+    return jsonify({"success": True, "message": "Prefetched answers are being regenerated."}), 202
+
 # ========== INITIALIZATION ==========
 
-def initialize_server():
+def start_background_tasks():
+    """Start per-process background threads (digest flusher, answer prefetch, transcript archive, health probes)"""
+    if CHATBOT_AVAILABLE:
+        # Each worker restores chat sessions from the log after the fork, so a
+        # recycled worker sees what its predecessors saved, not the boot-time state
+        user_sessions.load()
+        # Restore and resume any digest notifications left over from a restart
+        notifier.start()
+        answer_cache.start()
+        transcript_archiver.start()
+    health_monitor.start()
+
+def initialize_server(start_background=True):
     """Initialize database and print startup info"""
     if CHATBOT_AVAILABLE:
         try:
             init_db()
+            init_search_index()
         except Exception as e:
-            print(f"⚠️ Database initialization warning: {e}")
+            logger.warning("Database initialization warning: %s", e)
+    if start_background:
+        start_background_tasks()
     
     print("\n" + "="*70)
     print("🚀 Damsole Technologies - Unified Server")
     print("="*70)
     print("📍 Frontend Website: http://127.0.0.1:5000")
     print("📍 Chatbot API: http://127.0.0.1:5000/chat")
+    print("📍 Chatbot WebSocket: ws://127.0.0.1:5000/chat/ws")
     print("📍 Health Check: http://127.0.0.1:5000/health")
     print("="*70)
     print("📄 Available Pages:")
@@ -403,13 +862,105 @@ def initialize_server():
     print("🎉 Server is running! Open http://127.0.0.1:5000 in your browser")
     print("="*70 + "\n")
 
+def warm_up():
+    """Build caches in the parent process so every forked worker starts warm"""
+    start = time.perf_counter()
+    load_page_cache()
+    warmed = ["html_pages"]
+    if asset_build is not None:
+        warmed.append(f"assets ({asset_build.stats['original_bytes']} -> {asset_build.stats['minified_bytes']} bytes)")
+    if CHATBOT_AVAILABLE:
+        warmed.extend(warm_up_chatbot())
+        if warm_search_index():
+            warmed.append("lead_search_index")
+    logger.info("Warm-up finished in %.1f ms: %s", (time.perf_counter() - start) * 1000.0, ", ".join(warmed))
+
+# ========== PRODUCTION SERVER ==========
+
+def serve():
+    """
+    Production entry point: `python main.py serve`
+    The parent imports and warms the app once, then pre-forks gunicorn
+    workers (preload_app), so workers share the warmed state copy-on-write
+    instead of each re-importing app.py and re-running init_db().
+    Defaults to one worker with SERVE_THREADS threads: chat sessions, the
+    Idempotency-Key store, answer-cache counters and single-flight state are
+    per process, so with several workers consecutive /chat turns (and retries)
+    can land on a worker that has never seen the conversation. For the same
+    reason the worker count is not sized to the CPU cores; scale a single
+    box with SERVE_THREADS.
+    `kill -HUP <parent pid>` replaces workers gracefully: new workers start
+    first and old ones finish their in-flight requests before exiting.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        logger.error("gunicorn is not installed (pip install gunicorn). Use `python main.py` for development.")
+        sys.exit(1)
+
+    initialize_server(start_background=False)
+    warm_up()
+
+    port = int(os.environ.get("PORT", 5000))
+    workers = int(os.environ.get("WEB_CONCURRENCY") or 1)
+    if workers > 1:
+        logger.warning("WEB_CONCURRENCY=%s is unsupported: chat sessions and Idempotency-Keys are per worker, "
+                       "so lead collection can restart and retries can run twice", workers)
+
+    def post_fork(server, worker):
+        # Threads don't survive fork(); each worker starts its own
+        start_background_tasks()
+
+    def worker_exit(server, worker):
+        # Persist in-progress chat sessions and buffered transcripts before the worker goes away
+        if CHATBOT_AVAILABLE:
+            user_sessions.flush()
+            transcript_archiver.flush()
+        traffic_recorder.flush()
+
+    # Each open chat socket holds a thread for its lifetime; give sockets their
+    # own threads so they can't starve page and /chat requests
+    threads = int(os.environ.get("SERVE_THREADS", 4))
+    if CHATBOT_AVAILABLE:
+        if llm_lane.max_concurrent + llm_lane.max_queue >= threads:
+            logger.warning("LLM_MAX_CONCURRENCY + LLM_MAX_QUEUE (%s) should stay below SERVE_THREADS (%s) "
+                           "so pages and /contact always have a thread", llm_lane.max_concurrent + llm_lane.max_queue, threads)
+        threads += chat_sockets.max_connections
+
+    options = {
+        "bind": f"0.0.0.0:{port}",
+        "workers": workers,
+        "worker_class": "gthread",
+        "threads": threads,
+        "preload_app": True,
+        "timeout": int(os.environ.get("SERVE_TIMEOUT", 120)),
+        "graceful_timeout": int(os.environ.get("SERVE_GRACEFUL_TIMEOUT", 30)),
+        "max_requests": int(os.environ.get("SERVE_MAX_REQUESTS", 2000)),
+        "max_requests_jitter": int(os.environ.get("SERVE_MAX_REQUESTS_JITTER", 200)),
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+    }
+
+    class DamsoleServer(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    logger.info("Starting %s worker(s) x %s threads on port %s", workers, threads, port)
+    DamsoleServer().run()
+
 # ========== MAIN ==========
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve()
+        sys.exit(0)
     initialize_server()
     # Production: Use PORT from environment (Render sets this automatically)
     # Development: Default to 5000
     port = int(os.environ.get("PORT", 5000))
     debug_mode = os.environ.get("FLASK_ENV") == "development"
     app.run(debug=debug_mode, host='0.0.0.0', port=port, threaded=True)
-
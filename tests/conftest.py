@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules import each other by bare name, as main.py arranges at runtime
+sys.path.insert(0, os.path.join(ROOT, "DamsoleAIChatbot"))
+sys.path.insert(0, ROOT)
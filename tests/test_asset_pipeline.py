@@ -0,0 +1,63 @@
+import os
+import re
+
+from asset_pipeline import build_assets
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Damsole_Frentend")
+LOCAL_ASSET = re.compile(r"""\b(?:src|href)\s*=\s*["']([^"']*assets/[^"']+\.(?:css|js))["']""")
+
+
+def _read(name):
+    with open(os.path.join(FRONTEND_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_rewrite_html_points_index_at_hashed_files():
+    build = build_assets(FRONTEND_DIR)
+    source = _read("index.html")
+    original = LOCAL_ASSET.findall(source)
+    assert original, "index.html should reference local CSS/JS"
+
+    rewritten = LOCAL_ASSET.findall(build.rewrite_html(source))
+
+    assert len(rewritten) == len(original)
+    for before, after in zip(original, rewritten):
+        lead = before[:len(before) - len(before.lstrip("./"))]
+        logical = before[len(lead):]
+        # Same relative prefix as the source, then the hashed name of that file
+        assert after == lead + build.manifest[logical]
+        assert build.get(build.manifest[logical]) is not None
+
+
+def test_rewrite_html_keeps_prefixes_and_unknown_assets():
+    build = build_assets(FRONTEND_DIR)
+    hashed = build.manifest["assets/css/style.css"]
+    html = ('<link href="assets/css/style.css"><link href="./assets/css/style.css">'
+            '<link href="/assets/css/style.css"><script src="assets/javascript/missing.js"></script>')
+
+    assert build.rewrite_html(html) == (
+        f'<link href="{hashed}"><link href="./{hashed}">'
+        f'<link href="/{hashed}"><script src="assets/javascript/missing.js"></script>'
+    )
+
+
+def test_served_pages_link_hashed_assets_that_resolve(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "ASSET_PIPELINE_ENABLED", True)
+    monkeypatch.setattr(main, "asset_build", None)
+    monkeypatch.setattr(main, "page_cache", {})
+    monkeypatch.setattr(main, "page_hints", {})
+    main.load_page_cache()
+    client = main.app.test_client()
+
+    for page in main.HTML_PAGES:
+        urls = LOCAL_ASSET.findall(client.get(f"/{page}").get_data(as_text=True))
+        assert urls, f"{page} should reference local CSS/JS"
+        for url in urls:
+            assert not url.startswith("None")
+            path = url.lstrip("./")
+            assert path in main.asset_build.manifest.values(), f"{page}: {url} is not a hashed asset"
+            response = client.get(f"/{path}")
+            assert response.status_code == 200, f"{page}: {url}"
+            assert response.headers["Cache-Control"] == main.IMMUTABLE_CACHE_CONTROL
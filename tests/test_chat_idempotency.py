@@ -0,0 +1,60 @@
+import uuid
+
+import pytest
+
+import main
+
+pytestmark = pytest.mark.skipif(not main.CHATBOT_AVAILABLE, reason="chatbot backend not importable")
+
+
+@pytest.fixture
+def turns(monkeypatch):
+    """Count chat turns that actually run"""
+    ran = []
+    def handle(user_message):
+        ran.append(user_message)
+        return {"reply": f"reply #{len(ran)}"}, 200
+    monkeypatch.setattr(main, "handle_chat_message", handle)
+    return ran
+
+
+def test_socket_message_replayed_over_post_fallback(turns):
+    message_id = uuid.uuid4().hex
+    # Processed over the socket, but the reply never reached the widget
+    assert main.socket_chat_message("I want to create website", message_id) == ({"reply": "reply #1"}, 200)
+
+    response = main.app.test_client().post(
+        "/chat", json={"message": "I want to create website"}, headers={"Idempotency-Key": message_id}
+    )
+
+    assert response.status_code == 200
+    assert response.get_json() == {"reply": "reply #1"}
+    assert response.headers.get("Idempotent-Replayed") == "true"
+    assert turns == ["I want to create website"]
+
+
+def test_post_retry_replayed_over_socket(turns):
+    message_id = uuid.uuid4().hex
+    main.app.test_client().post("/chat", json={"message": "hello"}, headers={"Idempotency-Key": message_id})
+
+    assert main.socket_chat_message("hello", message_id) == ({"reply": "reply #1"}, 200)
+    assert len(turns) == 1
+
+
+def test_reused_id_with_different_message_is_rejected(turns):
+    message_id = uuid.uuid4().hex
+    main.socket_chat_message("hello", message_id)
+
+    response = main.app.test_client().post(
+        "/chat", json={"message": "something else"}, headers={"Idempotency-Key": message_id}
+    )
+
+    assert response.status_code == 422
+    assert len(turns) == 1
+
+
+def test_post_without_key_always_runs(turns):
+    client = main.app.test_client()
+    client.post("/chat", json={"message": "hello"})
+    client.post("/chat", json={"message": "hello"})
+    assert len(turns) == 2
@@ -0,0 +1,114 @@
+import pytest
+
+from critical_css import build_critical_page, scan_fold, select_critical
+
+PAGE = """<!DOCTYPE html>
+<html><head>
+<link rel="stylesheet" href="assets/css/style.css">
+<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" crossorigin>
+</head><body>
+<header class="navbar"><img src="assets/images/logo.png" class="logo"></header>
+<main>
+<section id="hero" class="hero"><h1 class="hero-title">Hello</h1><img src="assets/images/hero.webp"></section>
+<section class="services"><div class="card">Below the fold</div></section>
+</main>
+</body></html>"""
+
+CSS = """:root{--brand:#0af}
+@font-face{font-family:Brand;src:url(../fonts/brand.woff2)}
+.navbar{display:flex}
+.logo:hover{opacity:.8}
+#hero h1.hero-title{font:2rem Brand;animation:rise 1s}
+.card{padding:1rem}
+.chat-widget{position:fixed}
+@media (max-width:600px){.navbar{display:block}.card{padding:0}}
+@keyframes rise{from{opacity:0}to{opacity:1}}
+@keyframes spin{to{transform:rotate(1turn)}}"""
+
+
+def _stylesheets(href):
+    return CSS if href == "assets/css/style.css" else None
+
+
+def test_fold_ends_with_the_first_section_of_main():
+    fold = scan_fold(PAGE)
+    assert {"navbar", "logo", "hero", "hero-title"} <= fold.classes
+    assert "card" not in fold.classes and "services" not in fold.classes
+    assert fold.images == ["assets/images/logo.png", "assets/images/hero.webp"]
+
+
+def test_select_critical_keeps_only_rules_the_fold_can_match():
+    critical = select_critical(CSS, scan_fold(PAGE))
+
+    assert ".navbar{display:flex}" in critical
+    assert ".logo:hover{opacity:.8}" in critical           # pseudo-classes are assumed to match
+    assert "#hero h1.hero-title{" in critical
+    assert "@media (max-width:600px){.navbar{display:block}}" in critical
+    assert "@keyframes rise" in critical and "@keyframes spin" not in critical
+    assert "@font-face" in critical
+    assert ".card" not in critical and ".chat-widget" not in critical
+
+
+def test_stylesheet_becomes_a_non_blocking_preload():
+    page = build_critical_page(PAGE, _stylesheets)
+
+    assert "<style data-critical>" in page.html
+    assert "url(/assets/fonts/brand.woff2)" in page.html      # rebased from the stylesheet
+    assert '<noscript><link rel="stylesheet" href="assets/css/style.css"></noscript>' in page.html
+    assert 'href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" crossorigin>' in page.html
+    assert 0 < page.stats["critical_bytes"] < page.stats["stylesheet_bytes"]
+
+
+def test_link_header_lists_what_the_first_paint_needs():
+    page = build_critical_page(PAGE, _stylesheets, preload_images=1)
+    assert page.link_header.split(", ") == [
+        "</assets/css/style.css>; rel=preload; as=style",
+        "</assets/fonts/brand.woff2>; rel=preload; as=font; type=font/woff2; crossorigin",
+        "</assets/images/logo.png>; rel=preload; as=image",
+        "<https://cdnjs.cloudflare.com>; rel=preconnect; crossorigin",
+    ]
+
+
+# --- main.serve_page ---
+
+@pytest.fixture
+def site(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "CRITICAL_CSS_ENABLED", True)
+    monkeypatch.setattr(main, "asset_build", None)
+    monkeypatch.setattr(main, "page_cache", {})
+    monkeypatch.setattr(main, "page_hints", {})
+    monkeypatch.setattr(main, "dev_hints", {})
+    return main
+
+
+def _client(main, early_hints):
+    """Test client whose server records 103 Early Hints"""
+    client = main.app.test_client()
+    client.environ_base["wsgi.early_hints"] = early_hints.append
+    return client
+
+
+def test_prerendered_page_sends_link_header_without_early_hints(site):
+    site.load_page_cache()
+    sent = []
+    response = _client(site, sent).get("/")
+
+    assert response.status_code == 200
+    assert response.headers["Link"] == site.page_hints["index.html"]
+    assert "rel=preload; as=style" in response.headers["Link"]
+    assert sent == []
+
+
+def test_page_rendered_per_request_sends_early_hints_first(site):
+    sent = []
+    client = _client(site, sent)
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert sent == [[("Link", response.headers["Link"])]]
+
+    revalidated = client.get("/", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert len(sent) == 1
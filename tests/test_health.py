@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+
+from health import HealthMonitor
+
+
+def _monitor(**kwargs):
+    monitor = HealthMonitor(base_info={"message": "test"}, interval=60, **kwargs)
+    monitor.start = lambda: None  # probe rounds are driven by the test
+    return monitor
+
+
+def _status(monitor, deep=False):
+    body, code = monitor.snapshot(deep=deep)
+    return json.loads(body), code
+
+
+def test_starting_until_the_first_round_then_ok():
+    monitor = _monitor()
+    monitor.add_probe("database", lambda: {"ok": True}, critical=True)
+
+    assert _status(monitor)[0]["status"] == "starting"
+    assert _status(monitor)[1] == 503
+
+    monitor.run_probes()
+    body, code = _status(monitor)
+    assert (body["status"], code) == ("ok", 200)
+    assert body["checks"] == {"database": "ok"}
+
+
+def test_only_a_failing_critical_probe_degrades():
+    healthy = {"ok": True}
+    monitor = _monitor()
+    monitor.add_probe("database", lambda: healthy, critical=True)
+    monitor.add_probe("smtp", lambda: {"ok": False})
+
+    monitor.run_probes()
+    assert _status(monitor)[1] == 200
+
+    healthy = {"ok": False}
+    monitor.run_probes()
+    body, code = _status(monitor)
+    assert (body["status"], code) == ("degraded", 503)
+
+    healthy = {"ok": True}
+    monitor.run_probes()
+    assert _status(monitor)[1] == 200
+
+
+def test_probe_exception_counts_as_failure():
+    monitor = _monitor()
+    monitor.add_probe("database", lambda: 1 / 0, critical=True)
+
+    monitor.run_probes()
+    body, code = _status(monitor, deep=True)
+    assert code == 503
+    assert "division by zero" in body["checks"]["database"]["error"]
+
+
+def test_hung_probe_is_time_boxed_and_not_restarted():
+    release = threading.Event()
+    calls = []
+
+    def hung():
+        calls.append(1)
+        release.wait(5)
+        return {"ok": True}
+
+    monitor = _monitor(timeout=0.05)
+    monitor.add_probe("database", hung, critical=True)
+    monitor.add_probe("queues", lambda: {"ok": True})
+
+    start = time.monotonic()
+    monitor.run_probes()
+    assert time.monotonic() - start < 1.0
+
+    body, code = _status(monitor, deep=True)
+    assert code == 503
+    assert body["checks"]["database"]["error"].startswith("timed out")
+    assert body["checks"]["queues"]["ok"] is True
+
+    monitor.run_probes()
+    assert len(calls) == 1
+    release.set()
+
+
+def test_stale_snapshot_is_degraded():
+    monitor = _monitor(stale_after=3)
+    monitor.add_probe("database", lambda: {"ok": True}, critical=True)
+    monitor.run_probes()
+    assert _status(monitor)[1] == 200
+
+    monitor._published_at -= monitor.interval * 3 + 1
+    body, code = _status(monitor)
+    assert (body["status"], code) == ("degraded", 503)
+    assert body["error"] == "health snapshot is stale"
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+from flask import Flask, jsonify
+
+from idempotency import IdempotencyConflict, IdempotencyStore, idempotent
+
+
+def _app(store, status=200):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route("/contact", methods=["POST"])
+    @idempotent(store)
+    def contact():
+        calls.append(1)
+        return jsonify({"sent": len(calls)}), status
+
+    return app.test_client(), calls
+
+
+def test_retry_with_same_key_is_replayed():
+    client, calls = _app(IdempotencyStore())
+
+    first = client.post("/contact", json={"a": 1}, headers={"Idempotency-Key": "k1"})
+    retry = client.post("/contact", json={"a": 1}, headers={"Idempotency-Key": "k1"})
+
+    assert retry.status_code == 200
+    assert retry.get_json() == first.get_json() == {"sent": 1}
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(calls) == 1
+
+
+def test_key_reused_with_different_payload_is_rejected():
+    client, calls = _app(IdempotencyStore())
+
+    client.post("/contact", json={"a": 1}, headers={"Idempotency-Key": "k1"})
+    response = client.post("/contact", json={"a": 2}, headers={"Idempotency-Key": "k1"})
+
+    assert response.status_code == 422
+    assert len(calls) == 1
+
+
+def test_server_errors_are_not_stored():
+    client, calls = _app(IdempotencyStore(), status=503)
+
+    client.post("/contact", json={"a": 1}, headers={"Idempotency-Key": "k1"})
+    response = client.post("/contact", json={"a": 1}, headers={"Idempotency-Key": "k1"})
+
+    assert "Idempotent-Replayed" not in response.headers
+    assert len(calls) == 2
+
+
+def test_concurrent_duplicate_waits_for_the_original():
+    store = IdempotencyStore()
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        started.set()
+        release.wait(2)
+        return "done"
+
+    results = []
+    original = threading.Thread(target=lambda: results.append(store.execute("k", "fp", slow)))
+    original.start()
+    started.wait(2)
+    duplicate = threading.Thread(target=lambda: results.append(store.execute("k", "fp", slow)))
+    duplicate.start()
+    release.set()
+    original.join(2)
+    duplicate.join(2)
+
+    assert sorted(results, key=lambda r: r[1]) == [("done", False), ("done", True)]
+    assert len(runs) == 1
+
+
+def test_duplicate_gives_up_while_original_is_still_running():
+    store = IdempotencyStore(wait_timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+    original = threading.Thread(target=store.execute, args=("k", "fp", lambda: started.set() or release.wait(2)))
+    original.start()
+    started.wait(2)
+
+    with pytest.raises(IdempotencyConflict):
+        store.execute("k", "fp", lambda: "duplicate")
+    release.set()
+    original.join(2)
+
+
+def test_failed_original_lets_the_retry_run():
+    store = IdempotencyStore()
+
+    def fail():
+        raise RuntimeError("smtp down")
+
+    with pytest.raises(RuntimeError):
+        store.execute("k", "fp", fail)
+    assert store.execute("k", "fp", lambda: "sent") == ("sent", False)
+
+
+def test_expired_and_excess_entries_are_evicted():
+    store = IdempotencyStore(ttl=0, max_entries=2)
+    store.execute("a", "fp", lambda: 1)
+    assert store.execute("a", "fp", lambda: 2) == (2, False)
+
+    store = IdempotencyStore(max_entries=2)
+    for key in "abc":
+        store.execute(key, "fp", lambda: key)
+    assert len(store) == 2
+    assert store.execute("a", "fp", lambda: "again") == ("again", False)
@@ -0,0 +1,47 @@
+import pytest
+
+import intent_classifier
+from intent_classifier import classify_intent
+
+pytestmark = pytest.mark.skipif(not intent_classifier.NUMPY_AVAILABLE, reason="numpy not installed")
+
+
+class _FixedModel:
+    """Model stub that always predicts the same (intent, confidence, coverage)"""
+
+    def __init__(self, *score):
+        self._score = score
+
+    def score(self, text):
+        return self._score
+
+
+@pytest.fixture
+def predict(monkeypatch):
+    def with_score(*score):
+        monkeypatch.setattr(intent_classifier, "get_model", lambda: _FixedModel(*score))
+        return classify_intent("message")[0]
+    return with_score
+
+
+def test_knowledge_base_intents_need_the_stricter_threshold(predict):
+    confidence = intent_classifier.INTENT_ANSWER_CONFIDENCE_THRESHOLD - 0.01
+    assert predict("pricing", confidence, 1.0) == "other"
+    assert predict("greeting", confidence, 1.0) == "greeting"
+    assert predict("pricing", intent_classifier.INTENT_ANSWER_CONFIDENCE_THRESHOLD, 1.0) == "pricing"
+
+
+def test_knowledge_base_intents_need_the_stricter_coverage(predict):
+    coverage = intent_classifier.INTENT_ANSWER_MIN_COVERAGE - 0.01
+    assert predict("contact", 1.0, coverage) == "other"
+    assert predict("create_project", 1.0, coverage) == "create_project"
+
+
+def test_threshold_argument_cannot_loosen_an_intent_threshold(monkeypatch):
+    monkeypatch.setattr(intent_classifier, "get_model", lambda: _FixedModel("services", 0.8, 1.0))
+    assert classify_intent("message", threshold=0.5)[0] == "other"
+
+
+@pytest.mark.parametrize("message", ["my website is down", "about your company", "i forgot my password"])
+def test_off_topic_messages_fall_back_to_the_support_agent(message):
+    assert classify_intent(message)[0] == "other"
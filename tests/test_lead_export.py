@@ -0,0 +1,93 @@
+import sqlite3
+
+import pytest
+
+import lead_export
+from lead_export import ExportError, ExportUnavailableError, iter_lead_rows, stream_leads
+from sqlite_store import LEADS_TABLE_SQL
+
+INSERT = """
+    INSERT INTO leads (full_name, email, phone_number, address, project_requirement, deadline)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+LEAD = ("Asha Patil", "asha@example.com", "9876543210", "12 MG Road, Pune", "bakery website", "2 months")
+
+
+class _Connection:
+    """sqlite3 connection that records when it is closed"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path)
+        self.closed = False
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def close(self):
+        self.closed = True
+        self._conn.close()
+
+
+@pytest.fixture
+def leads_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "leads.db")
+    conn = sqlite3.connect(path)
+    conn.execute(LEADS_TABLE_SQL)
+    conn.executemany(INSERT, [LEAD] * 3)
+    conn.commit()
+
+    opened = []
+    def connect():
+        opened.append(_Connection(path))
+        return opened[-1]
+
+    monkeypatch.setattr(lead_export, "DB_TYPE", "sqlite")
+    monkeypatch.setattr(lead_export, "get_db_connection", connect)
+    monkeypatch.setattr(lead_export, "EXPORT_STATE_FILE", str(tmp_path / "state.json"))
+    yield conn, opened
+    conn.close()
+
+
+def test_export_that_is_never_iterated_opens_no_connection(leads_db):
+    _, opened = leads_db
+    iter_lead_rows()
+    assert opened == []
+
+
+def test_closing_a_partial_export_releases_the_connection(leads_db):
+    _, opened = leads_db
+    rows = iter_lead_rows(batch_size=1)
+    assert next(rows)[0] == 1
+    rows.close()
+    assert opened[0].closed
+
+
+def test_incremental_export_resumes_after_the_last_delivered_lead(leads_db):
+    conn, _ = leads_db
+    assert [row[0] for row in iter_lead_rows(incremental=True)] == [1, 2, 3]
+
+    conn.execute(INSERT, LEAD)
+    conn.commit()
+    assert [row[0] for row in iter_lead_rows(incremental=True)] == [4]
+
+
+def test_abandoned_incremental_export_keeps_the_high_water_mark(leads_db):
+    rows = iter_lead_rows(incremental=True, batch_size=1)
+    next(rows)
+    rows.close()
+    assert [row[0] for row in iter_lead_rows(incremental=True)] == [1, 2, 3]
+
+
+def test_overlapping_incremental_exports_are_refused(leads_db):
+    first = iter_lead_rows(incremental=True, batch_size=1)
+    next(first)
+    with pytest.raises(ExportError):
+        next(iter_lead_rows(incremental=True))
+    first.close()
+    assert [row[0] for row in iter_lead_rows(incremental=True)] == [1, 2, 3]
+
+
+def test_unavailable_database_is_reported_before_any_output(leads_db, monkeypatch):
+    monkeypatch.setattr(lead_export, "get_db_connection", lambda: None)
+    with pytest.raises(ExportUnavailableError):
+        stream_leads("csv")
@@ -0,0 +1,34 @@
+import sqlite3
+
+from lead_search import LeadIndex, MAX_TERMS, search_terms
+from sqlite_store import LEADS_TABLE_SQL
+
+INSERT = """
+    INSERT INTO leads (full_name, email, phone_number, address, project_requirement, deadline)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def _db(tmp_path, *rows):
+    conn = sqlite3.connect(str(tmp_path / "leads.db"))
+    conn.execute(LEADS_TABLE_SQL)
+    conn.executemany(INSERT, rows)
+    conn.commit()
+    return conn
+
+
+def test_finds_lead_by_project_requirement_keyword(tmp_path):
+    conn = _db(tmp_path,
+               ("Asha Patil", "asha.patil@example.com", "+91 98765 43210", "12 MG Road, Camp, Pune 411001",
+                "ecommerce website bakery", "2 months"),
+               ("Ravi Kumar", "ravi@example.com", "9876500000", "Baner, Pune", "logo design", "1 week"))
+    index = LeadIndex()
+
+    assert index.search(conn, search_terms("bakery")) == [1]
+    assert index.search(conn, search_terms("411001")) == [1]
+    assert index.search(conn, search_terms("pune")) == [2, 1]
+    assert index.search(conn, search_terms("ecomm bak")) == [1]
+
+
+def test_query_terms_are_capped():
+    assert len(search_terms(" ".join(f"word{i}" for i in range(MAX_TERMS + 5)))) == MAX_TERMS
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+import app
+from admission import AdmissionController, LaneSaturated
+
+
+def _burst(count, target):
+    results = [None] * count
+    def worker(i):
+        results[i] = target()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)  # arrive while the first call is still in flight
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_burst_takes_one_lane_slot(monkeypatch):
+    calls = []
+    def slow_llm(user_message, history):
+        calls.append(user_message)
+        time.sleep(0.3)
+        return "Answer from the LLM"
+    monkeypatch.setattr(app, "_call_llm", slow_llm)
+    lane = AdmissionController("llm", max_concurrent=2, max_queue=1, queue_timeout=0.05)
+
+    results = _burst(6, lambda: app.generate_support_answer("do you sign contracts for hosting?", lane=lane))
+
+    assert results == ["Answer from the LLM"] * 6
+    assert len(calls) == 1
+    assert lane.stats["admitted"] == 1
+    assert lane.stats["shed_queue_full"] == lane.stats["shed_timeout"] == 0
+
+
+def test_shed_leader_sheds_its_followers(monkeypatch):
+    monkeypatch.setattr(app, "_call_llm", lambda user_message, history: "unused")
+    lane = AdmissionController("llm", max_concurrent=1, max_queue=0, queue_timeout=0)
+    release = threading.Event()
+    holder = threading.Thread(target=lambda: lane.run(release.wait))
+    holder.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(LaneSaturated):
+            app.generate_support_answer("what are your office hours on sunday?", lane=lane)
+    finally:
+        release.set()
+        holder.join()
@@ -0,0 +1,127 @@
+import time
+
+import pytest
+
+from llm_router import LLMError, LLMProvider, LLMRouter, MockProvider, MIN_LATENCY_SAMPLES
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _prime_latency(router, name, seconds):
+    """Give a provider enough samples for a p95, so its hedge delay is known"""
+    for _ in range(MIN_LATENCY_SAMPLES):
+        router.stats[name].record(seconds, "ok")
+
+
+def test_provider_interface_is_abstract():
+    with pytest.raises(TypeError):
+        LLMProvider()
+
+
+def test_hedge_to_faster_provider_and_cancel_the_loser():
+    slow = MockProvider("slow", latencies=(2.0,))
+    fast = MockProvider("fast", latencies=(0.01,))
+    router = LLMRouter([slow, fast], hedge=True, hedge_min_delay=0.05)
+    _prime_latency(router, "slow", 0.05)
+
+    start = time.perf_counter()
+    reply, provider = router.complete(MESSAGES)
+
+    assert provider == "fast"
+    assert reply == "Mock reply to: hello"
+    assert time.perf_counter() - start < 1.0
+    assert _wait_for(lambda: slow.cancelled == 1)
+    assert _wait_for(lambda: router.stats["slow"].cancelled == 1)
+    assert router.stats["slow"].hedges == 1
+    assert router.stats["fast"].wins == 1
+
+
+def test_no_hedge_before_the_provider_has_a_p95():
+    slow = MockProvider("slow", latencies=(0.3,))
+    fast = MockProvider("fast", latencies=(0.01,))
+    router = LLMRouter([slow, fast], hedge=True, hedge_min_delay=0.05)
+
+    assert router.complete(MESSAGES)[1] == "slow"
+    assert fast.calls == 0
+    assert router.stats["slow"].hedges == 0
+
+
+def test_initial_delay_hedges_before_a_p95_exists():
+    slow = MockProvider("slow", latencies=(2.0,))
+    fast = MockProvider("fast", latencies=(0.01,))
+    router = LLMRouter([slow, fast], hedge=True, hedge_min_delay=0.05, hedge_initial_delay=0.05)
+
+    assert router.complete(MESSAGES)[1] == "fast"
+    assert router.stats["slow"].hedges == 1
+
+
+def test_no_hedge_when_disabled():
+    slow = MockProvider("slow", latencies=(0.2,))
+    fast = MockProvider("fast", latencies=(0.01,))
+    router = LLMRouter([slow, fast], hedge=False)
+    _prime_latency(router, "slow", 0.01)
+
+    assert router.complete(MESSAGES)[1] == "slow"
+    assert fast.calls == 0
+
+
+def test_failover_to_next_provider():
+    broken = MockProvider("broken", failures=(True,), latencies=(0.0,))
+    backup = MockProvider("backup", latencies=(0.0,))
+    router = LLMRouter([broken, backup], hedge=False)
+
+    reply, provider = router.complete(MESSAGES)
+
+    assert provider == "backup"
+    assert router.stats["broken"].errors == 1
+    assert router.stats["broken"].consecutive_failures == 1
+    assert router.stats["backup"].wins == 1
+
+
+def test_all_providers_failing_raises_with_every_error():
+    router = LLMRouter([MockProvider("a", failures=(True,), latencies=(0.0,)),
+                        MockProvider("b", failures=(True,), latencies=(0.0,))], hedge=False)
+
+    with pytest.raises(LLMError) as excinfo:
+        router.complete(MESSAGES)
+    assert set(excinfo.value.errors) == {"a", "b"}
+
+
+def test_failing_provider_moves_to_the_back():
+    flaky = MockProvider("flaky", failures=(True,), latencies=(0.0,))
+    steady = MockProvider("steady", latencies=(0.0,))
+    router = LLMRouter([flaky, steady], hedge=False)
+
+    for _ in range(3):
+        router.complete(MESSAGES)
+
+    assert [p.name for p in router.ordered_providers()] == ["steady", "flaky"]
+    router.complete(MESSAGES)
+    assert flaky.calls == 3
+
+
+def test_latency_policy_prefers_fastest_median():
+    router = LLMRouter([MockProvider("first"), MockProvider("second")], policy="latency", hedge=False)
+    _prime_latency(router, "first", 0.5)
+    _prime_latency(router, "second", 0.1)
+
+    assert [p.name for p in router.ordered_providers()] == ["second", "first"]
+
+
+def test_stats_snapshot():
+    router = LLMRouter([MockProvider("mock", latencies=(0.0,))], hedge=False)
+    for _ in range(MIN_LATENCY_SAMPLES):
+        router.complete(MESSAGES)
+
+    snapshot = router.snapshot()["providers"]["mock"]
+    assert snapshot["calls"] == MIN_LATENCY_SAMPLES
+    assert snapshot["wins"] == MIN_LATENCY_SAMPLES
+    assert snapshot["errors"] == 0
+    assert snapshot["p50_ms"] is not None and snapshot["p95_ms"] >= snapshot["p50_ms"]
@@ -0,0 +1,135 @@
+import os
+from html.parser import HTMLParser
+
+import pytest
+
+from localization import FRONTEND_DIR, LANGUAGES, PageTemplate, load_catalog, negotiate_language
+
+PAGES = sorted(name for name in os.listdir(FRONTEND_DIR) if name.endswith(".html"))
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class _Element:
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.children = []
+
+    def text_content(self):
+        return "".join(child if isinstance(child, str) else child.text_content() for child in self.children)
+
+    def iter(self):
+        yield self
+        for child in self.children:
+            if isinstance(child, _Element):
+                yield from child.iter()
+
+
+class _TreeBuilder(HTMLParser):
+    """Just enough of a DOM to run applyTranslations() against"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Element("#document", [])
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = _Element(tag, attrs)
+        self.stack[-1].children.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.stack[-1].children.append(_Element(tag, attrs))
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag == tag:
+                del self.stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def _parse(source):
+    builder = _TreeBuilder()
+    builder.feed(source)
+    builder.close()
+    return builder.root
+
+
+def _apply_translations(document, t):
+    """main.js applyTranslations(), step for step"""
+    for element in document.iter():
+        key = element.attrs.get("data-translate")
+        if not key:
+            continue
+        value = t
+        for k in key.split("."):
+            value = value.get(k) if isinstance(value, dict) else None
+            if value is None:
+                break
+        if isinstance(value, str):
+            if "placeholder" in element.attrs:
+                element.attrs["placeholder"] = value
+            else:
+                element.children = [value]
+
+
+def _visible(document):
+    """What the visitor gets: every element's attributes and text, in document order"""
+    state = []
+    for element in document.iter():
+        attrs = {name: value for name, value in element.attrs.items() if name != "data-lang"}
+        state.append((element.tag, sorted(attrs.items()), [c for c in element.children if isinstance(c, str)]))
+    return state
+
+
+def _overlay(keys, lang):
+    """A translation tree for every other key, with text that needs escaping"""
+    tree = {}
+    for i, key in enumerate(sorted(keys)):
+        if i % 2:
+            continue  # missing keys keep the source text
+        node = tree
+        *parents, leaf = key.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = f'{lang} <{key}> & "{i}"'
+    return tree
+
+
+@pytest.mark.parametrize("page", PAGES)
+@pytest.mark.parametrize("lang", [lang for lang in LANGUAGES if lang != "en"])
+def test_render_matches_client_side_translation(page, lang):
+    with open(os.path.join(FRONTEND_DIR, page), "r", encoding="utf-8") as f:
+        source = f.read()
+    template = PageTemplate(source)
+    if not template.keys:
+        pytest.skip(f"{page} has no data-translate elements")
+    translations = _overlay(template.keys, lang)
+
+    expected = _parse(source)
+    _apply_translations(expected, translations)
+    rendered = template.render(lang, translations)
+
+    assert _visible(expected) != _visible(_parse(source)), "nothing on the page was translated"
+    assert _visible(_parse(rendered)) == _visible(expected)
+    assert f'<html data-lang="{lang}"' in rendered
+
+
+def test_bundled_catalog_loads():
+    assert set(load_catalog()) <= set(LANGUAGES)
+
+
+def test_english_render_is_the_source_page():
+    source = '<html><body><h1 data-translate="hero.title">Hello</h1></body></html>'
+    assert PageTemplate(source).render("en", {}) == source.replace("<html", '<html data-lang="en"', 1)
+
+
+def test_language_negotiation_order():
+    assert negotiate_language("zh", "en-IN,en;q=0.8") == "zh"
+    assert negotiate_language(None, "en-IN,en;q=0.8") == "en-IN"
+    assert negotiate_language("klingon", "fr-FR,zh-TW;q=0.5") == "zh"
+    assert negotiate_language(None, None) == "en"
@@ -0,0 +1,80 @@
+import json
+import os
+import time
+
+import session_store
+from session_store import SessionStore
+
+
+def _store(path):
+    return SessionStore(path=str(path), interval=3600)
+
+
+def _append(path, record):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def test_restore_keeps_newest_record_whatever_the_append_order(tmp_path):
+    log = tmp_path / "sessions.jsonl"
+    now = time.time()
+    _append(log, {"id": "u", "updated_at": now, "session": {"current_field": "Email"}})
+    # A worker with an old copy snapshots after the newer record was written
+    _append(log, {"id": "u", "updated_at": now - 60, "session": {"current_field": "Full Name"}})
+
+    store = _store(log)
+    assert store["u"]["current_field"] == "Email"
+
+
+def test_stale_record_does_not_resurrect_deleted_session(tmp_path):
+    log = tmp_path / "sessions.jsonl"
+    now = time.time()
+    _append(log, {"id": "u", "deleted": True, "updated_at": now})
+    _append(log, {"id": "u", "updated_at": now - 60, "session": {"mode": "collecting"}})
+
+    assert "u" not in _store(log)
+
+
+def test_forked_worker_reloads_instead_of_using_inherited_sessions(tmp_path, monkeypatch):
+    log = tmp_path / "sessions.jsonl"
+    parent = _store(log)
+    parent.load()
+    parent["u"] = {"current_field": "Full Name"}
+    parent.snapshot()
+
+    # A later worker moves the conversation on
+    other = _store(log)
+    other["u"]["current_field"] = "Deadline"
+    other.snapshot()
+
+    # The parent's memory is stale; a process forked from it must re-read the log
+    monkeypatch.setattr(session_store.os, "getpid", lambda: os.getppid() + 100000)
+    assert parent["u"]["current_field"] == "Deadline"
+
+
+def test_compaction_keeps_newest_record(tmp_path):
+    log = tmp_path / "sessions.jsonl"
+    now = time.time()
+    _append(log, {"id": "u", "updated_at": now, "session": {"current_field": "Email"}})
+    _append(log, {"id": "u", "updated_at": now - 60, "session": {"current_field": "Full Name"}})
+
+    store = _store(log)
+    store.load()
+    store.compact()
+
+    lines = log.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["session"]["current_field"] == "Email"
+
+
+def test_peek_does_not_count_as_activity(tmp_path):
+    store = _store(tmp_path / "sessions.jsonl")
+    store["u"] = {"mode": "collecting"}
+    store._updated_at["u"] -= 600
+
+    assert store.peek("u") == {"mode": "collecting"}
+    assert store.peek("missing") is None
+    assert [key for key, _ in store.idle_items(300)] == ["u"]
+
+    store.get("u")
+    assert store.idle_items(300) == []
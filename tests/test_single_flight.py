@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def _burst(flight, key, fn, callers):
+    """Call flight.do() from `callers` threads; returns their results (or exceptions)"""
+    results = []
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            results.append(e)
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_with_one_key_run_once():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    runs = []
+
+    def upstream():
+        runs.append(1)
+        release.wait(2)
+        return "answer"
+
+    threads, results = _burst(flight, "pricing", upstream, 8)
+    assert _wait_for(lambda: flight.stats["calls"] == 8)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert results == ["answer"] * 8
+    assert len(runs) == 1
+    assert flight.stats == {"calls": 8, "executed": 1, "collapsed": 7}
+    assert flight.in_flight() == 0
+
+
+def test_waiters_share_the_leaders_exception():
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def upstream():
+        release.wait(2)
+        raise RuntimeError("quota exceeded")
+
+    threads, results = _burst(flight, "pricing", upstream, 4)
+    assert _wait_for(lambda: flight.stats["calls"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert len(results) == 4
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats["executed"] == 1
+
+
+def test_nothing_is_cached_after_the_flight_lands():
+    flight = SingleFlight("test")
+    calls = []
+    flight.do("pricing", lambda: calls.append(1))
+    flight.do("pricing", lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    slow, _ = _burst(flight, "slow", lambda: release.wait(2), 1)
+    assert _wait_for(lambda: flight.in_flight() == 1)
+
+    assert flight.do("fast", lambda: "done") == "done"
+    release.set()
+    slow[0].join(2)
+
+
+def test_async_calls_with_one_key_run_once():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def upstream():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def burst():
+        return await asyncio.gather(*(flight.do_async("pricing", upstream) for _ in range(5)))
+
+    assert asyncio.run(burst()) == ["answer"] * 5
+    assert len(runs) == 1
+    assert flight.stats["collapsed"] == 4
+
+
+def test_cancelled_async_waiter_does_not_cancel_the_flight():
+    flight = SingleFlight("test")
+
+    async def upstream():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do_async("pricing", upstream))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do_async("pricing", upstream))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+
+    assert asyncio.run(scenario()) == "answer"
@@ -0,0 +1,81 @@
+import os
+import threading
+
+import sqlite_store
+from sqlite_store import LEADS_TABLE_SQL, SQLiteConnections, adapt_query
+
+INSERT = adapt_query("""
+    INSERT INTO leads (full_name, email, phone_number, address, project_requirement, deadline)
+    VALUES (%s, %s, %s, %s, %s, %s)
+""")
+LEAD = ("Asha Patil", "asha@example.com", "9876543210", "12 MG Road, Pune", "bakery website", "2 months")
+
+
+def _store(tmp_path):
+    store = SQLiteConnections(path=str(tmp_path / "data" / "leads.db"))
+    store.init_schema()
+    return store
+
+
+def test_connection_uses_wal_and_configured_pragmas(tmp_path):
+    conn = _store(tmp_path).connect()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == sqlite_store.BUSY_TIMEOUT_MS
+
+
+def test_one_cached_connection_per_thread(tmp_path):
+    store = _store(tmp_path)
+    assert store.connect() is store.connect()
+
+    others = []
+    thread = threading.Thread(target=lambda: others.append(store.connect()))
+    thread.start()
+    thread.join()
+    assert others[0] is not store.connect()
+
+
+def test_forked_process_opens_its_own_connection(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    inherited = store.connect()
+    monkeypatch.setattr(sqlite_store.os, "getpid", lambda: os.getppid() + 100000)
+    assert store.connect() is not inherited
+
+
+def test_close_rolls_back_and_keeps_the_connection(tmp_path):
+    store = _store(tmp_path)
+    conn = store.connect()
+    conn.execute(INSERT, LEAD)
+    conn.close()
+
+    assert store.connect() is conn
+    assert conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0] == 0
+
+    conn.execute(INSERT, LEAD)
+    conn.commit()
+    conn.close()
+    assert conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0] == 1
+
+
+def test_reader_is_not_blocked_by_an_open_write(tmp_path):
+    store = _store(tmp_path)
+    writer = store.connect()
+    writer.execute(INSERT, LEAD)  # transaction left open
+
+    counts = []
+    def read():
+        counts.append(store.connect().execute("SELECT COUNT(*) FROM leads").fetchone()[0])
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join(2)
+
+    assert counts == [0]
+    writer.commit()
+
+
+def test_schema_matches_exported_columns(tmp_path):
+    conn = _store(tmp_path).connect()
+    conn.execute(LEADS_TABLE_SQL)  # idempotent
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(leads)")]
+    assert columns == ["id", "full_name", "email", "phone_number", "address",
+                       "project_requirement", "deadline", "timestamp"]
@@ -0,0 +1,66 @@
+import pytest
+
+from traffic_replay import TrafficRecorder, anonymize, load_traffic, mask
+from validation import CONTACT_SCHEMA, validate_field, validate_record
+
+# (field, value) pairs on both sides of every lead validation rule
+LEAD_ANSWERS = [
+    ("Full Name", "Asha Patil"), ("Full Name", "Dr. R. K. Verma"), ("Full Name", "José Núñez"),
+    ("Full Name", "A"), ("Full Name", "R2-D2"),
+    ("Email", "asha.patil+web@example.co.in"), ("Email", "asha@localhost"), ("Email", "asha@@example.com"),
+    ("Phone Number", "+91 98765-43210"), ("Phone Number", "(022) 2345 6789"), ("Phone Number", "98765"),
+    ("Phone Number", "98765 ext 12"),
+    ("Address", "12 MG Road, Pune"), ("Address", "Pune"),
+    ("Project Requirement", "bakery website"), ("Project Requirement", "UI"),
+    ("Deadline", "2 months"), ("Deadline", "x"),
+]
+
+
+def _classes(value):
+    return ["digit" if ch.isdigit() else "upper" if ch.isupper() else "lower" if ch.isalpha() else ch
+            for ch in value]
+
+
+@pytest.mark.parametrize("value", ["Asha Patil", "+91 98765-43210", "asha@example.com", "12/B, MG Road", "José"])
+def test_mask_keeps_length_and_character_classes(value):
+    masked = mask(value)
+    assert masked != value
+    assert len(masked) == len(value)
+    assert _classes(masked) == _classes(value)
+    assert [ch.isascii() for ch in masked] == [ch.isascii() for ch in value]
+
+
+@pytest.mark.parametrize("field, value", LEAD_ANSWERS)
+def test_masked_lead_answer_validates_like_the_original(field, value):
+    body = anonymize("/chat", f"collecting:{field}", {"message": value})
+    assert validate_field(field, body["message"])[0] == validate_field(field, value)[0]
+
+
+@pytest.mark.parametrize("email", ["asha@example.com", "asha@example"])
+def test_masked_contact_form_validates_like_the_original(email):
+    form = {"firstName": "Asha", "lastName": "Patil", "email": email, "phone": "9876543210",
+            "message": "Need a bakery website", "services": ["web"], "countryCode": "+91"}
+    masked = anonymize("/contact", "contact", form)
+
+    assert masked["services"] == ["web"] and masked["countryCode"] == "+91"
+    assert masked["firstName"] == "Xxxx"
+    assert validate_record(masked, CONTACT_SCHEMA) == validate_record(form, CONTACT_SCHEMA)
+
+
+def test_support_message_masks_only_contact_details():
+    message = "Pricing for a 5 page site? Reach me at asha@example.com or +91 98765 43210"
+    masked = anonymize("/chat", "support", {"message": message})["message"]
+    assert masked == "Pricing for a 5 page site? Reach me at xxxx@xxxxxxx.xxx or +55 55555 55555"
+
+
+def test_recorded_entries_round_trip(tmp_path):
+    recorder = TrafficRecorder(enabled=True, sample_rate=1.0, directory=str(tmp_path))
+    recorder.start = lambda: None  # flushes are driven by the test
+    body = anonymize("/chat", "collecting:Email", {"message": "asha@example.com"})
+    recorder.record("/chat", "collecting:Email", body, 200, 12.5)
+    assert recorder.flush() == 1
+
+    [entry] = load_traffic([str(tmp_path)])
+    assert (entry["path"], entry["kind"], entry["status"]) == ("/chat", "collecting:Email", 200)
+    assert entry["body"] == {"message": "xxxx@xxxxxxx.xxx"}
+    assert validate_field("Email", entry["body"]["message"])[0]
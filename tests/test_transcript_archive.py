@@ -0,0 +1,66 @@
+import pytest
+
+import transcript_archive
+from transcript_archive import TranscriptArchiver, iter_transcripts, list_segments
+
+MESSAGES = [
+    {"role": "user", "content": "Do you build Shopify stores?"},
+    {"role": "assistant", "content": "Yes — we build and migrate Shopify stores."},
+    {"role": "user", "content": "कितना खर्च होगा?"},
+]
+
+
+COMPRESSIONS = ["gzip", pytest.param("zstd", marks=pytest.mark.skipif(
+    transcript_archive.zstandard is None, reason="zstandard not installed"))]
+
+
+def _archiver(tmp_path, compression="gzip", **kwargs):
+    archiver = TranscriptArchiver(mode="file", directory=str(tmp_path), compression=compression, **kwargs)
+    archiver.start = lambda: None  # flushes are driven by the test
+    return archiver
+
+
+def test_archiving_is_off_by_default():
+    assert transcript_archive.TRANSCRIPT_ARCHIVE == "off"
+    archiver = TranscriptArchiver(mode=transcript_archive.TRANSCRIPT_ARCHIVE)
+    assert archiver.archive("s1", MESSAGES, "lead") is False
+    assert archiver.snapshot()["buffered"] == 0
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_segment_round_trip(tmp_path, compression):
+    archiver = _archiver(tmp_path, compression)
+    assert archiver.archive("s1", MESSAGES, "lead")
+    assert archiver.archive("s2", MESSAGES[:1], "idle")
+    assert archiver.flush() == 2
+    assert archiver.archive("s3", MESSAGES[1:], "restart")
+    assert archiver.flush() == 1
+
+    assert len(list_segments(str(tmp_path))) == 1
+    records = list(iter_transcripts(str(tmp_path)))
+    assert [(r["session_id"], r["reason"], r["turns"]) for r in records] == [
+        ("s1", "lead", 2), ("s2", "idle", 1), ("s3", "restart", 1)]
+    assert records[0]["messages"] == MESSAGES
+    assert archiver.snapshot()["written"] == 3
+
+
+def test_segment_rotates_at_the_size_limit(tmp_path):
+    archiver = _archiver(tmp_path, segment_max_bytes=1)
+    for session_id in ("s1", "s2"):
+        archiver.archive(session_id, MESSAGES, "lead")
+        archiver.flush()
+    assert len(list_segments(str(tmp_path))) == 2
+    assert [r["session_id"] for r in iter_transcripts(str(tmp_path))] == ["s1", "s2"]
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_torn_frame_ends_the_segment(tmp_path, compression):
+    archiver = _archiver(tmp_path, compression)
+    archiver.archive("s1", MESSAGES, "lead")
+    archiver.flush()
+    path = list_segments(str(tmp_path))[0]
+    with open(path, "ab") as f:
+        frame = transcript_archive._compress(b'{"session_id":"s2"}\n', compression)
+        f.write(frame[:len(frame) // 2])
+
+    assert [r["session_id"] for r in iter_transcripts(str(tmp_path))] == ["s1"]
@@ -0,0 +1,33 @@
+import json
+
+from ws_chat import ChatSocketHub, WS_MAX_MESSAGE_BYTES
+
+
+class _Conn:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, payload):
+        self.sent.append(payload)
+
+
+def _frame(message):
+    return json.dumps({"type": "message", "id": "m1", "message": message}, ensure_ascii=False)
+
+
+def test_frame_size_limit_counts_utf8_bytes():
+    hub = ChatSocketHub()
+    handled = []
+    handle = lambda message, message_id: (handled.append(message) or {"reply": "ok"}, 200)
+
+    # Under the limit in characters, over it in bytes (Devanagari is 3 bytes per character)
+    oversized = "न" * (WS_MAX_MESSAGE_BYTES // 3 + 1)
+    conn = _Conn()
+    hub._handle_frame(conn, _frame(oversized), handle, None)
+    assert conn.sent == [{"type": "error", "message": "Unsupported frame."}]
+    assert handled == []
+
+    conn = _Conn()
+    hub._handle_frame(conn, _frame("नमस्ते"), handle, None)
+    assert conn.sent[0]["type"] == "reply"
+    assert handled == ["नमस्ते"]